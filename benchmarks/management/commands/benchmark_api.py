@@ -0,0 +1,203 @@
+import asyncio
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from rest_framework.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from benchmarks.suite import (
+    DEFAULT_MIX,
+    InProcessClient,
+    RemoteClient,
+    Workload,
+    compare,
+    run_workload,
+)
+from benchmarks.utils import (
+    ensure_books,
+    ensure_users,
+    get_benchmark_admin,
+    seed_history,
+)
+
+
+def parse_mix(value):
+    mix = {}
+
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in DEFAULT_MIX or not weight.isdigit():
+            raise CommandError(
+                f"Bad --mix entry {part!r}; use name=weight with names "
+                f"from: {', '.join(DEFAULT_MIX)}."
+            )
+        mix[name] = int(weight)
+
+    return mix
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a dataset, drive a mixed read/checkout/return/token workload "
+        "in-process or against --url, and write or compare a JSON baseline"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--books", type=int, default=1000)
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument(
+            "--history",
+            type=int,
+            default=10000,
+            help="Returned borrowings to seed for the benchmark users",
+        )
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=20)
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=8,
+            help="Worker threads serving in-process requests",
+        )
+        parser.add_argument("--warmup", type=int, default=50)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--mix",
+            default=",".join(
+                f"{name}={weight}" for name, weight in DEFAULT_MIX.items()
+            ),
+            help="Operation weights, e.g. books=40,checkout=10",
+        )
+        parser.add_argument(
+            "--url",
+            help="Base URL of a running server using this database; "
+            "in-process when omitted",
+        )
+        parser.add_argument(
+            "--throttle",
+            action="store_true",
+            help="Keep the token/checkout throttles on for in-process runs",
+        )
+        parser.add_argument("--output", help="Write the results as JSON here")
+        parser.add_argument("--compare", help="Baseline JSON to diff against")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=10.0,
+            help="Percent change that counts as a regression",
+        )
+
+    def handle(self, *args, **options):
+        mix = parse_mix(options["mix"])
+        books = ensure_books(options["books"])
+        users = ensure_users(options["users"])
+        seed_history(users, books, options["history"])
+
+        workload = Workload(
+            mix,
+            books=[book.id for book in books],
+            users=[(user.email, str(AccessToken.for_user(user))) for user in users],
+            admin_token=str(AccessToken.for_user(get_benchmark_admin())),
+            seed=options["seed"],
+        )
+
+        if options["url"]:
+            client = RemoteClient(options["url"], options["concurrency"])
+        else:
+            client = InProcessClient(options["threads"])
+
+        # A few benchmark users send every checkout and login, far beyond
+        # the per-user rates.
+        rates = (
+            api_settings.DEFAULT_THROTTLE_RATES
+            if options["throttle"] or options["url"]
+            else {}
+        )
+        with override_settings(
+            REST_FRAMEWORK={**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": rates}
+        ):
+            results = asyncio.run(self.run(client, workload, options))
+        results["meta"] = {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "client": client.name,
+            "url": options["url"],
+            "mix": mix,
+            **{
+                name: options[name]
+                for name in (
+                    "books",
+                    "users",
+                    "history",
+                    "requests",
+                    "concurrency",
+                    "threads",
+                    "warmup",
+                    "seed",
+                )
+            },
+            "settings": {
+                "ASYNC_READ_VIEWS": settings.ASYNC_READ_VIEWS,
+                "DB_POOL_MODE": settings.DB_POOL_MODE,
+                "FAST_LIST_SERIALIZATION": settings.FAST_LIST_SERIALIZATION,
+                "THROTTLE": bool(rates),
+            },
+        }
+
+        self.write_results(results)
+
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(results, output, indent=2)
+
+        if options["compare"]:
+            with open(options["compare"]) as baseline:
+                self.write_comparison(
+                    json.load(baseline), results, options["threshold"]
+                )
+
+    async def run(self, client, workload, options):
+        async with client:
+            return await run_workload(
+                client,
+                workload,
+                options["requests"],
+                options["concurrency"],
+                options["warmup"],
+            )
+
+    def write_results(self, results):
+        rows = {"total": results["total"], **results["operations"]}
+
+        for name, result in rows.items():
+            queries = result["queries"]
+            self.stdout.write(
+                f"{name:<11} {result['requests']:>6} req "
+                f"{result['throughput']:>8.1f} req/s "
+                f"p50={result['p50']:.1f}ms p95={result['p95']:.1f}ms "
+                f"p99={result['p99']:.1f}ms errors={result['errors']}"
+                + ("" if queries is None else f" queries={queries:.1f}")
+            )
+
+    def write_comparison(self, baseline, results, threshold):
+        regressions = []
+
+        for name, metric, old, new, change, regressed in compare(
+            baseline, results, threshold
+        ):
+            line = (
+                f"{name:<11} {metric:<10} {old:>10.2f} -> {new:>10.2f} ({change:+.1f}%)"
+            )
+
+            if regressed:
+                regressions.append(line)
+                line = self.style.ERROR(line + " REGRESSION")
+
+            self.stdout.write(line)
+
+        if regressions:
+            raise CommandError(
+                f"{len(regressions)} metrics regressed by more than {threshold}%"
+            )
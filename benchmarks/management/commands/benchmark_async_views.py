@@ -0,0 +1,209 @@
+import asyncio
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from rest_framework_simplejwt.tokens import AccessToken
+
+from benchmarks.utils import ensure_borrowings, get_benchmark_user, summarize
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare book/borrowing reads served by sync views under WSGI threads "
+        "with the async views under one ASGI event loop, with slow clients"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "paths",
+            nargs="*",
+            default=["/api/books/?page_size=20", "/api/borrowings/?page_size=20"],
+        )
+        parser.add_argument("--requests", type=int, default=400)
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=50,
+            help="Clients in flight at once",
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=8,
+            help="WSGI worker threads",
+        )
+        parser.add_argument(
+            "--pool-size",
+            type=int,
+            default=20,
+            help="Connection pool size for ASGI",
+        )
+        parser.add_argument(
+            "--client-delay",
+            type=float,
+            default=0.05,
+            help="Seconds each client takes to read the response body",
+        )
+        parser.add_argument("--mode", choices=("wsgi", "asgi"), help="Internal")
+        parser.add_argument("--token", help="Internal")
+
+    def handle(self, *args, **options):
+        if options["mode"]:
+            self.stdout.write(json.dumps(self.run_mode(options)))
+            return
+
+        token = self.prepare()
+
+        # URL routing depends on ASYNC_READ_VIEWS, so each mode gets its own
+        # process. ASGI handles every request in a new context, so it needs
+        # the pool to reuse connections.
+        modes = {
+            "wsgi": {"ASYNC_READ_VIEWS": "false"},
+            "asgi": {
+                "ASYNC_READ_VIEWS": "true",
+                "DB_POOL_MODE": "pool",
+                "DB_POOL_MAX_SIZE": str(options["pool_size"]),
+            },
+        }
+
+        for mode, env in modes.items():
+            command = [
+                sys.executable,
+                sys.argv[0],
+                "benchmark_async_views",
+                *options["paths"],
+                f"--mode={mode}",
+                f"--token={token}",
+                f"--requests={options['requests']}",
+                f"--concurrency={options['concurrency']}",
+                f"--threads={options['threads']}",
+                f"--client-delay={options['client_delay']}",
+            ]
+            output = subprocess.run(
+                command,
+                env={**os.environ, **env},
+                capture_output=True,
+                check=True,
+                text=True,
+            ).stdout
+
+            for path, result in json.loads(output.splitlines()[-1]).items():
+                self.stdout.write(
+                    f"{mode} {path}: {result['throughput']:.0f} req/s "
+                    f"p50={result['p50']:.1f}ms p95={result['p95']:.1f}ms "
+                    f"errors={result['errors']}"
+                )
+
+    def prepare(self):
+        user = get_benchmark_user()
+        ensure_borrowings(user, 100)
+
+        return str(AccessToken.for_user(user))
+
+    def run_mode(self, options):
+        run = self.run_wsgi if options["mode"] == "wsgi" else self.run_asgi
+        results = {}
+
+        for path in options["paths"]:
+            path, _, query = path.partition("?")
+            start = time.perf_counter()
+            timings, statuses = run(path, query, options)
+            elapsed = time.perf_counter() - start
+
+            results[f"{path}?{query}" if query else path] = {
+                "throughput": len(timings) / elapsed,
+                **summarize(timings),
+                "errors": sum(status != 200 for status in statuses),
+            }
+
+        return results
+
+    def run_wsgi(self, path, query, options):
+        handler = WSGIHandler()
+        statuses = []
+
+        def start_response(status, headers):
+            statuses.append(int(status.split()[0]))
+
+        def serve():
+            environ = {
+                "REQUEST_METHOD": "GET",
+                "PATH_INFO": path,
+                "QUERY_STRING": query,
+                "SERVER_NAME": "localhost",
+                "SERVER_PORT": "80",
+                "HTTP_HOST": "localhost",
+                "HTTP_AUTHORIZATION": f"Bearer {options['token']}",
+                "wsgi.url_scheme": "http",
+                "wsgi.input": io.BytesIO(),
+                "wsgi.errors": sys.stderr,
+            }
+            response = handler(environ, start_response)
+            b"".join(response)
+            # A slow client keeps the worker thread busy while it reads.
+            time.sleep(options["client_delay"])
+            response.close()
+
+        with ThreadPoolExecutor(options["threads"]) as workers:
+
+            def request(_):
+                start = time.perf_counter()
+                workers.submit(serve).result()
+                return (time.perf_counter() - start) * 1000
+
+            with ThreadPoolExecutor(options["concurrency"]) as clients:
+                timings = list(clients.map(request, range(options["requests"])))
+
+        return timings, statuses
+
+    def run_asgi(self, path, query, options):
+        handler = ASGIHandler()
+        statuses = []
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": [
+                (b"host", b"localhost"),
+                (b"authorization", f"Bearer {options['token']}".encode()),
+            ],
+            "client": ("127.0.0.1", 0),
+            "server": ("localhost", 80),
+        }
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                statuses.append(message["status"])
+            elif not message.get("more_body"):
+                await asyncio.sleep(options["client_delay"])
+
+        async def request(limit):
+            async with limit:
+                start = time.perf_counter()
+                await handler(dict(scope), receive, send)
+                return (time.perf_counter() - start) * 1000
+
+        async def main():
+            limit = asyncio.Semaphore(options["concurrency"])
+            return await asyncio.gather(
+                *(request(limit) for _ in range(options["requests"]))
+            )
+
+        return list(asyncio.run(main())), statuses
@@ -0,0 +1,51 @@
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from borrowing.views import BorrowingViewSet
+from users.authentication import CachedJWTAuthentication
+from users.serializers import UserTokenObtainPairSerializer
+
+
+class Command(BaseCommand):
+    help = "Compare borrowings list latency with and without CachedJWTAuthentication"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--email", default="benchmark@example.com")
+        parser.add_argument("--requests", type=int, default=500)
+
+    def handle(self, *args, **options):
+        user, _ = get_user_model().objects.get_or_create(email=options["email"])
+        token = UserTokenObtainPairSerializer.get_token(user).access_token
+        client = Client(HTTP_HOST="localhost", HTTP_AUTHORIZATION=f"Bearer {token}")
+        url = reverse("borrowing:borrowing-list")
+        original = BorrowingViewSet.authentication_classes
+
+        try:
+            for auth_class in (JWTAuthentication, CachedJWTAuthentication):
+                BorrowingViewSet.authentication_classes = (auth_class,)
+                client.get(url)
+
+                timings = []
+                with CaptureQueriesContext(connection) as queries:
+                    for _ in range(options["requests"]):
+                        start = time.perf_counter()
+                        client.get(url)
+                        timings.append((time.perf_counter() - start) * 1000)
+
+                timings.sort()
+                self.stdout.write(
+                    f"{auth_class.__name__}: "
+                    f"p50={statistics.median(timings):.2f}ms "
+                    f"p95={timings[int(len(timings) * 0.95) - 1]:.2f}ms "
+                    f"queries/request={len(queries) / options['requests']:.1f}"
+                )
+        finally:
+            BorrowingViewSet.authentication_classes = original
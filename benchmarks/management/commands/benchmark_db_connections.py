@@ -0,0 +1,91 @@
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+
+POOLED_ENGINE = "library_service_project.pooled_postgresql"
+
+
+class Command(BaseCommand):
+    help = "Compare connection-per-request, persistent and pooled DB connections"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--pool-size", type=int, default=4)
+        parser.add_argument("--query", default="SELECT 1")
+
+    def handle(self, *args, **options):
+        modes = {
+            "none": {"CONN_MAX_AGE": 0},
+            "persistent": {"CONN_MAX_AGE": None, "CONN_HEALTH_CHECKS": True},
+            "pool": {
+                "ENGINE": POOLED_ENGINE,
+                "CONN_MAX_AGE": 0,
+                "POOL": {"MAX_SIZE": options["pool_size"], "TIMEOUT": 30},
+            },
+        }
+
+        for mode, overrides in modes.items():
+            settings_dict = {
+                **connection.settings_dict,
+                "ENGINE": "django.db.backends.postgresql",
+                "CONN_HEALTH_CHECKS": False,
+                **overrides,
+            }
+            timings, elapsed, pool = self.run(mode, settings_dict, options)
+
+            timings.sort()
+            line = (
+                f"{mode}: {len(timings) / elapsed:.0f} req/s "
+                f"p50={statistics.median(timings):.2f}ms "
+                f"p95={timings[int(len(timings) * 0.95) - 1]:.2f}ms"
+            )
+            if pool is not None:
+                stats = pool.stats()
+                line += (
+                    f" pool_wait_avg={stats['wait_time_avg'] * 1000:.2f}ms"
+                    f" pool_size={stats['size']}/{stats['max_size']}"
+                )
+                pool.close()
+
+            self.stdout.write(line)
+
+    def run(self, mode, settings_dict, options):
+        # Registering the alias gives every thread its own wrapper, exactly
+        # like request threads served from ``connections["default"]``.
+        alias = f"benchmark-{mode}"
+        connections.settings[alias] = settings_dict
+        timings = []
+        lock = threading.Lock()
+
+        def worker():
+            db = connections[alias]
+            local = []
+
+            for _ in range(options["requests"]):
+                start = time.perf_counter()
+                db.close_if_unusable_or_obsolete()
+                with db.cursor() as cursor:
+                    cursor.execute(options["query"])
+                    cursor.fetchall()
+                db.close_if_unusable_or_obsolete()
+                local.append((time.perf_counter() - start) * 1000)
+
+            db.close()
+            with lock:
+                timings.extend(local)
+
+        threads = [threading.Thread(target=worker) for _ in range(options["threads"])]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        pool = connections[alias].get_pool() if mode == "pool" else None
+        del connections.settings[alias]
+        return timings, elapsed, pool
@@ -0,0 +1,92 @@
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from books.filters import BookSearchFilter
+from books.models import Book
+
+WORDS = (
+    "shadow river king night garden war silent empire stone winter "
+    "glass storm queen fire ocean golden secret forest iron star"
+).split()
+NAMES = (
+    "austen tolkien herbert orwell atwood pratchett le guin morrison "
+    "murakami dostoevsky woolf borges calvino eco tolstoy"
+).split()
+
+
+class Command(BaseCommand):
+    help = "Time ranked catalog search and show whether the indexes are used"
+
+    def add_arguments(self, parser):
+        parser.add_argument("queries", nargs="*", default=["storm queen", "tolkien"])
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Insert this many synthetic books before measuring",
+        )
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def handle(self, *args, **options):
+        if options["seed"]:
+            self.seed(options["seed"])
+
+        factory = APIRequestFactory()
+        page_size = settings.REST_FRAMEWORK["PAGE_SIZE"]
+
+        for terms in options["queries"]:
+            request = Request(factory.get("/", {"search": terms}))
+            queryset = BookSearchFilter().filter_queryset(
+                request, Book.objects.all(), None
+            )[: page_size + 1]
+
+            timings = []
+            for _ in range(options["repeat"]):
+                start = time.perf_counter()
+                list(queryset.values_list("id", flat=True))
+                timings.append((time.perf_counter() - start) * 1000)
+
+            timings.sort()
+            plan = queryset.explain(analyze=True)
+            indexes = [
+                name
+                for name in (
+                    "books_book_search_idx",
+                    "books_book_title_trgm_idx",
+                    "books_book_author_trgm_idx",
+                )
+                if name in plan
+            ]
+
+            self.stdout.write(
+                f"{terms!r}: p50={statistics.median(timings):.2f}ms "
+                f"p95={timings[int(len(timings) * 0.95) - 1]:.2f}ms "
+                f"indexes={', '.join(indexes) or 'NONE'}"
+            )
+            if "Seq Scan" in plan:
+                self.stdout.write(self.style.WARNING(plan))
+
+    def seed(self, count, batch_size=10000):
+        self.stdout.write(f"Seeding {count} books...")
+
+        for offset in range(0, count, batch_size):
+            Book.objects.bulk_create(
+                Book(
+                    title=" ".join(random.sample(WORDS, 3)).title(),
+                    author=" ".join(random.sample(NAMES, 2)).title(),
+                    cover=random.choice(("HARD", "SOFT")),
+                    inventory=random.randint(0, 10),
+                    daily_fee=random.randint(1, 500) / 100,
+                )
+                for _ in range(min(batch_size, count - offset))
+            )
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE books_book")
@@ -0,0 +1,73 @@
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from benchmarks.utils import ensure_borrowings, get_benchmark_user, summarize
+from books.models import Book
+from books.serializers import BookListSerializer, BookSerializer
+from borrowing.models import Borrowing
+from borrowing.serializers import BorrowingReadSerializer
+from library_service_project.serializers import get_values_serializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare DRF serializers with the .values() fast path on N rows; "
+        "'total' includes the query and JSON rendering"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        rows = options["rows"]
+        user = get_benchmark_user()
+        ensure_borrowings(user, rows)
+
+        cases = (
+            (BookListSerializer, Book.objects.order_by("id")[:rows]),
+            (BookSerializer, Book.objects.order_by("id")[:rows]),
+            (
+                BorrowingReadSerializer,
+                Borrowing.objects.select_related("book", "user").filter(user=user)[
+                    :rows
+                ],
+            ),
+        )
+
+        for serializer_class, queryset in cases:
+            values_serializer = get_values_serializer(serializer_class)
+            instances = list(queryset)
+            rows = list(values_serializer.get_queryset(queryset))
+
+            assert JSONRenderer().render(
+                serializer_class(instances, many=True).data
+            ) == JSONRenderer().render(values_serializer.serialize(rows))
+
+            runs = {
+                "drf serialize": lambda: serializer_class(instances, many=True).data,
+                "fast serialize": lambda: values_serializer.serialize(rows),
+                "drf total": lambda: JSONRenderer().render(
+                    serializer_class(list(queryset), many=True).data
+                ),
+                "fast total": lambda: JSONRenderer().render(
+                    values_serializer.serialize(
+                        values_serializer.get_queryset(queryset)
+                    )
+                ),
+            }
+
+            for name, run in runs.items():
+                timings = []
+                for _ in range(options["repeat"]):
+                    start = time.perf_counter()
+                    run()
+                    timings.append((time.perf_counter() - start) * 1000)
+
+                result = summarize(timings)
+                self.stdout.write(
+                    f"{serializer_class.__name__} {name}: {len(rows)} rows "
+                    f"p50={result['p50']:.1f}ms p95={result['p95']:.1f}ms"
+                )
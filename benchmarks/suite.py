@@ -0,0 +1,312 @@
+import asyncio
+import contextvars
+import io
+import json
+import math
+import random
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import aiohttp
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from benchmarks.utils import BENCHMARK_PASSWORD, summarize
+
+DEFAULT_MIX = {
+    "books": 40,
+    "book": 15,
+    "borrowings": 20,
+    "checkout": 10,
+    "return": 10,
+    "token": 5,
+}
+
+# Metrics where a bigger number is worse; throughput is the other way round.
+LOWER_IS_BETTER = ("p50", "p95", "p99", "queries")
+
+# The query count ServerTimingMiddleware puts in its `db` metric.
+SERVER_TIMING_QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+# Queries run for the request being measured, when counted in-process.
+request_queries = contextvars.ContextVar("request_queries", default=None)
+
+
+def count_queries(execute, sql, params, many, context):
+    counter = request_queries.get()
+
+    if counter is not None:
+        counter[0] += 1
+
+    return execute(sql, params, many, context)
+
+
+def install_query_counter(connection, **kwargs):
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+class InProcessClient:
+    """Serve requests with Django's WSGI handler on `threads` worker threads.
+
+    Each worker keeps its own database connection, as under a threaded
+    WSGI server, and counts the queries run for the request it serves.
+    """
+
+    name = "in-process"
+
+    def __init__(self, threads):
+        self.handler = WSGIHandler()
+        self.threads = threads
+
+    async def __aenter__(self):
+        self.executor = ThreadPoolExecutor(self.threads)
+        connection_created.connect(install_query_counter)
+        for connection in connections.all(initialized_only=True):
+            install_query_counter(connection)
+
+        return self
+
+    async def __aexit__(self, *exc_info):
+        connection_created.disconnect(install_query_counter)
+        self.executor.shutdown()
+
+    def serve(self, environ):
+        response = {}
+
+        def start_response(status, headers):
+            response["status"] = int(status.split()[0])
+
+        counter = [0]
+        token = request_queries.set(counter)
+        try:
+            result = self.handler(environ, start_response)
+            body = b"".join(result)
+            result.close()
+        finally:
+            request_queries.reset(token)
+
+        return response["status"], body, counter[0]
+
+    async def request(self, method, path, json_body=None, token=None):
+        path, _, query = path.partition("?")
+        body = b"" if json_body is None else json.dumps(json_body).encode()
+        environ = {
+            "REQUEST_METHOD": method,
+            "PATH_INFO": path,
+            "QUERY_STRING": query,
+            "SERVER_NAME": "localhost",
+            "SERVER_PORT": "80",
+            "HTTP_HOST": "localhost",
+            "CONTENT_TYPE": "application/json",
+            "CONTENT_LENGTH": str(len(body)),
+            "wsgi.url_scheme": "http",
+            "wsgi.input": io.BytesIO(body),
+            "wsgi.errors": sys.stderr,
+        }
+        if token:
+            environ["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.serve, environ)
+
+
+class RemoteClient:
+    """Send requests to a running server over aiohttp.
+
+    Queries are read from the Server-Timing header, so they're only known
+    when the server runs with SERVER_TIMING on.
+    """
+
+    name = "remote"
+
+    def __init__(self, base_url, concurrency):
+        self.base_url = base_url.rstrip("/")
+        self.concurrency = concurrency
+
+    async def __aenter__(self):
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.concurrency)
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.session.close()
+
+    async def request(self, method, path, json_body=None, token=None):
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+
+        async with self.session.request(
+            method, self.base_url + path, json=json_body, headers=headers
+        ) as response:
+            match = SERVER_TIMING_QUERIES.search(
+                response.headers.get("Server-Timing", "")
+            )
+            queries = int(match.group(1)) if match else None
+
+            return response.status, await response.read(), queries
+
+
+class Workload:
+    """Mixed read/checkout/return traffic over a seeded dataset.
+
+    `users` are (email, access token) pairs; `admin_token` returns books.
+    Every choice comes from one seeded Random, so two runs with the same
+    seed and dataset send the same sequence of operations.
+    """
+
+    def __init__(self, mix, books, users, admin_token, seed=0):
+        self.operations = list(mix)
+        self.weights = list(mix.values())
+        self.books = books
+        self.users = users
+        self.admin_token = admin_token
+        self.random = random.Random(seed)
+        self.checked_out = []
+
+    def resolve(self, operation):
+        """The operation to send and record it under.
+
+        A return with nothing checked out yet goes out as a checkout, so
+        the return numbers only ever measure the return endpoint.
+        """
+        if operation == "return" and not self.checked_out:
+            return "checkout"
+
+        return operation
+
+    def plan(self, count):
+        return [
+            (operation, self.random.choice(self.books), self.random.choice(self.users))
+            for operation in self.random.choices(self.operations, self.weights, k=count)
+        ]
+
+    async def run(self, client, operation, book_id, user):
+        email, token = user
+
+        if operation == "books":
+            return await client.request("GET", "/api/books/?page_size=20", token=token)
+
+        if operation == "book":
+            return await client.request("GET", f"/api/books/{book_id}/", token=token)
+
+        if operation == "borrowings":
+            return await client.request(
+                "GET", "/api/borrowings/?page_size=20", token=token
+            )
+
+        if operation == "return":
+            borrowing_id = self.checked_out.pop()
+            return await client.request(
+                "POST",
+                f"/api/borrowings/{borrowing_id}/return/",
+                token=self.admin_token,
+            )
+
+        if operation == "checkout":
+            status, body, queries = await client.request(
+                "POST",
+                "/api/borrowings/",
+                {
+                    "book": book_id,
+                    "expected_return_date": str(date.today() + timedelta(days=7)),
+                },
+                token=token,
+            )
+            if status == 201:
+                self.checked_out.append(json.loads(body)["id"])
+            return status, body, queries
+
+        if operation == "token":
+            return await client.request(
+                "POST",
+                "/api/users/token/",
+                {"email": email, "password": BENCHMARK_PASSWORD},
+            )
+
+        raise ValueError(f"Unknown operation: {operation}")
+
+
+def measure(samples, elapsed):
+    timings = [timing for timing, _, _ in samples]
+    queries = [count for _, _, count in samples if count is not None]
+
+    return {
+        "requests": len(samples),
+        "throughput": len(samples) / elapsed,
+        **summarize(timings),
+        "errors": sum(not 200 <= status < 300 for _, status, _ in samples),
+        "queries": sum(queries) / len(queries) if queries else None,
+    }
+
+
+async def run_workload(client, workload, requests, concurrency, warmup=0):
+    """Drive `requests` planned operations with `concurrency` in flight."""
+    limit = asyncio.Semaphore(concurrency)
+    samples = {}
+
+    async def send(operation, book_id, user, record):
+        async with limit:
+            # Resolved right before run() pops a checkout, with no await
+            # in between, so concurrent sends can't take it first.
+            operation = workload.resolve(operation)
+            start = time.perf_counter()
+            status, _, queries = await workload.run(client, operation, book_id, user)
+            timing = (time.perf_counter() - start) * 1000
+
+        if record:
+            samples.setdefault(operation, []).append((timing, status, queries))
+
+    for step in workload.plan(warmup):
+        await send(*step, record=False)
+
+    plan = workload.plan(requests)
+    start = time.perf_counter()
+    await asyncio.gather(*(send(*step, record=True) for step in plan))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "total": measure(
+            [sample for group in samples.values() for sample in group], elapsed
+        ),
+        "operations": {
+            operation: measure(samples[operation], elapsed)
+            for operation in sorted(samples)
+        },
+    }
+
+
+def compare(baseline, current, threshold):
+    """Yield (name, metric, old, new, change %, regressed) for shared metrics."""
+    sections = {"total": (baseline["total"], current["total"])}
+    for name, result in current["operations"].items():
+        if name in baseline["operations"]:
+            sections[name] = (baseline["operations"][name], result)
+
+    for name, (old_result, new_result) in sections.items():
+        for metric in ("throughput", *LOWER_IS_BETTER):
+            old, new = old_result.get(metric), new_result.get(metric)
+
+            if old is None or new is None:
+                continue
+
+            if old:
+                change = (new - old) / old * 100
+            else:
+                # Anything up from nothing is an unbounded change.
+                change = math.inf if new > old else 0.0
+
+            if metric == "queries":
+                # Cache hits make the average wobble; a regression is a
+                # whole extra query per request.
+                regressed = new - old >= 1
+            elif metric in LOWER_IS_BETTER:
+                regressed = change > threshold
+            else:
+                regressed = -change > threshold
+
+            yield name, metric, old, new, change, regressed
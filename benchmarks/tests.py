@@ -0,0 +1,129 @@
+import math
+
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase
+
+from benchmarks.suite import Workload, compare, run_workload
+from benchmarks.utils import percentile, summarize
+
+
+def result(**operations):
+    total = operations.pop("total", {})
+    return {"total": total, "operations": operations}
+
+
+class FakeClient:
+    def __init__(self):
+        self.sent = []
+
+    async def request(self, method, path, json_body=None, token=None):
+        self.sent.append((method, path))
+
+        if path == "/api/borrowings/":
+            return 201, b'{"id": %d}' % len(self.sent), 5
+
+        return 200, b"{}", 3
+
+
+class PercentileTests(SimpleTestCase):
+    def test_nearest_rank(self):
+        timings = list(range(1, 101))
+
+        self.assertEqual(percentile(timings, 0.95), 95)
+        self.assertEqual(percentile(timings, 0.99), 99)
+        self.assertEqual(percentile([7], 0.99), 7)
+
+    def test_summarize_sorts(self):
+        self.assertEqual(summarize([3, 1, 2, 4]), {"p50": 2.5, "p95": 4, "p99": 4})
+
+
+class CompareTests(SimpleTestCase):
+    def regressions(self, old, new, threshold=10):
+        return {
+            (name, metric): regressed
+            for name, metric, _, _, _, regressed in compare(
+                result(total=old), result(total=new), threshold
+            )
+        }
+
+    def test_direction_per_metric(self):
+        old = {"throughput": 100, "p50": 10, "p95": 20, "p99": 30}
+
+        slower = self.regressions(
+            old, {"throughput": 80, "p50": 12, "p95": 21, "p99": 30}
+        )
+        faster = self.regressions(
+            old, {"throughput": 120, "p50": 8, "p95": 15, "p99": 20}
+        )
+
+        self.assertEqual(
+            slower,
+            {
+                ("total", "throughput"): True,
+                ("total", "p50"): True,
+                ("total", "p95"): False,
+                ("total", "p99"): False,
+            },
+        )
+        self.assertFalse(any(faster.values()))
+
+    def test_queries_regress_by_whole_queries(self):
+        self.assertFalse(
+            self.regressions({"queries": 4.0}, {"queries": 4.9})[("total", "queries")]
+        )
+        self.assertTrue(
+            self.regressions({"queries": 4.0}, {"queries": 5.0})[("total", "queries")]
+        )
+
+    def test_zero_baselines(self):
+        rows = {
+            metric: (change, regressed)
+            for _, metric, _, _, change, regressed in compare(
+                result(total={"throughput": 0, "p50": 0, "p95": 0, "queries": 0}),
+                result(total={"throughput": 10, "p50": 5, "p95": 0, "queries": 1}),
+                10,
+            )
+        }
+
+        self.assertEqual(rows["throughput"], (math.inf, False))
+        self.assertEqual(rows["p50"], (math.inf, True))
+        self.assertEqual(rows["p95"], (0.0, False))
+        self.assertEqual(rows["queries"], (math.inf, True))
+
+    def test_only_shared_operations_and_metrics(self):
+        rows = list(
+            compare(
+                result(books={"p50": 10}),
+                result(books={"p50": 10, "queries": None}, token={"p50": 1}),
+                10,
+            )
+        )
+
+        self.assertEqual(
+            [(name, metric) for name, metric, *_ in rows], [("books", "p50")]
+        )
+
+
+class WorkloadTests(SimpleTestCase):
+    def test_return_without_checkout_is_recorded_as_checkout(self):
+        workload = Workload(
+            {"return": 1},
+            books=[1],
+            users=[("user@test.com", "token")],
+            admin_token="a",
+        )
+        client = FakeClient()
+
+        results = async_to_sync(run_workload)(client, workload, 3, concurrency=1)
+
+        self.assertEqual(
+            client.sent,
+            [
+                ("POST", "/api/borrowings/"),
+                ("POST", "/api/borrowings/1/return/"),
+                ("POST", "/api/borrowings/"),
+            ],
+        )
+        self.assertEqual(results["operations"]["checkout"]["requests"], 2)
+        self.assertEqual(results["operations"]["return"]["requests"], 1)
+        self.assertEqual(results["operations"]["return"]["queries"], 3)
@@ -0,0 +1,120 @@
+import math
+import statistics
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+
+from books.models import Book
+from borrowing.models import Borrowing
+
+BENCHMARK_USER = "benchmark@example.com"
+BENCHMARK_ADMIN = "benchadmin@example.com"
+BENCHMARK_PASSWORD = "benchmark-password"
+
+
+def get_benchmark_user():
+    user, _ = get_user_model().objects.get_or_create(email=BENCHMARK_USER)
+    return user
+
+
+def ensure_borrowings(user, count):
+    """Give `user` at least `count` borrowings of a dedicated book."""
+    missing = count - Borrowing.objects.filter(user=user).count()
+
+    if missing <= 0:
+        return
+
+    book, _ = Book.objects.get_or_create(
+        title="Benchmark book",
+        author="Benchmark author",
+        defaults={"cover": "SOFT", "inventory": 0, "daily_fee": 1},
+    )
+    Borrowing.objects.bulk_create(
+        Borrowing(
+            book=book,
+            user=user,
+            expected_return_date=date.today() + timedelta(days=7),
+        )
+        for _ in range(missing)
+    )
+
+
+def get_benchmark_admin():
+    admin, created = get_user_model().objects.get_or_create(
+        email=BENCHMARK_ADMIN, defaults={"is_staff": True}
+    )
+
+    if not admin.is_staff:
+        admin.is_staff = True
+        admin.save(update_fields=["is_staff"])
+
+    return admin
+
+
+def ensure_books(count):
+    """Return `count` well-stocked benchmark books, creating the missing ones."""
+    books = list(
+        Book.objects.filter(title__startswith="Benchmark title ").order_by("id")[:count]
+    )
+    books += Book.objects.bulk_create(
+        Book(
+            title=f"Benchmark title {i}",
+            author=f"Benchmark author {i % 100}",
+            cover="HARD" if i % 2 else "SOFT",
+            inventory=1_000_000,
+            daily_fee=1,
+        )
+        for i in range(len(books), count)
+    )
+
+    return books
+
+
+def ensure_users(count):
+    """Return `count` benchmark users who log in with BENCHMARK_PASSWORD."""
+    users = list(
+        get_user_model()
+        .objects.filter(email__startswith="bench-user-")
+        .order_by("id")[:count]
+    )
+    password = make_password(BENCHMARK_PASSWORD)
+    users += get_user_model().objects.bulk_create(
+        get_user_model()(email=f"bench-user-{i}@example.com", password=password)
+        for i in range(len(users), count)
+    )
+
+    return users
+
+
+def seed_history(users, books, count):
+    """Give the benchmark users at least `count` returned borrowings."""
+    missing = count - Borrowing.objects.filter(user__in=users).count()
+
+    if missing <= 0:
+        return
+
+    today = date.today()
+    Borrowing.objects.bulk_create(
+        Borrowing(
+            book=books[i % len(books)],
+            user=users[i % len(users)],
+            expected_return_date=today - timedelta(days=i % 30),
+            actual_return_date=today - timedelta(days=i % 35),
+        )
+        for i in range(missing)
+    )
+
+
+def percentile(timings, fraction):
+    """Nearest-rank percentile of sorted `timings`."""
+    return timings[max(math.ceil(len(timings) * fraction) - 1, 0)]
+
+
+def summarize(timings):
+    timings = sorted(timings)
+    return {
+        "p50": statistics.median(timings),
+        "p95": percentile(timings, 0.95),
+        "p99": percentile(timings, 0.99),
+    }
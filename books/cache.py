@@ -0,0 +1,120 @@
+import hashlib
+import time
+
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+from library_service_project.etags import etag_matches, not_modified
+from library_service_project.metrics import record_cache
+
+CATALOG_CACHE = "catalog"
+VERSION_KEY = "books:version"
+
+
+def get_catalog_version():
+    cache = caches[CATALOG_CACHE]
+    version = cache.get(VERSION_KEY)
+
+    if version is None:
+        # Start from the clock so a version lost to eviction never goes back
+        # to a number that still has cached pages.
+        version = time.time_ns()
+        cache.add(VERSION_KEY, version, timeout=None)
+        version = cache.get(VERSION_KEY, version)
+
+    return version
+
+
+async def aget_catalog_version():
+    cache = caches[CATALOG_CACHE]
+    version = await cache.aget(VERSION_KEY)
+
+    if version is None:
+        version = time.time_ns()
+        await cache.aadd(VERSION_KEY, version, timeout=None)
+        version = await cache.aget(VERSION_KEY, version)
+
+    return version
+
+
+def bump_catalog_version():
+    cache = caches[CATALOG_CACHE]
+
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def invalidate_catalog():
+    """Drop cached catalog pages now and again once the transaction commits.
+
+    The second bump discards pages that concurrent requests cached from the
+    pre-commit state.
+    """
+    bump_catalog_version()
+    transaction.on_commit(bump_catalog_version)
+
+
+class CatalogCacheMixin:
+    """Serve list and retrieve from the catalog cache, keyed by version."""
+
+    def get_cache_key(self, request, version):
+        # The ETag depends on the negotiated format, so the key does too.
+        url = f"{request.accepted_media_type} {request.build_absolute_uri()}"
+        digest = hashlib.md5(url.encode()).hexdigest()
+        return f"books:{version}:{self.action}:{digest}"
+
+    def get_cached_response(self, request, cached):
+        data, etag = cached
+
+        if etag and etag_matches(request, etag):
+            return not_modified(etag)
+
+        return Response(data, headers={"ETag": etag} if etag else None)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        cache = caches[CATALOG_CACHE]
+        key = self.get_cache_key(request, get_catalog_version())
+        cached = cache.get(key)
+        record_cache(CATALOG_CACHE, cached is not None)
+
+        if cached is not None:
+            return self.get_cached_response(request, cached)
+
+        response = handler(request, *args, **kwargs)
+
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, (response.data, response.get("ETag")))
+
+        return response
+
+    async def acached_response(self, handler, request, *args, **kwargs):
+        cache = caches[CATALOG_CACHE]
+        key = self.get_cache_key(request, await aget_catalog_version())
+        cached = await cache.aget(key)
+        record_cache(CATALOG_CACHE, cached is not None)
+
+        if cached is not None:
+            return self.get_cached_response(request, cached)
+
+        response = await handler(request, *args, **kwargs)
+
+        if response.status_code == status.HTTP_200_OK:
+            await cache.aset(key, (response.data, response.get("ETag")))
+
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    async def alist(self, request, *args, **kwargs):
+        return await self.acached_response(super().alist, request, *args, **kwargs)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        return await self.acached_response(super().aretrieve, request, *args, **kwargs)
@@ -0,0 +1,161 @@
+from functools import lru_cache
+
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    TrigramWordSimilarity,
+)
+from django.db import connection
+from django.db.models import FloatField, Q
+from django.db.models.functions import Cast, Greatest
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
+
+from books.models import Book, book_search_vector
+
+
+@lru_cache(maxsize=None)
+def trigram_available():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+class BookFilterSerializer(serializers.Serializer):
+    author = serializers.CharField(required=False)
+    cover = serializers.ChoiceField(choices=Book.COVER_CHOICES, required=False)
+    in_stock = serializers.BooleanField(allow_null=True, default=None)
+    min_fee = serializers.DecimalField(
+        max_digits=6, decimal_places=2, min_value=0, required=False
+    )
+    max_fee = serializers.DecimalField(
+        max_digits=6, decimal_places=2, min_value=0, required=False
+    )
+
+
+class BookFilter(BaseFilterBackend):
+    """Exact filters backed by the composite and partial indexes on Book."""
+
+    descriptions = {
+        "author": "Filter by exact author (ex. ?author=Jane Austen)",
+        "cover": "Filter by cover (ex. ?cover=HARD)",
+        "in_stock": "Only books with copies available (ex. ?in_stock=true)",
+        "min_fee": "Minimum daily fee (ex. ?min_fee=0.50)",
+        "max_fee": "Maximum daily fee (ex. ?max_fee=2.00)",
+    }
+
+    def filter_queryset(self, request, queryset, view):
+        serializer = BookFilterSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        if "author" in params:
+            queryset = queryset.filter(author=params["author"])
+
+        if "cover" in params:
+            queryset = queryset.filter(cover=params["cover"])
+
+        if params["in_stock"] is not None:
+            if params["in_stock"]:
+                queryset = queryset.filter(inventory__gt=0)
+            else:
+                queryset = queryset.filter(inventory=0)
+
+        if "min_fee" in params:
+            queryset = queryset.filter(daily_fee__gte=params["min_fee"])
+
+        if "max_fee" in params:
+            queryset = queryset.filter(daily_fee__lte=params["max_fee"])
+
+        return queryset
+
+    def get_schema_operation_parameters(self, view):
+        schema_types = {
+            "in_stock": "boolean",
+            "min_fee": "number",
+            "max_fee": "number",
+        }
+
+        return [
+            {
+                "name": name,
+                "required": False,
+                "in": "query",
+                "description": description,
+                "schema": {"type": schema_types.get(name, "string")},
+            }
+            for name, description in self.descriptions.items()
+        ]
+
+
+class BookOrderingFilter(OrderingFilter):
+    """Single-field ordering, limited to fields with a (field, id) index."""
+
+    ordering_fields = ("id", "title", "daily_fee")
+
+    def remove_invalid_fields(self, queryset, fields, view, request):
+        valid = super().remove_invalid_fields(queryset, fields, view, request)
+
+        if len(fields) != 1 or valid != fields:
+            raise serializers.ValidationError(
+                {
+                    self.ordering_param: "Order by one of: "
+                    + ", ".join(self.ordering_fields)
+                }
+            )
+
+        return valid
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+
+        if ordering and ordering[0].lstrip("-") != "id":
+            tiebreak = "-id" if ordering[0].startswith("-") else "id"
+            ordering = [*ordering, tiebreak]
+
+        return ordering
+
+
+class BookSearchFilter(BaseFilterBackend):
+    """Ranked full-text search on title and author, fuzzy when pg_trgm is on."""
+
+    search_param = "search"
+
+    def filter_queryset(self, request, queryset, view):
+        terms = request.query_params.get(self.search_param, "").strip()
+
+        if not terms:
+            return queryset
+
+        query = SearchQuery(terms, search_type="websearch", config="english")
+        match = Q(search=query)
+        rank = SearchRank(book_search_vector(), query)
+
+        if trigram_available():
+            match |= Q(title__trigram_word_similar=terms)
+            match |= Q(author__trigram_word_similar=terms)
+            rank = Greatest(
+                rank,
+                TrigramWordSimilarity(terms, "title"),
+                TrigramWordSimilarity(terms, "author"),
+            )
+
+        return (
+            queryset.alias(search=book_search_vector())
+            .filter(match)
+            # ts_rank is a real, which reads back rounded; a double
+            # round-trips exactly through the pagination cursor.
+            .annotate(rank=Cast(rank, FloatField()))
+            .order_by("-rank", "-id")
+        )
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.search_param,
+                "required": False,
+                "in": "query",
+                "description": "Search by title and author (ex. ?search=tolkien)",
+                "schema": {"type": "string"},
+            },
+        ]
@@ -0,0 +1,163 @@
+import csv
+import json
+import time
+from collections import defaultdict
+from itertools import islice
+
+from django.db import connection, transaction
+from django.db.models import Case, F, PositiveIntegerField, Value, When
+from django.db.models.functions import Now
+from rest_framework.exceptions import ValidationError
+
+from books.cache import invalidate_catalog
+from books.models import Book
+from books.serializers import BookImportSerializer
+
+IMPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+# pg_advisory_xact_lock key that serializes catalog imports.
+IMPORT_LOCK_ID = 4242001
+
+MAX_REPORTED_ERRORS = 100
+
+
+def read_rows(lines, file_format):
+    """Yield (line number, row) from CSV or NDJSON lines; bad JSON is a str."""
+    if file_format == "csv":
+        reader = csv.DictReader(lines)
+
+        for row in reader:
+            yield reader.line_num, row
+
+        return
+
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+
+        try:
+            yield number, json.loads(line)
+        except ValueError as exc:
+            yield number, f"Invalid JSON: {exc}"
+
+
+def upsert_books(rows):
+    """Add `rows` keyed by (title, author, cover), return (created, updated).
+
+    Matching books get their inventory topped up in one UPDATE; the first
+    (lowest id) copy is used when the catalog already has duplicates.
+    """
+    merged = {}
+
+    for row in rows:
+        key = (row["title"], row["author"], row["cover"])
+
+        if key in merged:
+            merged[key]["inventory"] += row["inventory"]
+        else:
+            merged[key] = dict(row)
+
+    with transaction.atomic():
+        # There is no unique constraint on the key, so concurrent imports
+        # must not both insert the same new book.
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", [IMPORT_LOCK_ID])
+
+        existing = {}
+        candidates = Book.objects.filter(
+            title__in={title for title, _, _ in merged},
+            author__in={author for _, author, _ in merged},
+        ).order_by("id")
+
+        for book_id, *key in candidates.values_list("id", "title", "author", "cover"):
+            key = tuple(key)
+            if key in merged:
+                existing.setdefault(key, book_id)
+
+        if existing:
+            # One WHEN per distinct amount keeps the CASE short on big batches.
+            by_amount = defaultdict(list)
+            for key, book_id in existing.items():
+                by_amount[merged[key]["inventory"]].append(book_id)
+
+            added = Case(
+                *[
+                    When(id__in=book_ids, then=Value(amount))
+                    for amount, book_ids in by_amount.items()
+                ],
+                output_field=PositiveIntegerField(),
+            )
+            Book.objects.filter(id__in=existing.values()).update(
+                inventory=F("inventory") + added, updated_at=Now()
+            )
+
+        created = Book.objects.bulk_create(
+            Book(**row) for key, row in merged.items() if key not in existing
+        )
+
+        invalidate_catalog()
+
+    return len(created), len(existing)
+
+
+class BookImporter:
+    """Validate and upsert a stream of book rows in batches."""
+
+    def __init__(self, batch_size=1000, on_batch=None):
+        self.batch_size = batch_size
+        self.on_batch = on_batch
+        self.report = {
+            "rows": 0,
+            "created": 0,
+            "updated": 0,
+            "invalid": 0,
+            "errors": [],
+            "seconds": 0.0,
+            "rows_per_second": 0.0,
+        }
+
+    def run(self, lines, file_format):
+        start = time.perf_counter()
+        rows = read_rows(lines, file_format)
+
+        while batch := list(islice(rows, self.batch_size)):
+            self.import_batch(batch)
+
+            self.report["seconds"] = time.perf_counter() - start
+            self.report["rows_per_second"] = (
+                self.report["rows"] / self.report["seconds"]
+            )
+
+            if self.on_batch is not None:
+                self.on_batch(self.report)
+
+        return self.report
+
+    def import_batch(self, batch):
+        valid = []
+        # Reuse one serializer so its fields are built once per batch.
+        serializer = BookImportSerializer()
+
+        for line, row in batch:
+            if not isinstance(row, dict):
+                errors = {"non_field_errors": [row]}
+            else:
+                try:
+                    valid.append(serializer.run_validation(row))
+                    continue
+                except ValidationError as exc:
+                    errors = exc.detail
+
+            self.report["invalid"] += 1
+            if len(self.report["errors"]) < MAX_REPORTED_ERRORS:
+                self.report["errors"].append({"line": line, "errors": errors})
+
+        if valid:
+            created, updated = upsert_books(valid)
+            self.report["created"] += created
+            self.report["updated"] += updated
+
+        self.report["rows"] += len(batch)
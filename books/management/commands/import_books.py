@@ -0,0 +1,54 @@
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from books.importer import IMPORT_FORMATS, BookImporter
+
+
+class Command(BaseCommand):
+    help = "Import books from a CSV or NDJSON file, topping up existing ones"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, or - for stdin")
+        parser.add_argument("--format", choices=sorted(IMPORT_FORMATS))
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"]
+
+        if file_format is None:
+            extension = os.path.splitext(path)[1].lstrip(".").lower()
+            if extension == "jsonl":
+                extension = "ndjson"
+            if extension not in IMPORT_FORMATS:
+                raise CommandError("Can't guess the format, pass --format.")
+            file_format = extension
+
+        importer = BookImporter(
+            batch_size=options["batch_size"], on_batch=self.write_progress
+        )
+
+        if path == "-":
+            report = importer.run(sys.stdin, file_format)
+        else:
+            with open(path, encoding="utf-8-sig", newline="") as lines:
+                report = importer.run(lines, file_format)
+
+        for error in report["errors"]:
+            self.stderr.write(f"line {error['line']}: {error['errors']}")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {report['rows']} rows in {report['seconds']:.2f}s "
+                f"({report['rows_per_second']:.0f} rows/s): "
+                f"{report['created']} created, {report['updated']} updated, "
+                f"{report['invalid']} invalid"
+            )
+        )
+
+    def write_progress(self, report):
+        self.stdout.write(
+            f"{report['rows']} rows, {report['rows_per_second']:.0f} rows/s"
+        )
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.1 on 2026-10-18 03:13
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# pg_trgm ships in contrib and is not installed on every server, so the
+# trigram indexes for fuzzy matching are only built where it is available.
+CREATE_TRIGRAM_INDEXES = """
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        CREATE INDEX IF NOT EXISTS books_book_title_trgm_idx
+            ON books_book USING gin (title gin_trgm_ops);
+        CREATE INDEX IF NOT EXISTS books_book_author_trgm_idx
+            ON books_book USING gin (author gin_trgm_ops);
+    END IF;
+END
+$$;
+"""
+
+DROP_TRIGRAM_INDEXES = """
+DROP INDEX IF EXISTS books_book_title_trgm_idx;
+DROP INDEX IF EXISTS books_book_author_trgm_idx;
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("books", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="book",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.search.CombinedSearchVector(
+                    django.contrib.postgres.search.SearchVector(
+                        "title", config="english", weight="A"
+                    ),
+                    "||",
+                    django.contrib.postgres.search.SearchVector(
+                        "author", config="english", weight="B"
+                    ),
+                    django.contrib.postgres.search.SearchConfig("english"),
+                ),
+                name="books_book_search_idx",
+            ),
+        ),
+        migrations.RunSQL(CREATE_TRIGRAM_INDEXES, DROP_TRIGRAM_INDEXES),
+    ]
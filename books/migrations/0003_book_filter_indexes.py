@@ -0,0 +1,36 @@
+# Generated by Django 4.2.1 on 2026-10-18 03:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("books", "0002_book_search_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(fields=["author", "id"], name="books_book_author_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(fields=["cover", "id"], name="books_book_cover_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(fields=["title", "id"], name="books_book_title_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(fields=["daily_fee", "id"], name="books_book_fee_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(
+                condition=models.Q(("inventory__gt", 0)),
+                fields=["id"],
+                name="books_book_in_stock_idx",
+            ),
+        ),
+    ]
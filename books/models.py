@@ -1,7 +1,15 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
 from django.db import models
 from django.core.validators import MinValueValidator
 
 
+def book_search_vector():
+    return SearchVector("title", weight="A", config="english") + SearchVector(
+        "author", weight="B", config="english"
+    )
+
+
 class Book(models.Model):
     COVER_CHOICES = [
         ("HARD", "Hardcover"),
@@ -17,6 +25,21 @@ class Book(models.Model):
         decimal_places=2,
         validators=[MinValueValidator(0.00)],
     )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            GinIndex(book_search_vector(), name="books_book_search_idx"),
+            models.Index(fields=["author", "id"], name="books_book_author_idx"),
+            models.Index(fields=["cover", "id"], name="books_book_cover_idx"),
+            models.Index(fields=["title", "id"], name="books_book_title_idx"),
+            models.Index(fields=["daily_fee", "id"], name="books_book_fee_idx"),
+            models.Index(
+                fields=["id"],
+                condition=models.Q(inventory__gt=0),
+                name="books_book_in_stock_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -25,3 +25,30 @@ class BookListSerializer(serializers.ModelSerializer):
             "author",
             "cover",
         )
+
+
+class BookImportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Book
+        fields = (
+            "title",
+            "author",
+            "cover",
+            "inventory",
+            "daily_fee",
+        )
+
+
+class BookImportErrorSerializer(serializers.Serializer):
+    line = serializers.IntegerField()
+    errors = serializers.DictField()
+
+
+class BookImportResultSerializer(serializers.Serializer):
+    rows = serializers.IntegerField()
+    created = serializers.IntegerField()
+    updated = serializers.IntegerField()
+    invalid = serializers.IntegerField()
+    errors = BookImportErrorSerializer(many=True)
+    seconds = serializers.FloatField()
+    rows_per_second = serializers.FloatField()
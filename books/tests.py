@@ -1,17 +1,35 @@
+import json
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+from datetime import date, timedelta
+
+from asgiref.sync import async_to_sync
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework.test import APIClient
 from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
 
+from books.filters import trigram_available
 from books.models import Book
+from books.urls import router
+from books.views import BookViewSet
 from books.serializers import (
     BookListSerializer,
     BookSerializer,
 )
+from library_service_project.async_views import async_read_urls
+from library_service_project.testing import QueryBudgetMixin
 
 BOOKS_URL = reverse("books:book-list")
+IMPORT_URL = reverse("books:book-import")
 
 
 def sample_book(**params):
@@ -31,6 +49,19 @@ def detail_url(book_id):
     return reverse("books:book-detail", args=[book_id])
 
 
+def async_view(name):
+    return next(
+        pattern.callback
+        for pattern in async_read_urls(router.urls)
+        if pattern.name == name
+    )
+
+
+def async_get(name, path, data=None, view_kwargs=None, headers=None):
+    request = AsyncRequestFactory().get(path, data, headers=headers)
+    return async_to_sync(async_view(name))(request, **(view_kwargs or {}))
+
+
 class UnauthenticatedBookApiTests(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -45,7 +76,38 @@ class UnauthenticatedBookApiTests(TestCase):
         serializer = BookListSerializer(books, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
+
+    def test_list_book_paginated_by_cursor(self):
+        for _ in range(5):
+            sample_book()
+
+        res = self.client.get(BOOKS_URL, {"page_size": 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn("count", res.data)
+        self.assertIsNone(res.data["previous"])
+
+        ids = []
+        next_url = res.data["next"]
+        ids.extend(book["id"] for book in res.data["results"])
+        while next_url:
+            res = self.client.get(next_url)
+            ids.extend(book["id"] for book in res.data["results"])
+            next_url = res.data["next"]
+
+        self.assertEqual(
+            ids, list(Book.objects.order_by("id").values_list("id", flat=True))
+        )
+
+    @override_settings(MAX_PAGE_SIZE=3)
+    def test_list_book_page_size_capped(self):
+        for _ in range(5):
+            sample_book()
+
+        res = self.client.get(BOOKS_URL, {"page_size": 1000})
+
+        self.assertEqual(len(res.data["results"]), 3)
 
     def test_retrieve_book_detail(self):
         book = sample_book()
@@ -71,6 +133,655 @@ class UnauthenticatedBookApiTests(TestCase):
         self.assertEqual(res_del.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
+class BookFilterTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.emma = sample_book(
+            title="Emma", author="Jane Austen", cover="HARD", daily_fee="1.50"
+        )
+        self.persuasion = sample_book(
+            title="Persuasion", author="Jane Austen", inventory=0, daily_fee="0.50"
+        )
+        self.dune = sample_book(title="Dune", author="Frank Herbert", daily_fee="3")
+
+    def get_ids(self, **params):
+        res = self.client.get(BOOKS_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [book["id"] for book in res.data["results"]]
+
+    def test_filter_by_author_and_cover(self):
+        self.assertEqual(
+            self.get_ids(author="Jane Austen"), [self.emma.id, self.persuasion.id]
+        )
+        self.assertEqual(self.get_ids(cover="HARD"), [self.emma.id])
+
+    def test_filter_in_stock(self):
+        self.assertEqual(self.get_ids(in_stock="true"), [self.emma.id, self.dune.id])
+        self.assertEqual(self.get_ids(in_stock="false"), [self.persuasion.id])
+
+    def test_filter_by_fee_range(self):
+        self.assertEqual(self.get_ids(min_fee="1", max_fee="2"), [self.emma.id])
+        self.assertEqual(self.get_ids(max_fee="1"), [self.persuasion.id])
+
+    def test_ordering(self):
+        self.assertEqual(
+            self.get_ids(ordering="title"),
+            [self.dune.id, self.emma.id, self.persuasion.id],
+        )
+        self.assertEqual(
+            self.get_ids(ordering="-daily_fee"),
+            [self.dune.id, self.emma.id, self.persuasion.id],
+        )
+
+    def test_ordering_is_paginated(self):
+        res = self.client.get(BOOKS_URL, {"ordering": "-title", "page_size": 2})
+        ids = [book["id"] for book in res.data["results"]]
+        res = self.client.get(res.data["next"])
+        ids.extend(book["id"] for book in res.data["results"])
+
+        self.assertEqual(ids, [self.persuasion.id, self.emma.id, self.dune.id])
+        self.assertIsNone(res.data["next"])
+
+    def test_ordering_pages_through_ties(self):
+        Book.objects.bulk_create(
+            Book(
+                title=f"Tied {i}",
+                author="Test author",
+                cover="SOFT",
+                inventory=1,
+                daily_fee="2.00",
+            )
+            for i in range(1100)
+        )
+        expected = list(
+            Book.objects.order_by("daily_fee", "id").values_list("id", flat=True)
+        )
+
+        ids = []
+        url = BOOKS_URL
+        params = {"ordering": "daily_fee", "page_size": 100}
+        with CaptureQueriesContext(connection) as queries:
+            while url:
+                res = self.client.get(url, params)
+                ids.extend(book["id"] for book in res.data["results"])
+                url, params = res.data["next"], None
+
+        self.assertEqual(ids, expected)
+        self.assertFalse(any("OFFSET" in query["sql"] for query in queries))
+
+        res = self.client.get(res.data["previous"])
+
+        self.assertEqual(
+            [book["id"] for book in res.data["results"]], expected[1000:1100]
+        )
+
+    def test_invalid_cursor_not_found(self):
+        res = self.client.get(BOOKS_URL, {"cursor": "cD1bImFiYyJd"})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_invalid_params_rejected(self):
+        for params in (
+            {"ordering": "inventory"},
+            {"ordering": "title,daily_fee"},
+            {"cover": "PAPER"},
+            {"min_fee": "cheap"},
+        ):
+            res = self.client.get(BOOKS_URL, params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+
+class BookSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def search(self, terms, **params):
+        res = self.client.get(BOOKS_URL, {"search": terms, **params})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [book["id"] for book in res.data["results"]]
+
+    def test_search_by_title_and_author(self):
+        by_title = sample_book(title="Dune", author="Frank Herbert")
+        by_author = sample_book(title="Children of Dune saga", author="Dune Fan")
+        other = sample_book(title="Emma", author="Jane Austen")
+
+        self.assertEqual(self.search("Herbert"), [by_title.id])
+        self.assertNotIn(other.id, self.search("dune"))
+        self.assertEqual(set(self.search("dune")), {by_title.id, by_author.id})
+
+    def test_search_matches_word_forms(self):
+        book = sample_book(title="Running with scissors")
+
+        self.assertEqual(self.search("runs scissor"), [book.id])
+
+    def test_search_is_paginated(self):
+        books = [sample_book(title=f"Wizard {i}") for i in range(5)]
+
+        res = self.client.get(BOOKS_URL, {"search": "wizard", "page_size": 2})
+        ids = [book["id"] for book in res.data["results"]]
+        while res.data["next"]:
+            res = self.client.get(res.data["next"])
+            ids.extend(book["id"] for book in res.data["results"])
+
+        self.assertEqual(sorted(ids), [book.id for book in books])
+
+    def test_search_pages_through_rank_ties(self):
+        Book.objects.bulk_create(
+            Book(
+                title=f"Wizard {i}",
+                author="Test author",
+                cover="SOFT",
+                inventory=1,
+                daily_fee=1,
+            )
+            for i in range(1100)
+        )
+
+        ids = []
+        url = BOOKS_URL
+        params = {"search": "wizard", "page_size": 100}
+        with CaptureQueriesContext(connection) as queries:
+            while url:
+                res = self.client.get(url, params)
+                ids.extend(book["id"] for book in res.data["results"])
+                url, params = res.data["next"], None
+
+        self.assertEqual(len(ids), 1100)
+        self.assertEqual(set(ids), set(Book.objects.values_list("id", flat=True)))
+        self.assertFalse(any("OFFSET" in query["sql"] for query in queries))
+
+    def test_search_tolerates_typos(self):
+        if not trigram_available():
+            self.skipTest("pg_trgm extension is not installed")
+
+        book = sample_book(title="The Hobbit", author="J. R. R. Tolkien")
+
+        self.assertEqual(self.search("Tolkein"), [book.id])
+
+    def test_search_uses_index(self):
+        Book.objects.bulk_create(
+            Book(
+                title=f"Book {i}",
+                author=f"Author {i}",
+                cover="SOFT",
+                inventory=1,
+                daily_fee=1,
+            )
+            for i in range(2000)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE books_book")
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(BOOKS_URL, {"search": "book 1999"})
+
+        # The page query is the one matching the tsquery.
+        sql = next(query["sql"] for query in queries if "@@" in query["sql"])
+
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN " + sql)
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+
+        self.assertIn("books_book_search_idx", plan)
+        self.assertNotIn("Seq Scan", plan)
+
+
+class CatalogCacheTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_superuser(
+            "admin@test.com",
+            "admin_password",
+        )
+        self.book = sample_book()
+
+    def test_list_and_detail_served_from_cache(self):
+        for url in (BOOKS_URL, detail_url(self.book.id)):
+            first = self.client.get(url)
+
+            with self.assertNumQueries(0):
+                second = self.client.get(url)
+
+            self.assertEqual(second.status_code, status.HTTP_200_OK)
+            self.assertEqual(second.data, first.data)
+
+    def test_cache_keyed_per_query_and_page(self):
+        sample_book(title="Another book")
+
+        first_page = self.client.get(BOOKS_URL, {"page_size": 1})
+        second_page = self.client.get(first_page.data["next"])
+
+        self.assertNotEqual(first_page.data, second_page.data)
+
+    def test_invalidated_on_book_write(self):
+        url = detail_url(self.book.id)
+        self.client.get(url)
+        self.client.get(BOOKS_URL)
+
+        self.client.force_authenticate(self.admin)
+        self.client.patch(url, {"title": "New title"})
+        self.client.force_authenticate(None)
+
+        self.assertEqual(self.client.get(url).data["title"], "New title")
+        self.assertEqual(
+            self.client.get(BOOKS_URL).data["results"][0]["title"], "New title"
+        )
+
+    def test_invalidated_on_checkout_and_return(self):
+        url = detail_url(self.book.id)
+        self.client.get(url)
+
+        self.client.force_authenticate(self.admin)
+        res = self.client.post(
+            reverse("borrowing:borrowing-list"),
+            {
+                "book": self.book.id,
+                "expected_return_date": date.today() + timedelta(days=5),
+            },
+        )
+        self.assertEqual(self.client.get(url).data["inventory"], 1)
+
+        self.client.post(
+            reverse("borrowing:borrowing-return-borrowing", args=[res.data["id"]])
+        )
+        self.assertEqual(self.client.get(url).data["inventory"], 2)
+
+    def test_file_based_backend(self):
+        with tempfile.TemporaryDirectory() as location:
+            caches = {
+                "default": {
+                    "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                },
+                "catalog": {
+                    "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                    "LOCATION": location,
+                    "OPTIONS": {"MAX_ENTRIES": 10},
+                },
+            }
+
+            with override_settings(CACHES=caches):
+                url = detail_url(self.book.id)
+                self.client.get(url)
+
+                with self.assertNumQueries(0):
+                    self.client.get(url)
+
+                self.book.title = "Changed"
+                self.book.save()
+
+                self.assertEqual(self.client.get(url).data["title"], "Changed")
+
+
+class BookETagTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.book = sample_book()
+
+    def test_retrieve_not_modified(self):
+        url = detail_url(self.book.id)
+        res = self.client.get(url)
+        etag = res["ETag"]
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res["ETag"], etag)
+        self.assertEqual(res.content, b"")
+
+        caches["catalog"].clear()
+        with self.assertNumQueries(1):
+            res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_retrieve_etag_changes_on_update(self):
+        url = detail_url(self.book.id)
+        etag = self.client.get(url)["ETag"]
+
+        self.book.inventory = 5
+        self.book.save()
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+
+    def test_retrieve_etag_varies_with_query_and_format(self):
+        url = detail_url(self.book.id)
+        etag = self.client.get(url)["ETag"]
+
+        res = self.client.get(url, {"format": "api"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+
+        res = self.client.get(url, HTTP_ACCEPT="text/html", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_not_modified(self):
+        etag = self.client.get(BOOKS_URL)["ETag"]
+
+        res = self.client.get(BOOKS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        caches["catalog"].clear()
+        res = self.client.get(BOOKS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        sample_book(title="Another book")
+        res = self.client.get(BOOKS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+@patch.object(BookViewSet, "stream_chunk_size", 2)
+class StreamingBookListTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user("user@test.com", "password")
+        self.client.force_authenticate(self.user)
+
+        for i in range(5):
+            sample_book(title=f"Book {i}", cover="HARD" if i % 2 else "SOFT")
+
+    def get_stream(self, params):
+        res = self.client.get(BOOKS_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+
+        return res, b"".join(res.streaming_content)
+
+    def test_stream_json(self):
+        res, content = self.get_stream({"stream": "json", "cover": "SOFT"})
+        paginated = self.client.get(BOOKS_URL, {"cover": "SOFT", "page_size": 100})
+
+        self.assertEqual(res["Content-Type"], "application/json")
+        self.assertEqual(json.loads(content), paginated.json()["results"])
+
+    def test_stream_ndjson(self):
+        res, content = self.get_stream({"stream": "ndjson"})
+        books = Book.objects.order_by("id")
+
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+        self.assertEqual(
+            [json.loads(line) for line in content.splitlines()],
+            BookListSerializer(books, many=True).data,
+        )
+
+    def test_stream_empty(self):
+        res, content = self.get_stream({"stream": "json", "author": "Nobody"})
+
+        self.assertEqual(content, b"[]")
+
+    def test_stream_follows_ordering(self):
+        res, content = self.get_stream({"stream": "json", "ordering": "-title"})
+
+        self.assertEqual(
+            [book["title"] for book in json.loads(content)],
+            [f"Book {i}" for i in reversed(range(5))],
+        )
+
+    def test_invalid_stream_format(self):
+        res = self.client.get(BOOKS_URL, {"stream": "xml"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_stream_requires_authentication(self):
+        self.client.force_authenticate(None)
+
+        res = self.client.get(BOOKS_URL, {"stream": "json"})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class AsyncBookViewTests(TestCase):
+    def setUp(self):
+        caches["catalog"].clear()
+        self.client = APIClient()
+
+    def assertSameResponse(self, sync_res, async_res):
+        self.assertEqual(async_res.status_code, sync_res.status_code)
+        self.assertEqual(json.loads(async_res.content), sync_res.json())
+        self.assertEqual(async_res.get("ETag"), sync_res.get("ETag"))
+
+    def test_list_matches_sync_view(self):
+        for title in ("Dune", "Dune Messiah", "Emma"):
+            sample_book(title=title)
+        params = {"search": "dune", "page_size": 1}
+
+        async_res = async_get("book-list", BOOKS_URL, params)
+        caches["catalog"].clear()
+        sync_res = self.client.get(BOOKS_URL, params)
+
+        self.assertSameResponse(sync_res, async_res)
+        self.assertIsNotNone(sync_res.data["next"])
+
+    def test_retrieve_matches_sync_view(self):
+        book = sample_book()
+        url = detail_url(book.id)
+
+        async_res = async_get("book-detail", url, view_kwargs={"pk": str(book.id)})
+        caches["catalog"].clear()
+        sync_res = self.client.get(url)
+
+        self.assertSameResponse(sync_res, async_res)
+
+    def test_retrieve_not_modified(self):
+        book = sample_book()
+        url = detail_url(book.id)
+        etag = self.client.get(url)["ETag"]
+        caches["catalog"].clear()
+
+        res = async_get(
+            "book-detail",
+            url,
+            headers={"If-None-Match": etag},
+            view_kwargs={"pk": str(book.id)},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_retrieve_missing_book(self):
+        res = async_get("book-detail", detail_url(1), view_kwargs={"pk": "1"})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_create_is_handled_by_sync_view(self):
+        admin = get_user_model().objects.create_user(
+            "admin@test.com", "password", is_staff=True
+        )
+        request = AsyncRequestFactory().post(
+            BOOKS_URL,
+            {
+                "title": "Dune",
+                "author": "Frank Herbert",
+                "cover": "HARD",
+                "inventory": 1,
+                "daily_fee": 2,
+            },
+            content_type="application/json",
+            headers={"Authorization": f"Bearer {AccessToken.for_user(admin)}"},
+        )
+
+        res = async_to_sync(async_view("book-list"))(request)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Book.objects.filter(title="Dune").exists())
+
+
+class BookImportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_superuser(
+            "admin@test.com",
+            "admin_password",
+        )
+        self.client.force_authenticate(self.user)
+
+    def post_import(self, body, content_type):
+        return self.client.generic(
+            "POST", IMPORT_URL, body.encode(), content_type=content_type
+        )
+
+    def test_import_csv(self):
+        existing = sample_book(title="Dune", author="Herbert", inventory=2)
+        body = (
+            "﻿title,author,cover,inventory,daily_fee\r\n"
+            "Dune,Herbert,SOFT,3,4\r\n"
+            "Emma,Austen,HARD,1,0.50\r\n"
+            "Emma,Austen,HARD,2,0.50\r\n"
+        )
+
+        res = self.post_import(body, "text/csv")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["rows"], 3)
+        self.assertEqual(res.data["created"], 1)
+        self.assertEqual(res.data["updated"], 1)
+        self.assertEqual(res.data["invalid"], 0)
+
+        existing.refresh_from_db()
+        self.assertEqual(existing.inventory, 5)
+        self.assertEqual(Book.objects.get(title="Emma").inventory, 3)
+
+    def test_import_ndjson_reports_invalid_rows(self):
+        body = "\n".join(
+            [
+                json.dumps(
+                    {
+                        "title": "A",
+                        "author": "B",
+                        "cover": "HARD",
+                        "inventory": 1,
+                        "daily_fee": "1.00",
+                    }
+                ),
+                "",
+                json.dumps(
+                    {
+                        "title": "C",
+                        "author": "D",
+                        "cover": "PAPER",
+                        "inventory": 1,
+                        "daily_fee": "1.00",
+                    }
+                ),
+                "{not json",
+            ]
+        )
+
+        res = self.post_import(body, "application/x-ndjson")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["created"], 1)
+        self.assertEqual(res.data["invalid"], 2)
+        self.assertEqual([error["line"] for error in res.data["errors"]], [3, 4])
+        self.assertIn("cover", res.data["errors"][0]["errors"])
+        self.assertEqual(Book.objects.count(), 1)
+
+    def test_import_empty_body(self):
+        res = self.post_import("", "text/csv")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["rows"], 0)
+
+    def test_import_unsupported_content_type(self):
+        res = self.client.post(IMPORT_URL, {"title": "A"}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+    def test_import_not_allowed_for_regular_user(self):
+        self.client.force_authenticate(
+            get_user_model().objects.create_user("user@test.com", "password")
+        )
+
+        res = self.post_import("title,author\r\n", "text/csv")
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_import_invalidates_catalog_cache(self):
+        self.client.get(BOOKS_URL)
+
+        self.post_import(
+            "title,author,cover,inventory,daily_fee\nNew,Author,HARD,1,1\n",
+            "text/csv",
+        )
+        res = self.client.get(BOOKS_URL)
+
+        self.assertEqual(len(res.data["results"]), 1)
+
+    def test_import_books_command(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv") as file:
+            file.write("title,author,cover,inventory,daily_fee\nA,B,HARD,1,1\n")
+            file.flush()
+
+            out = StringIO()
+            call_command("import_books", file.name, "--batch-size", "1", stdout=out)
+
+        self.assertIn("1 created, 0 updated, 0 invalid", out.getvalue())
+        self.assertTrue(Book.objects.filter(title="A", author="B").exists())
+
+
+class BookQueryBudgetTests(QueryBudgetMixin, TestCase):
+    query_budgets = {
+        "list": 1,
+        "retrieve": 2,
+        "create": 1,
+        "update": 2,
+        "partial_update": 2,
+        "destroy": 5,
+        "import_books": 6,
+    }
+
+    def setUp(self):
+        caches["catalog"].clear()
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_superuser("admin@test.com", "password")
+        )
+        self.book = sample_book()
+        for i in range(5):
+            sample_book(title=f"Book {i}")
+
+    def test_every_action_has_a_budget(self):
+        self.assertBudgetsCover(BookViewSet)
+
+    def test_read_budgets(self):
+        self.assertQueryBudget("list", lambda: self.client.get(BOOKS_URL))
+        self.assertQueryBudget(
+            "retrieve", lambda: self.client.get(detail_url(self.book.id))
+        )
+
+    def test_write_budgets(self):
+        payload = {
+            "title": "New book",
+            "author": "New author",
+            "cover": "HARD",
+            "inventory": 1,
+            "daily_fee": 1,
+        }
+        url = detail_url(self.book.id)
+
+        self.assertQueryBudget("create", lambda: self.client.post(BOOKS_URL, payload))
+        self.assertQueryBudget("update", lambda: self.client.put(url, payload))
+        self.assertQueryBudget(
+            "partial_update", lambda: self.client.patch(url, {"inventory": 3})
+        )
+        self.assertQueryBudget("destroy", lambda: self.client.delete(url))
+
+    def test_import_budget(self):
+        body = "title,author,cover,inventory,daily_fee\n" + "".join(
+            f"Book {i},Test author,SOFT,1,1\n" for i in range(10)
+        )
+
+        self.assertQueryBudget(
+            "import_books",
+            lambda: self.client.generic(
+                "POST", IMPORT_URL, body.encode(), content_type="text/csv"
+            ),
+        )
+
+
 class AuthenticatedBookApiTests(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -90,7 +801,7 @@ class AuthenticatedBookApiTests(TestCase):
         serializer = BookListSerializer(books, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_retrieve_book_detail(self):
         book = sample_book()
@@ -1,11 +1,15 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework import routers
 
 from books.views import BookViewSet
+from library_service_project.async_views import async_read_urls
 
 router = routers.DefaultRouter()
 router.register("", BookViewSet)
 
-urlpatterns = [path("", include(router.urls))]
+urls = async_read_urls(router.urls) if settings.ASYNC_READ_VIEWS else router.urls
+
+urlpatterns = [path("", include(urls))]
 
 app_name = "books"
@@ -1,22 +1,85 @@
-from drf_spectacular.utils import extend_schema
-from rest_framework import viewsets
+import codecs
 
+from asgiref.sync import sync_to_async
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, extend_schema_view
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from books.cache import CatalogCacheMixin
+from books.filters import (
+    BookFilter,
+    BookOrderingFilter,
+    BookSearchFilter,
+    trigram_available,
+)
+from books.importer import IMPORT_FORMATS, BookImporter
 from books.models import Book
 from books.permissions import IsAdminOrReadOnly
 from books.serializers import (
     BookSerializer,
     BookListSerializer,
+    BookImportResultSerializer,
 )
+from library_service_project.async_views import AsyncReadMixin
+from library_service_project.etags import ETagMixin
+from library_service_project.serializers import FastListMixin
+from library_service_project.streaming import STREAM_PARAMETER, StreamingListMixin
 
 
 @extend_schema(tags=["Books"])
-class BookViewSet(viewsets.ModelViewSet):
+@extend_schema_view(list=extend_schema(parameters=[STREAM_PARAMETER]))
+class BookViewSet(
+    StreamingListMixin,
+    CatalogCacheMixin,
+    ETagMixin,
+    AsyncReadMixin,
+    FastListMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
     permission_classes = (IsAdminOrReadOnly,)
+    filter_backends = (BookFilter, BookSearchFilter, BookOrderingFilter)
 
     def get_serializer_class(self):
         if self.action == "list":
             return BookListSerializer
 
+        if self.action == "import_books":
+            return BookImportResultSerializer
+
         return self.serializer_class
+
+    @extend_schema(
+        request={
+            content_type: OpenApiTypes.STR for content_type in IMPORT_FORMATS.values()
+        },
+        responses=BookImportResultSerializer,
+    )
+    @action(methods=["POST"], detail=False, url_path="import", url_name="import")
+    def import_books(self, request):
+        """Bulk import books from a CSV or NDJSON body"""
+        content_type = request.content_type.split(";")[0].strip()
+        formats = {value: key for key, value in IMPORT_FORMATS.items()}
+
+        if content_type not in formats:
+            return Response(
+                {"detail": f"Send one of: {', '.join(formats)}."},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            )
+
+        # Read the raw body line by line instead of buffering it in memory.
+        # The stream is None for an empty body.
+        stream = request.stream
+        raw_lines = iter(stream.readline, b"") if stream is not None else ()
+        lines = codecs.iterdecode(raw_lines, "utf-8-sig")
+        report = BookImporter().run(lines, formats[content_type])
+
+        return Response(self.get_serializer(report).data)
+
+    async def alist(self, request, *args, **kwargs):
+        # BookSearchFilter checks for pg_trgm once; do it off the event loop.
+        await sync_to_async(trigram_available)()
+        return await super().alist(request, *args, **kwargs)
@@ -1,6 +1,8 @@
 from django.contrib import admin
 
-from borrowing.models import Borrowing
+from borrowing.models import Borrowing, Fine, Reservation
 
 
 admin.site.register(Borrowing)
+admin.site.register(Fine)
+admin.site.register(Reservation)
@@ -0,0 +1,106 @@
+import csv
+from datetime import date
+
+from asgiref.sync import sync_to_async
+from django.http import StreamingHttpResponse
+
+from borrowing.models import Borrowing
+
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_COLUMNS = {
+    "id": "id",
+    "user_id": "user_id",
+    "user_email": "user__email",
+    "book_id": "book_id",
+    "book_title": "book__title",
+    "book_author": "book__author",
+    "borrow_date": "borrow_date",
+    "expected_return_date": "expected_return_date",
+    "actual_return_date": "actual_return_date",
+}
+
+
+class Echo:
+    """File-like object whose `write` returns the line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def filter_export_queryset(params):
+    queryset = Borrowing.objects.order_by("id")
+
+    if "borrowed_from" in params:
+        queryset = queryset.filter(borrow_date__gte=params["borrowed_from"])
+
+    if "borrowed_to" in params:
+        queryset = queryset.filter(borrow_date__lte=params["borrowed_to"])
+
+    if params["is_active"] is not None:
+        queryset = queryset.filter(actual_return_date__isnull=params["is_active"])
+
+    if "user_id" in params:
+        queryset = queryset.filter(user_id=params["user_id"])
+
+    return queryset.values_list(*EXPORT_COLUMNS.values())
+
+
+def format_rows(writer, rows, today):
+    lines = []
+
+    for row in rows:
+        expected_return_date, actual_return_date = row[-2:]
+        days_late = ((actual_return_date or today) - expected_return_date).days
+        lines.append(writer.writerow((*row, max(days_late, 0))))
+
+    return "".join(lines)
+
+
+def export_lines(queryset):
+    writer = csv.writer(Echo())
+    today = date.today()
+    chunk = []
+
+    yield writer.writerow((*EXPORT_COLUMNS, "days_late"))
+
+    for row in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        chunk.append(row)
+
+        if len(chunk) == EXPORT_CHUNK_SIZE:
+            yield format_rows(writer, chunk, today)
+            chunk = []
+
+    if chunk:
+        yield format_rows(writer, chunk, today)
+
+
+async def aexport_lines(queryset):
+    # Django buffers sync iterators under ASGI, so read the cursor from
+    # the event loop there.
+    lines = export_lines(queryset)
+
+    while line := await sync_to_async(next)(lines, None):
+        yield line
+
+
+def is_asgi(request):
+    # WSGI servers always pass wsgi.input, which Django copies into META.
+    return "wsgi.input" not in request.META
+
+
+def export_response(request, queryset):
+    """Stream `queryset` as CSV through a server-side cursor.
+
+    `request` may be a Django or a DRF request.
+    """
+    if is_asgi(request):
+        lines = aexport_lines(queryset)
+    else:
+        lines = export_lines(queryset)
+
+    return StreamingHttpResponse(
+        lines,
+        content_type="text/csv",
+        headers={"Content-Disposition": 'attachment; filename="borrowings.csv"'},
+    )
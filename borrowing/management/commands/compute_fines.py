@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from borrowing.models import Borrowing
+from borrowing.services import compute_fines, filter_overdue
+
+
+class Command(BaseCommand):
+    help = "Recalculate fines of all overdue borrowings (run nightly)"
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        count = compute_fines(filter_overdue(Borrowing.objects.all()))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Updated {count} fines in {time.perf_counter() - start:.2f}s"
+            )
+        )
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Max
+
+from borrowing.export import EXPORT_COLUMNS, export_lines
+from borrowing.models import Borrowing
+from borrowing.services import filter_overdue
+
+
+class Command(BaseCommand):
+    help = "Write the daily overdue report as CSV, most overdue first"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output", default="-", help="CSV file to write, or - for stdout"
+        )
+
+    def handle(self, *args, **options):
+        overdue = filter_overdue(Borrowing.objects.all())
+        summary = overdue.aggregate(count=Count("id"), max_days_late=Max("days_late"))
+        rows = overdue.order_by("expected_return_date", "id").values_list(
+            *EXPORT_COLUMNS.values()
+        )
+
+        if options["output"] == "-":
+            self.write_report(self.stdout, rows)
+        else:
+            with open(options["output"], "w", newline="") as output:
+                self.write_report(output, rows)
+
+        self.stderr.write(
+            f"{summary['count']} overdue borrowings, "
+            f"up to {summary['max_days_late'] or 0} days late"
+        )
+
+    def write_report(self, output, rows):
+        for lines in export_lines(rows):
+            output.write(lines)
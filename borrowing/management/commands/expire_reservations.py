@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from borrowing.services import expire_claims
+
+
+class Command(BaseCommand):
+    help = (
+        "Pass the copies of expired reservation claims to the next in line "
+        "(run every few minutes)"
+    )
+
+    def handle(self, *args, **options):
+        count = expire_claims()
+
+        self.stdout.write(self.style.SUCCESS(f"Expired {count} claims"))
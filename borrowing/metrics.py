@@ -0,0 +1,30 @@
+from django.db import transaction
+from django.dispatch import receiver
+
+from borrowing.signals import (
+    borrowings_created,
+    borrowings_returned,
+    reservations_claimed,
+)
+from library_service_project.metrics import Counter
+
+CHECKOUTS = Counter("borrowings_checked_out_total", "Books checked out.")
+RETURNS = Counter("borrowings_returned_total", "Books returned.")
+CLAIMS = Counter(
+    "reservations_claimed_total", "Returned copies held for the next in line."
+)
+
+
+@receiver(borrowings_created)
+def count_checkouts(sender, borrowing_ids, **kwargs):
+    transaction.on_commit(lambda: CHECKOUTS.inc(len(borrowing_ids)))
+
+
+@receiver(borrowings_returned)
+def count_returns(sender, borrowing_ids, **kwargs):
+    transaction.on_commit(lambda: RETURNS.inc(len(borrowing_ids)))
+
+
+@receiver(reservations_claimed)
+def count_claims(sender, reservation_ids, **kwargs):
+    transaction.on_commit(lambda: CLAIMS.inc(len(reservation_ids)))
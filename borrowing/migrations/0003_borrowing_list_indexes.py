@@ -0,0 +1,36 @@
+# Generated by Django 4.2.1 on 2026-10-18 03:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("borrowing", "0002_alter_borrowing_expected_return_date"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="borrowing",
+            options={"ordering": ["id"]},
+        ),
+        migrations.AddIndex(
+            model_name="borrowing",
+            index=models.Index(fields=["user", "id"], name="borrowing_user_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="borrowing",
+            index=models.Index(
+                condition=models.Q(("actual_return_date__isnull", True)),
+                fields=["id"],
+                name="borrowing_active_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="borrowing",
+            index=models.Index(
+                condition=models.Q(("actual_return_date__isnull", True)),
+                fields=["user", "id"],
+                name="borrowing_user_active_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.1 on 2026-10-18 03:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("borrowing", "0004_borrowing_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="borrowing",
+            index=models.Index(
+                condition=models.Q(("actual_return_date__isnull", True)),
+                fields=["expected_return_date", "id"],
+                name="borrowing_overdue_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.1 on 2026-10-18 03:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("borrowing", "0005_borrowing_overdue_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Fine",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("days_late", models.PositiveIntegerField()),
+                ("amount", models.DecimalField(decimal_places=2, max_digits=10)),
+                ("is_final", models.BooleanField(default=False)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "borrowing",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="fine",
+                        to="borrowing.borrowing",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 4.2.1 on 2026-10-18 04:21
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("books", "0004_book_updated_at"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("borrowing", "0006_fine"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Reservation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("WAITING", "Waiting"),
+                            ("CLAIMED", "Claimed"),
+                            ("FULFILLED", "Fulfilled"),
+                            ("CANCELLED", "Cancelled"),
+                            ("EXPIRED", "Expired"),
+                        ],
+                        default="WAITING",
+                        max_length=9,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("claim_expires_at", models.DateTimeField(blank=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "book",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="reservations",
+                        to="books.book",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="reservations",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["id"],
+                "indexes": [
+                    models.Index(fields=["user", "id"], name="reservation_user_idx"),
+                    models.Index(
+                        condition=models.Q(("status", "WAITING")),
+                        fields=["book", "id"],
+                        name="reservation_queue_idx",
+                    ),
+                    models.Index(
+                        condition=models.Q(("status", "CLAIMED")),
+                        fields=["claim_expires_at"],
+                        name="reservation_claim_idx",
+                    ),
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="reservation",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("status__in", ("WAITING", "CLAIMED"))),
+                fields=("user", "book"),
+                name="reservation_active_unique",
+            ),
+        ),
+    ]
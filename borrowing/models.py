@@ -20,6 +20,97 @@ class Borrowing(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="borrowings"
     )
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["id"]
+        indexes = [
+            models.Index(fields=["user", "id"], name="borrowing_user_idx"),
+            models.Index(
+                fields=["id"],
+                condition=models.Q(actual_return_date__isnull=True),
+                name="borrowing_active_idx",
+            ),
+            models.Index(
+                fields=["user", "id"],
+                condition=models.Q(actual_return_date__isnull=True),
+                name="borrowing_user_active_idx",
+            ),
+            models.Index(
+                fields=["expected_return_date", "id"],
+                condition=models.Q(actual_return_date__isnull=True),
+                name="borrowing_overdue_idx",
+            ),
+        ]
+
+
+class Fine(models.Model):
+    borrowing = models.OneToOneField(
+        Borrowing, on_delete=models.CASCADE, related_name="fine"
+    )
+    days_late = models.PositiveIntegerField()
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    is_final = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.amount} for borrowing {self.borrowing_id}"
+
+
+class Reservation(models.Model):
+    """A place in an out-of-stock book's waitlist, served first come first served.
+
+    A returned copy is claimed by the oldest waiting reservation and held
+    for its user until `claim_expires_at`, then passed on.
+    """
+
+    WAITING = "WAITING"
+    CLAIMED = "CLAIMED"
+    FULFILLED = "FULFILLED"
+    CANCELLED = "CANCELLED"
+    EXPIRED = "EXPIRED"
+    STATUS_CHOICES = [
+        (WAITING, "Waiting"),
+        (CLAIMED, "Claimed"),
+        (FULFILLED, "Fulfilled"),
+        (CANCELLED, "Cancelled"),
+        (EXPIRED, "Expired"),
+    ]
+    ACTIVE_STATUSES = (WAITING, CLAIMED)
+
+    book = models.ForeignKey(
+        Book, on_delete=models.CASCADE, related_name="reservations"
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="reservations"
+    )
+    status = models.CharField(max_length=9, choices=STATUS_CHOICES, default=WAITING)
+    created_at = models.DateTimeField(auto_now_add=True)
+    claim_expires_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["id"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "book"],
+                condition=models.Q(status__in=("WAITING", "CLAIMED")),
+                name="reservation_active_unique",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["user", "id"], name="reservation_user_idx"),
+            models.Index(
+                fields=["book", "id"],
+                condition=models.Q(status="WAITING"),
+                name="reservation_queue_idx",
+            ),
+            models.Index(
+                fields=["claim_expires_at"],
+                condition=models.Q(status="CLAIMED"),
+                name="reservation_claim_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} waiting for {self.book_id} ({self.status})"
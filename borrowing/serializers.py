@@ -1,8 +1,14 @@
-from django.db import transaction
+from collections import Counter
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
 
+from books.models import Book
 from books.serializers import BookSerializer
-from borrowing.models import Borrowing
+from borrowing.models import Borrowing, Reservation
+from borrowing.services import take_book, take_books, take_claims
+from borrowing.signals import borrowings_created
 
 
 class BorrowingReadSerializer(serializers.ModelSerializer):
@@ -20,6 +26,13 @@ class BorrowingReadSerializer(serializers.ModelSerializer):
         )
 
 
+class BorrowingOverdueSerializer(BorrowingReadSerializer):
+    days_late = serializers.IntegerField(read_only=True)
+
+    class Meta(BorrowingReadSerializer.Meta):
+        fields = BorrowingReadSerializer.Meta.fields + ("days_late",)
+
+
 class BorrowingCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Borrowing
@@ -29,23 +42,200 @@ class BorrowingCreateSerializer(serializers.ModelSerializer):
             "expected_return_date",
         )
 
-    def validate_book(self, book):
-        if book.inventory == 0:
-            raise serializers.ValidationError("Book is out of stock.")
-        return book
-
     def create(self, validated_data):
         with transaction.atomic():
-            book = validated_data.pop("book")
-            book.inventory -= 1
-            book.save()
+            book = validated_data["book"]
+            claimed = take_claims(validated_data["user"].id, [book.id])
+
+            if not claimed and not take_book(book.id):
+                raise serializers.ValidationError({"book": "Book is out of stock."})
 
-            borrowing = Borrowing.objects.create(book=book, **validated_data)
+            borrowing = Borrowing.objects.create(**validated_data)
+            borrowings_created.send(Borrowing, borrowing_ids=[borrowing.id])
 
             return borrowing
 
 
+class BorrowingBulkCreateSerializer(serializers.ModelSerializer):
+    books = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.BULK_BORROWING_MAX_BOOKS,
+    )
+
+    class Meta:
+        model = Borrowing
+        fields = (
+            "books",
+            "expected_return_date",
+        )
+
+    def create(self, validated_data):
+        book_ids = validated_data.pop("books")
+
+        with transaction.atomic():
+            claimed = take_claims(validated_data["user"].id, book_ids)
+            unclaimed = list((Counter(book_ids) - claimed).elements())
+
+            if not unclaimed or take_books(unclaimed):
+                borrowings = Borrowing.objects.bulk_create(
+                    Borrowing(book_id=book_id, **validated_data) for book_id in book_ids
+                )
+                borrowings_created.send(
+                    Borrowing, borrowing_ids=[borrowing.id for borrowing in borrowings]
+                )
+                return borrowings
+
+            transaction.set_rollback(True)
+
+        raise serializers.ValidationError(
+            {"books": self.get_stock_errors(book_ids, claimed)}
+        )
+
+    @staticmethod
+    def get_stock_errors(book_ids, claimed):
+        stock = Counter(
+            dict(Book.objects.filter(id__in=book_ids).values_list("id", "inventory"))
+        )
+        stock.update(claimed)
+        errors = {}
+
+        for index, book_id in enumerate(book_ids):
+            if book_id not in stock:
+                errors[index] = [f'Invalid pk "{book_id}" - object does not exist.']
+            elif stock[book_id] == 0:
+                errors[index] = ["Book is out of stock."]
+            else:
+                stock[book_id] -= 1
+
+        return errors or ["Book stock changed, please retry."]
+
+
+class BorrowingBulkReturnSerializer(serializers.Serializer):
+    borrowings = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        required=False,
+    )
+    books = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        required=False,
+    )
+
+    def validate_borrowings(self, value):
+        # Unlike book ids, a borrowing can only be returned once.
+        seen = set()
+        errors = {}
+
+        for index, borrowing_id in enumerate(value):
+            if borrowing_id in seen:
+                errors[index] = ["Duplicate borrowing id."]
+            seen.add(borrowing_id)
+
+        if errors:
+            raise serializers.ValidationError(errors)
+
+        return value
+
+    def validate(self, attrs):
+        if ("borrowings" in attrs) == ("books" in attrs):
+            raise serializers.ValidationError("Provide either borrowings or books ids.")
+        return attrs
+
+
+class BorrowingBulkReturnResultSerializer(serializers.Serializer):
+    returned = serializers.ListField(child=serializers.IntegerField())
+    already_returned = serializers.ListField(
+        child=serializers.IntegerField(), help_text="Borrowing ids"
+    )
+    books_not_borrowed = serializers.ListField(
+        child=serializers.IntegerField(),
+        help_text="Book ids with no active borrowing left to return",
+    )
+    not_found = serializers.ListField(
+        child=serializers.IntegerField(),
+        help_text="Borrowing or book ids, as sent, that don't exist",
+    )
+
+
 class BorrowingReturnSerializer(serializers.ModelSerializer):
+    fine = serializers.DecimalField(
+        source="fine.amount",
+        max_digits=10,
+        decimal_places=2,
+        read_only=True,
+        allow_null=True,
+    )
+
     class Meta:
         model = Borrowing
-        fields = ("id", "actual_return_date")
+        fields = ("id", "actual_return_date", "fine")
+
+
+class BorrowingExportFilterSerializer(serializers.Serializer):
+    borrowed_from = serializers.DateField(required=False)
+    borrowed_to = serializers.DateField(required=False)
+    is_active = serializers.BooleanField(allow_null=True, default=None)
+    user_id = serializers.IntegerField(min_value=1, required=False)
+
+    def validate(self, attrs):
+        if (
+            "borrowed_from" in attrs
+            and "borrowed_to" in attrs
+            and attrs["borrowed_from"] > attrs["borrowed_to"]
+        ):
+            raise serializers.ValidationError(
+                "borrowed_from must not be after borrowed_to."
+            )
+        return attrs
+
+
+class ReservationFilterSerializer(serializers.Serializer):
+    book = serializers.IntegerField(
+        min_value=1, required=False, help_text="Filter by book id (ex. ?book=2)"
+    )
+
+
+class ReservationSerializer(serializers.ModelSerializer):
+    position = serializers.IntegerField(
+        read_only=True,
+        allow_null=True,
+        help_text="Place in the book's waitlist while waiting",
+    )
+
+    class Meta:
+        model = Reservation
+        fields = (
+            "id",
+            "book",
+            "status",
+            "position",
+            "created_at",
+            "claim_expires_at",
+        )
+        read_only_fields = ("status", "created_at", "claim_expires_at")
+
+    def create(self, validated_data):
+        with transaction.atomic():
+            # Returns lock the book row too, so a copy can't come back
+            # between this check and the insert.
+            book = Book.objects.select_for_update().get(id=validated_data["book"].id)
+
+            if book.inventory:
+                raise serializers.ValidationError(
+                    {"book": "Book is in stock, borrow it instead."}
+                )
+
+            try:
+                with transaction.atomic():
+                    reservation = Reservation.objects.create(**validated_data)
+            except IntegrityError:
+                raise serializers.ValidationError(
+                    {"book": "You are already on the waitlist for this book."}
+                )
+
+        reservation.position = Reservation.objects.filter(
+            book=book, status=Reservation.WAITING, id__lte=reservation.id
+        ).count()
+        return reservation
@@ -0,0 +1,357 @@
+from collections import Counter
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import (
+    BooleanField,
+    Case,
+    DecimalField,
+    ExpressionWrapper,
+    F,
+    Func,
+    IntegerField,
+    PositiveIntegerField,
+    Q,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce, Now, Round
+from django.utils import timezone
+
+from books.cache import invalidate_catalog
+from books.models import Book
+from borrowing.models import Borrowing, Fine, Reservation
+from borrowing.signals import borrowings_returned, reservations_claimed
+
+
+def annotate_days_late(queryset, today):
+    """Add `days_late`: days from the expected to the actual (or today's) return."""
+    return queryset.annotate(
+        days_late=Func(
+            Coalesce("actual_return_date", Value(today)),
+            F("expected_return_date"),
+            template="(%(expressions)s)",
+            arg_joiner=" - ",
+            output_field=IntegerField(),
+        )
+    )
+
+
+def filter_overdue(queryset, today=None):
+    """Narrow to active borrowings past their expected return date.
+
+    Matches the `borrowing_overdue_idx` partial index and adds `days_late`.
+    """
+    today = today or date.today()
+
+    return annotate_days_late(
+        queryset.filter(actual_return_date=None, expected_return_date__lt=today),
+        today,
+    )
+
+
+# Fine field -> the value compute_fines selects for it, in column order.
+FINE_COLUMNS = {
+    "borrowing": "id",
+    "days_late": "days_late",
+    "amount": "amount",
+    "is_final": "is_final",
+    "updated_at": "calculated_at",
+}
+
+
+def compute_fines(queryset, today=None):
+    """Upsert a Fine for every late borrowing in `queryset`, return the count.
+
+    Runs as one INSERT ... SELECT, so the whole set is priced in SQL
+    without loading rows. Fines of returned borrowings are final and are
+    never recalculated. A `days_late` annotation already on `queryset`,
+    like filter_overdue's, is used as is.
+    """
+    today = today or date.today()
+    fine = Fine._meta.db_table
+
+    if "days_late" not in queryset.query.annotations:
+        queryset = annotate_days_late(queryset, today)
+
+    rows = (
+        queryset.filter(days_late__gt=0)
+        .order_by()
+        .annotate(
+            amount=Round(
+                ExpressionWrapper(
+                    F("days_late")
+                    * F("book__daily_fee")
+                    * Value(settings.FINE_MULTIPLIER),
+                    output_field=DecimalField(),
+                ),
+                2,
+            ),
+            is_final=ExpressionWrapper(
+                Q(actual_return_date__isnull=False), output_field=BooleanField()
+            ),
+            calculated_at=Now(),
+        )
+        .values_list(*FINE_COLUMNS.values())
+    )
+    sql, params = rows.query.sql_with_params()
+    key, *columns = [Fine._meta.get_field(name).column for name in FINE_COLUMNS]
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {fine} ({key}, {', '.join(columns)}) {sql} "
+            f"ON CONFLICT ({key}) DO UPDATE SET "
+            + ", ".join(f"{column} = EXCLUDED.{column}" for column in columns)
+            + f" WHERE NOT {fine}.is_final",
+            params,
+        )
+        return cursor.rowcount
+
+
+def take_book(book_id):
+    """Take one copy off the shelf, return False if the book is out of stock."""
+    taken = Book.objects.filter(id=book_id, inventory__gt=0).update(
+        inventory=F("inventory") - 1, updated_at=Now()
+    )
+
+    if taken:
+        invalidate_catalog()
+
+    return bool(taken)
+
+
+def per_book(counts):
+    """Build a CASE expression mapping each book id to its count."""
+    return Case(
+        *[When(id=book_id, then=Value(count)) for book_id, count in counts.items()],
+        output_field=PositiveIntegerField(),
+    )
+
+
+def take_books(book_ids):
+    """Take a copy per id in one UPDATE, return False unless every book had stock.
+
+    Must run inside a transaction that is rolled back on False.
+    """
+    wanted = Counter(book_ids)
+    amount = per_book(wanted)
+    taken = Book.objects.filter(id__in=wanted, inventory__gte=amount).update(
+        inventory=F("inventory") - amount, updated_at=Now()
+    )
+
+    if taken:
+        invalidate_catalog()
+
+    return taken == len(wanted)
+
+
+def take_claims(user_id, book_ids):
+    """Fulfil the user's unexpired claims on these books.
+
+    Returns a Counter of the book ids whose copy came from a claim.
+    """
+    claims = list(
+        Reservation.objects.select_for_update()
+        .filter(
+            user_id=user_id,
+            book_id__in=book_ids,
+            status=Reservation.CLAIMED,
+            claim_expires_at__gt=timezone.now(),
+        )
+        .values_list("id", "book_id")
+    )
+
+    if claims:
+        Reservation.objects.filter(id__in=[id_ for id_, _ in claims]).update(
+            status=Reservation.FULFILLED, updated_at=Now()
+        )
+
+    return Counter(book_id for _, book_id in claims)
+
+
+def allocate_copies(restored):
+    """Hand copies just put back on the shelf to the heads of the waitlists.
+
+    `restored` counts the copies per book. The UPDATE that restored them
+    holds the book rows, so nobody can join a waitlist in between. The
+    oldest waiting reservations are claimed with SELECT ... FOR UPDATE SKIP
+    LOCKED, so one being cancelled is passed over instead of waited on,
+    and their copies are taken back off the shelf. Returns the claimed
+    reservation ids.
+    """
+    waiting = Reservation.objects.filter(status=Reservation.WAITING)
+    book_ids = restored
+
+    if len(restored) > 1:
+        book_ids = set(
+            waiting.filter(book_id__in=restored)
+            .order_by()
+            .values_list("book_id", flat=True)
+            .distinct()
+        )
+
+    claimed = []
+    taken = Counter()
+    for book_id in book_ids:
+        heads = list(
+            waiting.filter(book_id=book_id)
+            .order_by("id")
+            .select_for_update(skip_locked=True)
+            .values_list("id", flat=True)[: restored[book_id]]
+        )
+        claimed += heads
+        if heads:
+            taken[book_id] = len(heads)
+
+    if claimed:
+        Reservation.objects.filter(id__in=claimed).update(
+            status=Reservation.CLAIMED,
+            claim_expires_at=timezone.now()
+            + timedelta(hours=settings.RESERVATION_CLAIM_HOURS),
+            updated_at=Now(),
+        )
+        Book.objects.filter(id__in=taken).update(
+            inventory=F("inventory") - per_book(taken), updated_at=Now()
+        )
+        reservations_claimed.send(Reservation, reservation_ids=claimed)
+
+    return claimed
+
+
+def restock(restored):
+    """Put copies back on the shelf, or in the hands of the next in line."""
+    Book.objects.filter(id__in=restored).update(
+        inventory=F("inventory") + per_book(restored), updated_at=Now()
+    )
+    allocate_copies(restored)
+
+
+def cancel_reservation(reservation):
+    """Leave the waitlist, passing a claimed copy on; False if not active."""
+    with transaction.atomic():
+        status = (
+            Reservation.objects.select_for_update()
+            .filter(id=reservation.id, status__in=Reservation.ACTIVE_STATUSES)
+            .values_list("status", flat=True)
+            .first()
+        )
+
+        if status is None:
+            return False
+
+        Reservation.objects.filter(id=reservation.id).update(
+            status=Reservation.CANCELLED, updated_at=Now()
+        )
+
+        if status == Reservation.CLAIMED:
+            restock(Counter([reservation.book_id]))
+            invalidate_catalog()
+
+    reservation.status = Reservation.CANCELLED
+    return True
+
+
+def expire_claims(now=None):
+    """Pass the copies of claims that ran out on, return how many expired."""
+    now = now or timezone.now()
+
+    with transaction.atomic():
+        expired = list(
+            Reservation.objects.select_for_update(skip_locked=True)
+            .filter(status=Reservation.CLAIMED, claim_expires_at__lte=now)
+            .values_list("id", "book_id")
+        )
+
+        if not expired:
+            return 0
+
+        Reservation.objects.filter(id__in=[id_ for id_, _ in expired]).update(
+            status=Reservation.EXPIRED, updated_at=Now()
+        )
+        restock(Counter(book_id for _, book_id in expired))
+        invalidate_catalog()
+
+    return len(expired)
+
+
+def return_book(borrowing):
+    """Close the borrowing and put the copy back, False if already returned."""
+    today = date.today()
+
+    with transaction.atomic():
+        returned = Borrowing.objects.filter(
+            id=borrowing.id, actual_return_date=None
+        ).update(actual_return_date=today, updated_at=Now())
+
+        if not returned:
+            return False
+
+        restock(Counter([borrowing.book_id]))
+        compute_fines(Borrowing.objects.filter(id=borrowing.id), today)
+        borrowings_returned.send(Borrowing, borrowing_ids=[borrowing.id])
+        invalidate_catalog()
+
+    borrowing.actual_return_date = today
+    return True
+
+
+def find_active_borrowings(book_ids):
+    """Pick the oldest active borrowing for every returned copy of a book.
+
+    Returns the borrowing ids, the book ids that had nothing (more) to
+    return and the book ids that don't exist.
+    """
+    wanted = Counter(book_ids)
+    active = Borrowing.objects.filter(
+        book_id__in=wanted, actual_return_date=None
+    ).values_list("id", "book_id")
+
+    borrowing_ids = []
+    for borrowing_id, book_id in active.select_for_update().order_by("id"):
+        if wanted[book_id]:
+            wanted[book_id] -= 1
+            borrowing_ids.append(borrowing_id)
+
+    leftover = list(wanted.elements())
+    existing = set()
+    if leftover:
+        existing = set(
+            Book.objects.filter(id__in=set(leftover)).values_list("id", flat=True)
+        )
+
+    return (
+        borrowing_ids,
+        [book_id for book_id in leftover if book_id in existing],
+        [book_id for book_id in leftover if book_id not in existing],
+    )
+
+
+def return_books(borrowing_ids):
+    """Close active borrowings and restore stock in grouped UPDATEs.
+
+    Returns the ids that were actually returned.
+    """
+    today = date.today()
+
+    with transaction.atomic():
+        active = list(
+            Borrowing.objects.select_for_update()
+            .filter(id__in=borrowing_ids, actual_return_date=None)
+            .values_list("id", "book_id")
+        )
+        returned_ids = [borrowing_id for borrowing_id, _ in active]
+
+        if not returned_ids:
+            return []
+
+        Borrowing.objects.filter(id__in=returned_ids).update(
+            actual_return_date=today, updated_at=Now()
+        )
+
+        restock(Counter(book_id for _, book_id in active))
+        compute_fines(Borrowing.objects.filter(id__in=returned_ids), today)
+        borrowings_returned.send(Borrowing, borrowing_ids=returned_ids)
+        invalidate_catalog()
+
+    return returned_ids
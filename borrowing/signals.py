@@ -0,0 +1,10 @@
+from django.dispatch import Signal
+
+# Sent inside the writing transaction with `borrowing_ids`; bulk_create
+# and update() don't send post_save.
+borrowings_created = Signal()
+borrowings_returned = Signal()
+
+# Sent inside the returning transaction with `reservation_ids` whose users
+# now hold a copy until their claim expires.
+reservations_claimed = Signal()
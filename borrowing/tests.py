@@ -1,19 +1,50 @@
+import csv
+import io
+import json
+import threading
 from datetime import date, timedelta
+from decimal import Decimal
+from unittest.mock import patch
 
+from asgiref.sync import async_to_sync
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import (
+    AsyncRequestFactory,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 
+from rest_framework.permissions import BasePermission
 from rest_framework.test import APIClient
 from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
 
 from books.models import Book
-from borrowing.models import Borrowing
+from borrowing.models import Borrowing, Fine, Reservation
 from borrowing.serializers import (
     BorrowingReadSerializer,
 )
+from borrowing.services import compute_fines, expire_claims, filter_overdue
+from borrowing.urls import router
+from borrowing.views import BorrowingViewSet, ReservationViewSet
+from library_service_project.async_views import async_read_urls
+from library_service_project.testing import QueryBudgetMixin
+from users.authentication import user_state_cache
 
 BORROWING_URL = reverse("borrowing:borrowing-list")
+BULK_BORROWING_URL = reverse("borrowing:borrowing-bulk")
+BULK_RETURN_URL = reverse("borrowing:borrowing-bulk-return")
+EXPORT_URL = reverse("borrowing:borrowing-export")
+OVERDUE_URL = reverse("borrowing:borrowing-overdue")
+RESERVATION_URL = reverse("borrowing:reservation-list")
 
 
 def sample_borrowing(**params):
@@ -41,6 +72,21 @@ def detail_url(borrowing_id):
     return reverse("borrowing:borrowing-detail", args=[borrowing_id])
 
 
+def reservation_url(reservation_id):
+    return reverse("borrowing:reservation-detail", args=[reservation_id])
+
+
+def async_get(name, path, data=None, view_kwargs=None, headers=None):
+    view = next(
+        pattern.callback
+        for pattern in async_read_urls(router.urls)
+        if pattern.name == name
+    )
+    request = AsyncRequestFactory().get(path, data, headers=headers)
+
+    return async_to_sync(view)(request, **(view_kwargs or {}))
+
+
 class UnauthenticatedBorrowingApiTests(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -75,7 +121,7 @@ class AuthenticatedBorrowingApiTests(TestCase):
         serializer = BorrowingReadSerializer(borrowings, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_retrieve_borrowing_detail(self):
         borrowing = sample_borrowing(user=self.user)
@@ -87,6 +133,35 @@ class AuthenticatedBorrowingApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
 
+    def test_retrieve_borrowing_not_modified(self):
+        borrowing = sample_borrowing(user=self.user)
+        url = detail_url(borrowing.id)
+        etag = self.client.get(url)["ETag"]
+
+        with self.assertNumQueries(1):
+            res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        borrowing.book.title = "Renamed"
+        borrowing.book.save()
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["book"]["title"], "Renamed")
+
+    def test_list_borrowings_not_modified(self):
+        borrowing = sample_borrowing(user=self.user)
+        etag = self.client.get(BORROWING_URL)["ETag"]
+
+        res = self.client.get(BORROWING_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        borrowing.expected_return_date += timedelta(days=1)
+        borrowing.save()
+
+        res = self.client.get(BORROWING_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
     def test_create_borrowing(self):
         self.book = Book.objects.create(
             title="Test book",
@@ -109,6 +184,64 @@ class AuthenticatedBorrowingApiTests(TestCase):
         self.assertEqual(borrowing.book.id, self.book.id)
         self.assertEqual(borrowing.book.inventory, self.book.inventory - 1)
 
+    def test_create_borrowing_out_of_stock(self):
+        book = Book.objects.create(
+            title="Test book",
+            author="Test author",
+            cover="SOFT",
+            inventory=0,
+            daily_fee=4,
+        )
+        payload = {
+            "book": book.id,
+            "expected_return_date": date.today() + timedelta(days=15),
+        }
+
+        res = self.client.post(BORROWING_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("book", res.data)
+        self.assertFalse(Borrowing.objects.exists())
+
+    def test_bulk_create_borrowings(self):
+        book1 = sample_borrowing(user=self.user).book
+        book2 = sample_borrowing(user=self.user).book
+        payload = {
+            "books": [book1.id, book2.id, book1.id],
+            "expected_return_date": date.today() + timedelta(days=15),
+        }
+
+        res = self.client.post(BULK_BORROWING_URL, payload, format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([item["book"] for item in res.data], payload["books"])
+
+        borrowings = Borrowing.objects.filter(id__in=[item["id"] for item in res.data])
+        self.assertEqual(borrowings.filter(user=self.user).count(), 3)
+        self.assertEqual(borrowings.first().borrow_date, date.today())
+
+        book1.refresh_from_db()
+        book2.refresh_from_db()
+        self.assertEqual(book1.inventory, 0)
+        self.assertEqual(book2.inventory, 1)
+
+    def test_bulk_create_borrowings_all_or_nothing(self):
+        book1 = sample_borrowing(user=self.user).book
+        book2 = sample_borrowing(user=self.user).book
+        payload = {
+            "books": [book1.id, book2.id, book2.id, book2.id, book2.id + 1000],
+            "expected_return_date": date.today() + timedelta(days=15),
+        }
+
+        res = self.client.post(BULK_BORROWING_URL, payload, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(res.data["books"]), {3, 4})
+
+        book1.refresh_from_db()
+        book2.refresh_from_db()
+        self.assertEqual(book1.inventory, 2)
+        self.assertEqual(book2.inventory, 2)
+        self.assertEqual(Borrowing.objects.count(), 2)
+
     def test_return_borrowing_forbidden(self):
         borrowing = sample_borrowing(user=self.user)
         payload = {
@@ -118,6 +251,15 @@ class AuthenticatedBorrowingApiTests(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
 
+    def test_bulk_return_forbidden(self):
+        borrowing = sample_borrowing(user=self.user)
+
+        res = self.client.post(
+            BULK_RETURN_URL, {"borrowings": [borrowing.id]}, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
 
 class AdminBorrowingApiTests(TestCase):
     def setUp(self):
@@ -144,7 +286,7 @@ class AdminBorrowingApiTests(TestCase):
         serializer = BorrowingReadSerializer(borrowings, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_filter_borrowings_by_user_id(self):
         user1 = get_user_model().objects.create_user(
@@ -164,8 +306,8 @@ class AdminBorrowingApiTests(TestCase):
         serializer1 = BorrowingReadSerializer(borrowing1)
         serializer2 = BorrowingReadSerializer(borrowing2)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertNotIn(serializer2.data, res.data)
+        self.assertIn(serializer1.data, res.data["results"])
+        self.assertNotIn(serializer2.data, res.data["results"])
 
     def test_filter_borrowings_by_is_active(self):
         borrowing1 = sample_borrowing(user=self.user)
@@ -181,9 +323,9 @@ class AdminBorrowingApiTests(TestCase):
         serializer2 = BorrowingReadSerializer(borrowing2)
         serializer3 = BorrowingReadSerializer(borrowing3)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data["results"])
+        self.assertIn(serializer2.data, res.data["results"])
+        self.assertNotIn(serializer3.data, res.data["results"])
 
     def test_return_borrowing(self):
         borrowing = sample_borrowing(user=self.user)
@@ -201,3 +343,1016 @@ class AdminBorrowingApiTests(TestCase):
             res.data["detail"],
             "Borrowing has already been returned.",
         )
+
+    def test_bulk_return_by_borrowings(self):
+        borrowing1 = sample_borrowing(user=self.user)
+        borrowing2 = sample_borrowing(user=self.user, book=borrowing1.book)
+        borrowing3 = sample_borrowing(
+            user=self.user,
+            actual_return_date=date.today() - timedelta(days=1),
+        )
+        payload = {"borrowings": [borrowing1.id, borrowing2.id, borrowing3.id, 999999]}
+
+        res = self.client.post(BULK_RETURN_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(sorted(res.data["returned"]), [borrowing1.id, borrowing2.id])
+        self.assertEqual(res.data["already_returned"], [borrowing3.id])
+        self.assertEqual(res.data["books_not_borrowed"], [])
+        self.assertEqual(res.data["not_found"], [999999])
+
+        borrowing1.refresh_from_db()
+        self.assertEqual(borrowing1.actual_return_date, date.today())
+        self.assertEqual(borrowing1.book.inventory, 4)
+
+        borrowing3.refresh_from_db()
+        self.assertEqual(
+            borrowing3.actual_return_date, date.today() - timedelta(days=1)
+        )
+        self.assertEqual(borrowing3.book.inventory, 2)
+
+    def test_bulk_return_by_books(self):
+        borrowing1 = sample_borrowing(user=self.user)
+        borrowing2 = sample_borrowing(user=self.user, book=borrowing1.book)
+        payload = {
+            "books": [
+                borrowing1.book.id,
+                borrowing1.book.id,
+                borrowing1.book.id,
+                999999,
+            ]
+        }
+
+        res = self.client.post(BULK_RETURN_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["returned"], [borrowing1.id, borrowing2.id])
+        self.assertEqual(res.data["already_returned"], [])
+        self.assertEqual(res.data["books_not_borrowed"], [borrowing1.book.id])
+        self.assertEqual(res.data["not_found"], [999999])
+
+        borrowing2.refresh_from_db()
+        self.assertEqual(borrowing2.actual_return_date, date.today())
+        self.assertEqual(borrowing2.book.inventory, 4)
+
+    def test_bulk_return_rejects_duplicate_borrowings(self):
+        borrowing = sample_borrowing(user=self.user)
+        payload = {"borrowings": [borrowing.id, 999999, borrowing.id]}
+
+        res = self.client.post(BULK_RETURN_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(res.data["borrowings"]), [2])
+
+        borrowing.refresh_from_db()
+        self.assertIsNone(borrowing.actual_return_date)
+
+    def test_bulk_return_requires_one_kind_of_ids(self):
+        res = self.client.post(
+            BULK_RETURN_URL, {"borrowings": [1], "books": [1]}, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.post(BULK_RETURN_URL, {}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BorrowingExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_superuser(
+            "admin@test.com",
+            "admin_password",
+        )
+        self.client.force_authenticate(self.admin)
+
+        today = date.today()
+        self.late = sample_borrowing(
+            user=self.admin,
+            expected_return_date=today - timedelta(days=3),
+        )
+        self.returned = sample_borrowing(
+            user=self.admin,
+            expected_return_date=today - timedelta(days=5),
+            actual_return_date=today - timedelta(days=1),
+        )
+        self.old = sample_borrowing(
+            user=self.admin,
+            expected_return_date=today + timedelta(days=5),
+        )
+        Borrowing.objects.filter(id=self.old.id).update(
+            borrow_date=today - timedelta(days=100)
+        )
+
+    def export(self, params=None):
+        res = self.client.get(EXPORT_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "text/csv")
+        self.assertFalse(res.is_async)
+
+        content = b"".join(res.streaming_content).decode()
+        return list(csv.DictReader(io.StringIO(content)))
+
+    def test_export_all_borrowings(self):
+        rows = self.export()
+
+        self.assertEqual(
+            [int(row["id"]) for row in rows],
+            [self.late.id, self.returned.id, self.old.id],
+        )
+        self.assertEqual(rows[0]["user_email"], "admin@test.com")
+        self.assertEqual(rows[0]["book_title"], "Test book")
+        self.assertEqual(rows[0]["actual_return_date"], "")
+        self.assertEqual(
+            [row["days_late"] for row in rows],
+            ["3", "4", "0"],
+        )
+
+    def test_export_active_borrowings(self):
+        rows = self.export({"is_active": "true"})
+
+        self.assertEqual(
+            [int(row["id"]) for row in rows],
+            [self.late.id, self.old.id],
+        )
+
+    def test_export_date_range(self):
+        rows = self.export({"borrowed_from": date.today() - timedelta(days=10)})
+        self.assertEqual(
+            [int(row["id"]) for row in rows],
+            [self.late.id, self.returned.id],
+        )
+
+        rows = self.export({"borrowed_to": date.today() - timedelta(days=10)})
+        self.assertEqual([int(row["id"]) for row in rows], [self.old.id])
+
+    def test_export_invalid_range(self):
+        res = self.client.get(
+            EXPORT_URL,
+            {
+                "borrowed_from": date.today(),
+                "borrowed_to": date.today() - timedelta(days=1),
+            },
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_under_asgi(self):
+        request = AsyncRequestFactory().get(
+            EXPORT_URL,
+            headers={"Authorization": f"Bearer {AccessToken.for_user(self.admin)}"},
+        )
+        res = BorrowingViewSet.as_view({"get": "export"})(request)
+        self.assertTrue(res.is_async)
+
+        async def read(response):
+            return b"".join([part async for part in response])
+
+        rows = list(csv.DictReader(io.StringIO(async_to_sync(read)(res).decode())))
+
+        self.assertEqual(len(rows), 3)
+
+    def test_export_admin_only(self):
+        self.client.force_authenticate(
+            get_user_model().objects.create_user("user@test.com", "user_password")
+        )
+
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class FineTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_superuser(
+            "admin@test.com",
+            "admin_password",
+        )
+        self.client.force_authenticate(self.admin)
+
+        today = date.today()
+        self.late = sample_borrowing(
+            user=self.admin, expected_return_date=today - timedelta(days=3)
+        )
+        self.on_time = sample_borrowing(user=self.admin)
+
+    @override_settings(FINE_MULTIPLIER=Decimal("1.5"))
+    def test_compute_fines_command(self):
+        out = io.StringIO()
+        call_command("compute_fines", stdout=out)
+
+        fine = Fine.objects.get()
+        self.assertEqual(fine.borrowing_id, self.late.id)
+        self.assertEqual(fine.days_late, 3)
+        self.assertEqual(fine.amount, Decimal("18.00"))
+        self.assertFalse(fine.is_final)
+        self.assertIn("Updated 1 fines", out.getvalue())
+
+    def test_fine_grows_until_returned(self):
+        call_command("compute_fines", stdout=io.StringIO())
+        Borrowing.objects.filter(id=self.late.id).update(
+            expected_return_date=date.today() - timedelta(days=5)
+        )
+
+        res = self.client.post(f"/api/borrowings/{self.late.id}/return/")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["fine"], "20.00")
+
+        fine = Fine.objects.get(borrowing=self.late)
+        self.assertEqual(fine.days_late, 5)
+        self.assertTrue(fine.is_final)
+
+        Book.objects.filter(id=self.late.book_id).update(daily_fee=100)
+        compute_fines(Borrowing.objects.all())
+
+        fine.refresh_from_db()
+        self.assertEqual(fine.amount, Decimal("20.00"))
+
+    def test_upserted_columns(self):
+        today = date.today()
+        returned = sample_borrowing(
+            user=self.admin,
+            borrow_date=today - timedelta(days=20),
+            expected_return_date=today - timedelta(days=6),
+            actual_return_date=today - timedelta(days=1),
+        )
+        Book.objects.filter(id=returned.book_id).update(daily_fee=7)
+        # An earlier, stale fine is overwritten column by column.
+        Fine.objects.create(borrowing=self.late, days_late=1, amount=1)
+
+        compute_fines(Borrowing.objects.all(), today)
+
+        self.assertEqual(
+            list(
+                Fine.objects.order_by("borrowing_id").values_list(
+                    "borrowing_id", "days_late", "amount", "is_final"
+                )
+            ),
+            [
+                (self.late.id, 3, Decimal("12.00"), False),
+                (returned.id, 5, Decimal("35.00"), True),
+            ],
+        )
+
+    def test_uses_days_late_already_annotated(self):
+        later = date.today() + timedelta(days=2)
+
+        compute_fines(filter_overdue(Borrowing.objects.all(), later), later)
+
+        self.assertEqual(
+            list(Fine.objects.values_list("borrowing_id", "days_late", "amount")),
+            [(self.late.id, 5, Decimal("20.00"))],
+        )
+
+    def test_no_fine_for_on_time_return(self):
+        res = self.client.post(f"/api/borrowings/{self.on_time.id}/return/")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsNone(res.data["fine"])
+        self.assertFalse(Fine.objects.exists())
+
+    def test_bulk_return_finalizes_fines(self):
+        res = self.client.post(
+            BULK_RETURN_URL,
+            {"borrowings": [self.late.id, self.on_time.id]},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            list(Fine.objects.values_list("borrowing_id", "amount", "is_final")),
+            [(self.late.id, Decimal("12.00"), True)],
+        )
+
+
+class BorrowingQueryBudgetTests(QueryBudgetMixin, TestCase):
+    query_budgets = {
+        "list": 1,
+        "retrieve": 2,
+        "create": 10,
+        "bulk_borrow": 9,
+        "return_borrowing": 12,
+        "bulk_return": 13,
+        "export": 1,
+        "overdue": 1,
+    }
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_superuser(
+            "admin@test.com",
+            "admin_password",
+        )
+        self.client.force_authenticate(self.admin)
+
+        today = date.today()
+        self.borrowings = [
+            sample_borrowing(
+                user=self.admin, expected_return_date=today - timedelta(days=i)
+            )
+            for i in range(5)
+        ]
+        self.book = Book.objects.create(
+            title="Stocked book",
+            author="Test author",
+            cover="HARD",
+            inventory=10,
+            daily_fee=1,
+        )
+
+    def test_every_action_has_a_budget(self):
+        self.assertBudgetsCover(BorrowingViewSet)
+
+    def test_read_budgets(self):
+        borrowing = self.borrowings[0]
+
+        self.assertQueryBudget("list", lambda: self.client.get(BORROWING_URL))
+        self.assertQueryBudget(
+            "retrieve", lambda: self.client.get(detail_url(borrowing.id))
+        )
+        self.assertQueryBudget("overdue", lambda: self.client.get(OVERDUE_URL))
+        self.assertQueryBudget(
+            "export",
+            lambda: b"".join(self.client.get(EXPORT_URL).streaming_content),
+        )
+
+    def test_write_budgets(self):
+        expected = date.today() + timedelta(days=7)
+
+        responses = [
+            self.assertQueryBudget(
+                "create",
+                lambda: self.client.post(
+                    BORROWING_URL,
+                    {"book": self.book.id, "expected_return_date": expected},
+                ),
+            ),
+            self.assertQueryBudget(
+                "bulk_borrow",
+                lambda: self.client.post(
+                    BULK_BORROWING_URL,
+                    {"books": [self.book.id] * 3, "expected_return_date": expected},
+                    format="json",
+                ),
+            ),
+            self.assertQueryBudget(
+                "return_borrowing",
+                lambda: self.client.post(
+                    f"/api/borrowings/{self.borrowings[0].id}/return/"
+                ),
+            ),
+            self.assertQueryBudget(
+                "bulk_return",
+                lambda: self.client.post(
+                    BULK_RETURN_URL,
+                    {"borrowings": [borrowing.id for borrowing in self.borrowings[1:]]},
+                    format="json",
+                ),
+            ),
+        ]
+
+        self.assertEqual(
+            [res.status_code for res in responses],
+            [
+                status.HTTP_201_CREATED,
+                status.HTTP_201_CREATED,
+                status.HTTP_200_OK,
+                status.HTTP_200_OK,
+            ],
+        )
+
+
+class OverdueBorrowingTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user("user@test.com", "password")
+        self.admin = get_user_model().objects.create_superuser(
+            "admin@test.com",
+            "admin_password",
+        )
+
+        today = date.today()
+        self.late = sample_borrowing(
+            user=self.user, expected_return_date=today - timedelta(days=3)
+        )
+        self.later = sample_borrowing(
+            user=self.admin, expected_return_date=today - timedelta(days=7)
+        )
+        sample_borrowing(user=self.user, expected_return_date=today)
+        sample_borrowing(
+            user=self.user,
+            expected_return_date=today - timedelta(days=5),
+            actual_return_date=today,
+        )
+
+    def test_overdue_requires_authentication(self):
+        res = self.client.get(OVERDUE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_overdue_lists_own_borrowings_with_days_late(self):
+        self.client.force_authenticate(self.user)
+
+        res = self.client.get(OVERDUE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(row["id"], row["days_late"]) for row in res.data["results"]],
+            [(self.late.id, 3)],
+        )
+
+    def test_admin_sees_all_overdue_paginated(self):
+        self.client.force_authenticate(self.admin)
+
+        first = self.client.get(OVERDUE_URL, {"page_size": 1})
+        second = self.client.get(first.data["next"])
+
+        self.assertEqual(first.data["results"][0]["id"], self.late.id)
+        self.assertEqual(second.data["results"][0]["id"], self.later.id)
+        self.assertEqual(second.data["results"][0]["days_late"], 7)
+        self.assertIsNone(second.data["next"])
+
+        res = self.client.get(OVERDUE_URL, {"user_id": self.admin.id})
+        self.assertEqual([row["id"] for row in res.data["results"]], [self.later.id])
+
+    def test_compute_overdue_command(self):
+        out, err = io.StringIO(), io.StringIO()
+
+        call_command("compute_overdue", stdout=out, stderr=err)
+        rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+
+        self.assertEqual(
+            [(int(row["id"]), row["days_late"]) for row in rows],
+            [(self.later.id, "7"), (self.late.id, "3")],
+        )
+        self.assertIn("2 overdue borrowings, up to 7 days late", err.getvalue())
+
+
+class AsyncBorrowingViewTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "user@test.com",
+            "user_password",
+        )
+        self.client = APIClient()
+        self.headers = {"Authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+        self.client.credentials(HTTP_AUTHORIZATION=self.headers["Authorization"])
+
+    def assertSameResponse(self, sync_res, async_res):
+        self.assertEqual(async_res.status_code, sync_res.status_code)
+        self.assertEqual(json.loads(async_res.content), sync_res.json())
+        self.assertEqual(async_res.get("ETag"), sync_res.get("ETag"))
+
+    def test_list_matches_sync_view(self):
+        sample_borrowing(user=self.user)
+        sample_borrowing(user=self.user)
+        sample_borrowing(
+            user=get_user_model().objects.create_user(
+                "another@test.com",
+                "another_password",
+            )
+        )
+
+        async_res = async_get(
+            "borrowing-list", BORROWING_URL, {"page_size": 1}, headers=self.headers
+        )
+        sync_res = self.client.get(BORROWING_URL, {"page_size": 1})
+
+        self.assertSameResponse(sync_res, async_res)
+        self.assertEqual(len(sync_res.data["results"]), 1)
+
+    def test_retrieve_matches_sync_view(self):
+        borrowing = sample_borrowing(user=self.user)
+        url = detail_url(borrowing.id)
+
+        async_res = async_get(
+            "borrowing-detail",
+            url,
+            view_kwargs={"pk": str(borrowing.id)},
+            headers=self.headers,
+        )
+        sync_res = self.client.get(url)
+
+        self.assertSameResponse(sync_res, async_res)
+
+    def test_retrieve_other_users_borrowing(self):
+        borrowing = sample_borrowing(
+            user=get_user_model().objects.create_user(
+                "another@test.com",
+                "another_password",
+            )
+        )
+
+        res = async_get(
+            "borrowing-detail",
+            detail_url(borrowing.id),
+            view_kwargs={"pk": str(borrowing.id)},
+            headers=self.headers,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_stream_only_own_borrowings(self):
+        own = sample_borrowing(user=self.user)
+        sample_borrowing(
+            user=get_user_model().objects.create_user(
+                "another@test.com",
+                "another_password",
+            )
+        )
+
+        res = async_get(
+            "borrowing-list",
+            BORROWING_URL,
+            {"stream": "ndjson"},
+            headers=self.headers,
+        )
+
+        async def read(response):
+            return b"".join([part async for part in response])
+
+        content = async_to_sync(read)(res)
+
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+        self.assertEqual(
+            [json.loads(line) for line in content.splitlines()],
+            [BorrowingReadSerializer(own).data],
+        )
+
+    def test_auth_required(self):
+        res = async_get("borrowing-list", BORROWING_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_cold_user_state_cache(self):
+        sample_borrowing(user=self.user)
+        user_state_cache.clear()
+
+        res = async_get(
+            "borrowing-list", BORROWING_URL, {"page_size": 1}, headers=self.headers
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(json.loads(res.content)["results"]), 1)
+
+    def test_permission_checks_may_query(self):
+        class IsKnownUser(BasePermission):
+            def has_permission(self, request, view):
+                return get_user_model().objects.filter(pk=request.user.pk).exists()
+
+        with patch.object(BorrowingViewSet, "permission_classes", (IsKnownUser,)):
+            res = async_get("borrowing-list", BORROWING_URL, headers=self.headers)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class BorrowingQueryPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        book = Book.objects.create(
+            title="Test book",
+            author="Test author",
+            cover="SOFT",
+            inventory=2,
+            daily_fee=4,
+        )
+        cls.users = get_user_model().objects.bulk_create(
+            get_user_model()(email=f"user{i}@test.com") for i in range(50)
+        )
+        cls.admin = get_user_model().objects.create_superuser(
+            "admin@test.com",
+            "admin_password",
+        )
+        Borrowing.objects.bulk_create(
+            Borrowing(
+                book=book,
+                user=cls.users[i % len(cls.users)],
+                expected_return_date=date.today(),
+                actual_return_date=None if i % 20 == 0 else date.today(),
+            )
+            for i in range(20000)
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE borrowing_borrowing")
+
+    def get_plan(self, user, params=None):
+        client = APIClient()
+        client.force_authenticate(user)
+
+        with CaptureQueriesContext(connection) as queries:
+            res = client.get(BORROWING_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        sql = next(
+            query["sql"]
+            for query in queries
+            if query["sql"].startswith("SELECT")
+            and 'FROM "borrowing_borrowing"' in query["sql"]
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN " + sql)
+            return "\n".join(row[0] for row in cursor.fetchall())
+
+    def test_list_queries_use_indexes(self):
+        user = self.users[0]
+
+        for requester, params in (
+            (user, None),
+            (self.admin, {"user_id": user.id}),
+            (self.admin, {"is_active": "true"}),
+            (self.admin, {"user_id": user.id, "is_active": "true"}),
+        ):
+            plan = self.get_plan(requester, params)
+
+            self.assertNotIn("Seq Scan on borrowing_borrowing", plan, params)
+            self.assertNotIn("Unique", plan, params)
+
+    def test_overdue_query_uses_partial_index(self):
+        queryset = filter_overdue(Borrowing.objects.all()).order_by(
+            "expected_return_date", "id"
+        )
+
+        self.assertIn("borrowing_overdue_idx", queryset.explain())
+
+
+@override_settings(
+    REST_FRAMEWORK={
+        **settings.REST_FRAMEWORK,
+        "DEFAULT_THROTTLE_RATES": {"checkout.ip": "4/min", "checkout.user": "2/min"},
+    }
+)
+class CheckoutThrottleTests(TestCase):
+    def setUp(self):
+        caches["throttle"].clear()
+        self.book = Book.objects.create(
+            title="Test book",
+            author="Test author",
+            cover="SOFT",
+            inventory=10,
+            daily_fee=4,
+        )
+        self.payload = {
+            "book": self.book.id,
+            "expected_return_date": date.today() + timedelta(days=5),
+        }
+
+    def get_client(self, email):
+        client = APIClient()
+        client.force_authenticate(
+            get_user_model().objects.create_user(email, "user_password")
+        )
+        return client
+
+    def test_checkouts_throttled_per_user_and_ip(self):
+        client = self.get_client("user@test.com")
+        other = self.get_client("other@test.com")
+
+        self.assertEqual(
+            client.post(BORROWING_URL, self.payload).status_code,
+            status.HTTP_201_CREATED,
+        )
+        self.assertEqual(
+            client.post(
+                BULK_BORROWING_URL,
+                {**self.payload, "books": [self.book.id]},
+                format="json",
+            ).status_code,
+            status.HTTP_201_CREATED,
+        )
+
+        res = client.post(BORROWING_URL, self.payload)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn("Retry-After", res)
+        self.assertEqual(client.get(BORROWING_URL).status_code, status.HTTP_200_OK)
+
+        self.assertEqual(
+            other.post(BORROWING_URL, self.payload).status_code,
+            status.HTTP_201_CREATED,
+        )
+        self.assertEqual(
+            other.post(BORROWING_URL, self.payload).status_code,
+            status.HTTP_429_TOO_MANY_REQUESTS,
+        )
+        self.assertEqual(
+            self.get_client("third@test.com")
+            .post(BORROWING_URL, self.payload, REMOTE_ADDR="10.0.0.2")
+            .status_code,
+            status.HTTP_201_CREATED,
+        )
+
+
+# One user checks out 64 times; throttling has its own tests.
+@override_settings(
+    REST_FRAMEWORK={**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": {}}
+)
+class ConcurrentInventoryTests(TransactionTestCase):
+    workers = 16
+    attempts = 4
+
+    def test_hot_book_inventory_matches_ledger(self):
+        book = Book.objects.create(
+            title="Hot book",
+            author="Test author",
+            cover="SOFT",
+            inventory=20,
+            daily_fee=4,
+        )
+        user = get_user_model().objects.create_superuser(
+            "admin@test.com",
+            "admin_password",
+        )
+        barrier = threading.Barrier(self.workers)
+        statuses = []
+        errors = []
+
+        def worker():
+            client = APIClient()
+            client.force_authenticate(user)
+            payload = {
+                "book": book.id,
+                "expected_return_date": date.today() + timedelta(days=5),
+            }
+            try:
+                barrier.wait()
+                for attempt in range(self.attempts):
+                    res = client.post(BORROWING_URL, payload)
+                    statuses.append(res.status_code)
+                    if res.status_code == status.HTTP_201_CREATED and attempt % 2:
+                        client.post(f"/api/borrowings/{res.data['id']}/return/")
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertLessEqual(
+            set(statuses),
+            {status.HTTP_201_CREATED, status.HTTP_400_BAD_REQUEST},
+        )
+
+        book.refresh_from_db()
+        active = Borrowing.objects.filter(book=book, actual_return_date=None).count()
+
+        self.assertEqual(book.inventory + active, 20)
+        self.assertGreaterEqual(Borrowing.objects.filter(book=book).count(), 20)
+
+
+class ReservationTests(TestCase):
+    def setUp(self):
+        self.book = Book.objects.create(
+            title="Popular book",
+            author="Test author",
+            cover="SOFT",
+            inventory=0,
+            daily_fee=4,
+        )
+        self.reader = get_user_model().objects.create_user(
+            "reader@test.com", "test_password"
+        )
+        self.admin = get_user_model().objects.create_superuser(
+            "admin@test.com", "admin_password"
+        )
+        self.borrowing = Borrowing.objects.create(
+            book=self.book,
+            user=self.reader,
+            expected_return_date=date.today() + timedelta(days=5),
+        )
+        self.users = [
+            get_user_model().objects.create_user(f"user{i}@test.com", "test_password")
+            for i in range(3)
+        ]
+        self.clients = []
+        for user in self.users:
+            client = APIClient()
+            client.force_authenticate(user)
+            self.clients.append(client)
+
+    def reserve(self, client):
+        return client.post(RESERVATION_URL, {"book": self.book.id})
+
+    def return_borrowing(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        return client.post(f"/api/borrowings/{self.borrowing.id}/return/")
+
+    def test_join_waitlist_in_order(self):
+        positions = [self.reserve(client).data["position"] for client in self.clients]
+
+        self.assertEqual(positions, [1, 2, 3])
+
+        res = self.clients[2].get(RESERVATION_URL)
+
+        self.assertEqual(
+            [(r["position"], r["status"]) for r in res.data["results"]],
+            [(3, Reservation.WAITING)],
+        )
+
+    def test_join_twice_rejected(self):
+        self.reserve(self.clients[0])
+        res = self.reserve(self.clients[0])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Reservation.objects.count(), 1)
+
+    def test_join_in_stock_book_rejected(self):
+        Book.objects.filter(id=self.book.id).update(inventory=1)
+
+        res = self.reserve(self.clients[0])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_return_goes_to_head_of_waitlist(self):
+        first = self.reserve(self.clients[0]).data["id"]
+        second = self.reserve(self.clients[1]).data["id"]
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.return_borrowing()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(any("SKIP LOCKED" in query["sql"] for query in queries))
+
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.inventory, 0)
+
+        claimed = Reservation.objects.get(id=first)
+        self.assertEqual(claimed.status, Reservation.CLAIMED)
+        self.assertIsNotNone(claimed.claim_expires_at)
+        self.assertEqual(
+            self.clients[1].get(reservation_url(second)).data["position"], 1
+        )
+
+        # The book is out of stock for everyone but the claimant.
+        payload = {
+            "book": self.book.id,
+            "expected_return_date": date.today() + timedelta(days=5),
+        }
+        res = self.clients[1].post(BORROWING_URL, payload)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.clients[0].post(BORROWING_URL, payload)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            Reservation.objects.get(id=first).status, Reservation.FULFILLED
+        )
+
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.inventory, 0)
+
+    def test_bulk_borrow_takes_claim(self):
+        self.reserve(self.clients[0])
+        self.return_borrowing()
+
+        res = self.clients[0].post(
+            BULK_BORROWING_URL,
+            {
+                "books": [self.book.id],
+                "expected_return_date": date.today() + timedelta(days=5),
+            },
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.inventory, 0)
+
+    def test_return_without_waitlist_restocks(self):
+        self.return_borrowing()
+
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.inventory, 1)
+
+    def test_cancel_claim_passes_copy_on(self):
+        first = self.reserve(self.clients[0]).data["id"]
+        second = self.reserve(self.clients[1]).data["id"]
+        self.return_borrowing()
+
+        res = self.clients[0].delete(reservation_url(first))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(
+            Reservation.objects.get(id=first).status, Reservation.CANCELLED
+        )
+        self.assertEqual(Reservation.objects.get(id=second).status, Reservation.CLAIMED)
+
+        self.clients[1].delete(reservation_url(second))
+
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.inventory, 1)
+
+        res = self.clients[1].delete(reservation_url(second))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filter_by_book(self):
+        reservation = self.reserve(self.clients[0]).data["id"]
+
+        res = self.clients[0].get(RESERVATION_URL, {"book": self.book.id})
+        self.assertEqual([r["id"] for r in res.data["results"]], [reservation])
+
+        res = self.clients[0].get(RESERVATION_URL, {"book": self.book.id + 1})
+        self.assertEqual(res.data["results"], [])
+
+        res = self.clients[0].get(RESERVATION_URL, {"book": "abc"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_cannot_see_other_users_reservations(self):
+        reservation = self.reserve(self.clients[0]).data["id"]
+
+        res = self.clients[1].get(reservation_url(reservation))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_expired_claims_pass_copy_on(self):
+        first = self.reserve(self.clients[0]).data["id"]
+        second = self.reserve(self.clients[1]).data["id"]
+        self.return_borrowing()
+
+        self.assertEqual(expire_claims(), 0)
+
+        out = io.StringIO()
+        Reservation.objects.filter(id=first).update(
+            claim_expires_at=timezone.now() - timedelta(minutes=1)
+        )
+        call_command("expire_reservations", stdout=out)
+
+        self.assertIn("Expired 1 claims", out.getvalue())
+        self.assertEqual(Reservation.objects.get(id=first).status, Reservation.EXPIRED)
+        self.assertEqual(Reservation.objects.get(id=second).status, Reservation.CLAIMED)
+
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.inventory, 0)
+
+
+class ReservationQueryBudgetTests(QueryBudgetMixin, TestCase):
+    query_budgets = {
+        "list": 1,
+        "retrieve": 1,
+        "create": 8,
+        "destroy": 5,
+    }
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "user@test.com", "test_password"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.books = [
+            Book.objects.create(
+                title=f"Book {i}",
+                author="Test author",
+                cover="SOFT",
+                inventory=0,
+                daily_fee=1,
+            )
+            for i in range(4)
+        ]
+        self.reservations = [
+            Reservation.objects.create(book=book, user=self.user)
+            for book in self.books[:3]
+        ]
+
+    def test_every_action_has_a_budget(self):
+        self.assertBudgetsCover(ReservationViewSet)
+
+    def test_budgets(self):
+        reservation = self.reservations[0]
+
+        responses = [
+            self.assertQueryBudget("list", lambda: self.client.get(RESERVATION_URL)),
+            self.assertQueryBudget(
+                "retrieve", lambda: self.client.get(reservation_url(reservation.id))
+            ),
+            self.assertQueryBudget(
+                "create",
+                lambda: self.client.post(RESERVATION_URL, {"book": self.books[3].id}),
+            ),
+            self.assertQueryBudget(
+                "destroy",
+                lambda: self.client.delete(reservation_url(reservation.id)),
+            ),
+        ]
+
+        self.assertEqual(
+            [res.status_code for res in responses],
+            [
+                status.HTTP_200_OK,
+                status.HTTP_200_OK,
+                status.HTTP_201_CREATED,
+                status.HTTP_204_NO_CONTENT,
+            ],
+        )
@@ -1,13 +1,22 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework import routers
 
-from borrowing.views import BorrowingViewSet
+from borrowing.views import BorrowingViewSet, ReservationViewSet
+from library_service_project.async_views import async_read_urls
 
 router = routers.DefaultRouter()
 router.register("", BorrowingViewSet)
 
+reservation_router = routers.DefaultRouter()
+reservation_router.register("", ReservationViewSet)
+
+urls = async_read_urls(router.urls) if settings.ASYNC_READ_VIEWS else router.urls
+
 urlpatterns = [
-    path("", include(router.urls)),
+    # Ahead of the borrowing routes, whose detail route would match it.
+    path("reservations/", include(reservation_router.urls)),
+    path("", include(urls)),
 ]
 
 app_name = "borrowing"
@@ -1,5 +1,5 @@
-from datetime import date
-
+from django.db import transaction
+from django.db.models import Case, Count, OuterRef, Subquery, When
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework import viewsets, mixins, status
@@ -7,16 +7,40 @@ from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 
-from borrowing.models import Borrowing
+from borrowing.export import export_response, filter_export_queryset
+from borrowing.models import Borrowing, Reservation
+from borrowing.services import (
+    cancel_reservation,
+    filter_overdue,
+    find_active_borrowings,
+    return_book,
+    return_books,
+)
 from borrowing.serializers import (
     BorrowingReadSerializer,
     BorrowingCreateSerializer,
+    BorrowingBulkCreateSerializer,
+    BorrowingBulkReturnSerializer,
+    BorrowingBulkReturnResultSerializer,
+    BorrowingExportFilterSerializer,
+    BorrowingOverdueSerializer,
     BorrowingReturnSerializer,
+    ReservationFilterSerializer,
+    ReservationSerializer,
 )
+from library_service_project.async_views import AsyncReadMixin
+from library_service_project.etags import ETagMixin
+from library_service_project.serializers import FastListMixin
+from library_service_project.streaming import STREAM_PARAMETER, StreamingListMixin
+from library_service_project.throttling import IPThrottle, UserThrottle
 
 
 @extend_schema(tags=["Borrowings"])
 class BorrowingViewSet(
+    StreamingListMixin,
+    ETagMixin,
+    AsyncReadMixin,
+    FastListMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
@@ -25,20 +49,31 @@ class BorrowingViewSet(
     queryset = Borrowing.objects.select_related("book", "user")
     serializer_class = BorrowingReadSerializer
     permission_classes = (IsAuthenticated,)
+    etag_fields = ("updated_at", "book__updated_at")
+    throttle_scope = "checkout"
 
     def get_permissions(self):
         permission_classes = self.permission_classes
 
-        if self.action == "return_borrowing":
+        if self.action in ("return_borrowing", "bulk_return", "export"):
             permission_classes = [IsAdminUser]
 
         return [permission() for permission in permission_classes]
 
+    def get_throttles(self):
+        if self.action in ("create", "bulk_borrow"):
+            return [IPThrottle(), UserThrottle()]
+
+        return super().get_throttles()
+
     def get_queryset(self):
         queryset = self.queryset
 
+        if self.action == "overdue":
+            queryset = filter_overdue(queryset)
+
         if not self.request.user.is_staff:
-            return queryset.filter(user=self.request.user)
+            return queryset.filter(user_id=self.request.user.id)
 
         user_id = self.request.query_params.get("user_id")
         is_active = self.request.query_params.get("is_active")
@@ -49,7 +84,7 @@ class BorrowingViewSet(
         if is_active:
             queryset = queryset.filter(actual_return_date=None)
 
-        return queryset.distinct()
+        return queryset
 
     def get_serializer_class(self):
         if self.action in ["list", "retrieve"]:
@@ -58,14 +93,42 @@ class BorrowingViewSet(
         if self.action == "create":
             return BorrowingCreateSerializer
 
+        if self.action == "bulk_borrow":
+            return BorrowingBulkCreateSerializer
+
         if self.action == "return_borrowing":
             return BorrowingReturnSerializer
 
+        if self.action == "bulk_return":
+            return BorrowingBulkReturnSerializer
+
+        if self.action == "export":
+            return BorrowingExportFilterSerializer
+
+        if self.action == "overdue":
+            return BorrowingOverdueSerializer
+
         return BorrowingReadSerializer
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    @extend_schema(responses=BorrowingCreateSerializer(many=True))
+    @action(
+        methods=["POST"],
+        detail=False,
+        url_path="bulk",
+        url_name="bulk",
+    )
+    def bulk_borrow(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        borrowings = serializer.save(user=request.user)
+
+        serializer = BorrowingCreateSerializer(borrowings, many=True)
+
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
     @action(
         methods=["POST"],
         detail=True,
@@ -74,22 +137,97 @@ class BorrowingViewSet(
     def return_borrowing(self, request, pk=None):
         borrowing = self.get_object()
 
-        if borrowing.actual_return_date is not None:
+        if not return_book(borrowing):
             return Response(
                 {"detail": "Borrowing has already been returned."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        borrowing.actual_return_date = date.today()
-        borrowing.save()
+        serializer = BorrowingReturnSerializer(borrowing)
+
+        return Response(serializer.data, status=status.HTTP_200_OK)
 
-        borrowing.book.inventory += 1
-        borrowing.book.save()
+    @extend_schema(responses=BorrowingBulkReturnResultSerializer)
+    @action(
+        methods=["POST"],
+        detail=False,
+        url_path="bulk-return",
+        url_name="bulk-return",
+    )
+    def bulk_return(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
 
-        serializer = BorrowingReturnSerializer(borrowing)
+        with transaction.atomic():
+            books_not_borrowed, not_found = [], []
+            if "books" in data:
+                borrowing_ids, books_not_borrowed, not_found = find_active_borrowings(
+                    data["books"]
+                )
+            else:
+                borrowing_ids = data["borrowings"]
+
+            returned = return_books(borrowing_ids)
+
+        skipped = set(borrowing_ids) - set(returned)
+        existing = set(
+            Borrowing.objects.filter(id__in=skipped).values_list("id", flat=True)
+        )
+        already_returned = [id_ for id_ in borrowing_ids if id_ in existing]
+        not_found += [id_ for id_ in borrowing_ids if id_ in skipped - existing]
+
+        serializer = BorrowingBulkReturnResultSerializer(
+            {
+                "returned": returned,
+                "already_returned": already_returned,
+                "books_not_borrowed": books_not_borrowed,
+                "not_found": not_found,
+            }
+        )
 
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @extend_schema(
+        parameters=[BorrowingExportFilterSerializer],
+        responses={(200, "text/csv"): OpenApiTypes.STR},
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="export",
+    )
+    def export(self, request):
+        """Full borrowing history as CSV, including days late."""
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+
+        return export_response(
+            request, filter_export_queryset(serializer.validated_data)
+        )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "user_id",
+                type=OpenApiTypes.INT,
+                description="Filter by user id (ex. ?user_id=2)",
+            ),
+        ],
+        responses=BorrowingOverdueSerializer(many=True),
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="overdue",
+    )
+    def overdue(self, request):
+        """Active borrowings past their expected return date, with days late."""
+        # No ETag here: days_late grows every day without a row changing.
+        page = self.paginate_queryset(self.get_list_queryset())
+
+        return self.get_paginated_response(self.get_list_data(page))
+
     @extend_schema(
         parameters=[
             OpenApiParameter(
@@ -102,7 +240,70 @@ class BorrowingViewSet(
                 type=OpenApiTypes.STR,
                 description="Filter is borrowing active or not (ex. ?is_active=true)",
             ),
+            STREAM_PARAMETER,
         ]
     )
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
+
+
+@extend_schema(tags=["Reservations"])
+class ReservationViewSet(
+    mixins.ListModelMixin,
+    mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.DestroyModelMixin,
+    viewsets.GenericViewSet,
+):
+    """Waitlists for out-of-stock books.
+
+    A returned copy goes to the oldest waiting reservation, which becomes
+    CLAIMED until `claim_expires_at`: borrowing the book then takes the held
+    copy. Deleting a reservation leaves the waitlist.
+    """
+
+    queryset = Reservation.objects.all()
+    serializer_class = ReservationSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        ahead = (
+            Reservation.objects.filter(
+                book=OuterRef("book"),
+                status=Reservation.WAITING,
+                id__lte=OuterRef("id"),
+            )
+            .order_by()
+            .values("book")
+            .annotate(count=Count("id"))
+            .values("count")
+        )
+        queryset = self.queryset.annotate(
+            position=Case(When(status=Reservation.WAITING, then=Subquery(ahead)))
+        )
+
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(user_id=self.request.user.id)
+
+        filters = ReservationFilterSerializer(data=self.request.query_params)
+        filters.is_valid(raise_exception=True)
+        if "book" in filters.validated_data:
+            queryset = queryset.filter(book_id=filters.validated_data["book"])
+
+        return queryset
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    def destroy(self, request, *args, **kwargs):
+        if not cancel_reservation(self.get_object()):
+            return Response(
+                {"detail": "Reservation is no longer active."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @extend_schema(parameters=[ReservationFilterSerializer])
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
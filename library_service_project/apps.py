@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class LibraryServiceProjectConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "library_service_project"
+
+    def ready(self):
+        import library_service_project.checks  # noqa: F401
@@ -0,0 +1,159 @@
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.http import Http404
+from django.urls import URLPattern
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+from rest_framework.response import Response
+
+ASYNC_ACTIONS = ("list", "retrieve")
+
+
+class AsyncReadMixin:
+    """`alist` and `aretrieve` for AsyncReadView, mirroring list/retrieve.
+
+    Lists go through FastListMixin's `get_list_queryset`, `get_list_data`
+    and `get_page_response`.
+    """
+
+    async def aget_object(self):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset())
+
+        try:
+            obj = await queryset.aget(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404
+
+        self.check_object_permissions(self.request, obj)
+
+        return obj
+
+    async def aretrieve(self, request, *args, **kwargs):
+        serializer = self.get_serializer(await self.aget_object())
+        return Response(serializer.data)
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = self.get_list_queryset()
+        page = None
+
+        if self.paginator is not None:
+            page = await self.paginator.apaginate_queryset(queryset, request, self)
+
+        if page is None:
+            return Response(self.get_list_data([row async for row in queryset]))
+
+        return self.get_page_response(request, page)
+
+
+class AsyncReadView(View):
+    """Serve GET list/retrieve of a router view without blocking a thread.
+
+    Authentication, permissions, filters, pagination, ETags and serializers
+    all come from the wrapped viewset, which provides `alist`/`aretrieve`
+    (AsyncReadMixin), so the JSON is the same as the sync view's. Other methods are handed
+    to `sync_view`.
+    """
+
+    sync_view = None
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method != "GET":
+            return await sync_to_async(self.sync_view)(request, *args, **kwargs)
+
+        return await self.get(request, *args, **kwargs)
+
+    async def get(self, request, *args, **kwargs):
+        viewset = self.sync_view.cls(**self.sync_view.initkwargs)
+        viewset.action_map = self.sync_view.actions
+        viewset.args = args
+        viewset.kwargs = kwargs
+        viewset.headers = viewset.default_response_headers
+        viewset.request = request = viewset.initialize_request(request, *args, **kwargs)
+
+        try:
+            await authenticate(request)
+            # Permission and throttle checks are sync code that may query the
+            # database, so they run on the ORM's thread.
+            await sync_to_async(viewset.initial)(request, *args, **kwargs)
+            handler = getattr(viewset, f"a{viewset.action}")
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = viewset.handle_exception(exc)
+
+        response = viewset.finalize_response(request, response, *args, **kwargs)
+
+        # Streamed lists read the database while they are being sent.
+        if not isinstance(response, Response):
+            return response
+
+        if response.accepted_renderer.format == "json":
+            response.render()
+        else:
+            # The browsable API builds forms, which may query the database.
+            await sync_to_async(response.render)()
+
+        await sync_to_async(release_connections)()
+
+        return response
+
+
+async def authenticate(request):
+    """Async version of `Request._authenticate`."""
+    for authenticator in request.authenticators:
+        try:
+            if hasattr(authenticator, "aauthenticate"):
+                user_auth_tuple = await authenticator.aauthenticate(request)
+            else:
+                user_auth_tuple = await sync_to_async(authenticator.authenticate)(
+                    request
+                )
+        except exceptions.APIException:
+            request._not_authenticated()
+            raise
+
+        if user_auth_tuple is not None:
+            request._authenticator = authenticator
+            request.user, request.auth = user_auth_tuple
+            return
+
+    request._not_authenticated()
+
+
+def release_connections():
+    """Do the request-end connection cleanup before the body is sent.
+
+    Slow clients then don't hold a database connection (or a pool slot)
+    while they read the response.
+    """
+    for conn in connections.all(initialized_only=True):
+        if not conn.in_atomic_block:
+            conn.close_if_unusable_or_obsolete()
+
+
+def async_read_urls(urls):
+    """Route the GET list/retrieve patterns of `urls` to AsyncReadView."""
+    patterns = []
+
+    for pattern in urls:
+        actions = getattr(pattern.callback, "actions", {})
+
+        if actions.get("get") in ASYNC_ACTIONS:
+            pattern = URLPattern(
+                pattern.pattern,
+                AsyncReadView.as_view(sync_view=pattern.callback),
+                pattern.default_args,
+                pattern.name,
+            )
+
+        patterns.append(pattern)
+
+    return patterns
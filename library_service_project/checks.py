@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core import checks
+
+from library_service_project.throttling import THROTTLE_CACHE
+
+# Backends that keep their counts in each worker's memory.
+PER_PROCESS_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def check_throttle_cache(app_configs, **kwargs):
+    """Warn when every worker would count throttled requests on its own.
+
+    A deployment check, so it runs with `check --deploy` rather than on
+    every runserver or test run, where a local cache is expected.
+    """
+    backend = settings.CACHES.get(THROTTLE_CACHE, {}).get("BACKEND")
+
+    if backend not in PER_PROCESS_BACKENDS:
+        return []
+
+    return [
+        checks.Warning(
+            f"The {THROTTLE_CACHE!r} cache uses {backend}, which isn't shared "
+            "between processes: each worker keeps its own counts, so the "
+            "throttle rates are multiplied by the number of workers.",
+            hint="Point THROTTLE_CACHE_BACKEND and THROTTLE_CACHE_LOCATION at "
+            "Redis or Memcached.",
+            id="throttling.W001",
+        )
+    ]
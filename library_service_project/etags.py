@@ -0,0 +1,119 @@
+import hashlib
+from operator import attrgetter
+
+from django.core.exceptions import ValidationError
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def make_etag(*parts):
+    return '"%s"' % hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+def etag_matches(request, etag):
+    etags = parse_etags(request.META.get("HTTP_IF_NONE_MATCH", ""))
+    return "*" in etags or etag in etags or f"W/{etag}" in etags
+
+
+def not_modified(etag):
+    return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+
+class ETagMixin:
+    """Answer If-None-Match on list and retrieve before serializing.
+
+    Detail ETags come from one indexed lookup of `etag_fields`, list ETags
+    from the same fields of every row on the page. Wraps `retrieve`,
+    AsyncReadMixin's `aretrieve` and FastListMixin's `get_page_response`,
+    which both `list` and `alist` go through.
+    """
+
+    etag_fields = ("updated_at",)
+
+    def get_etag_values(self, obj):
+        if isinstance(obj, dict):
+            values = tuple(obj[field] for field in self.etag_fields)
+            return values[0] if len(values) == 1 else values
+
+        fields = [field.replace("__", ".") for field in self.etag_fields]
+        return attrgetter(*fields)(obj)
+
+    def get_detail_queryset(self):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset())
+
+        return queryset.filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        ).values_list(*self.etag_fields)
+
+    def get_detail_version(self):
+        try:
+            return self.get_detail_queryset().first()
+        except (TypeError, ValueError, ValidationError):
+            return None
+
+    async def aget_detail_version(self):
+        try:
+            return await self.get_detail_queryset().afirst()
+        except (TypeError, ValueError, ValidationError):
+            return None
+
+    def get_values_fields(self, queryset):
+        return (*super().get_values_fields(queryset), *self.etag_fields)
+
+    def get_detail_etag(self, request, version):
+        # The query string and the negotiated format both change the body.
+        return make_etag(request.get_full_path(), request.accepted_media_type, version)
+
+    def get_list_etag(self, request, page):
+        return make_etag(
+            request.get_full_path(),
+            request.accepted_media_type,
+            self.paginator.get_next_link(),
+            self.paginator.get_previous_link(),
+            [self.get_etag_values(obj) for obj in page],
+        )
+
+    def get_page_response(self, request, page):
+        etag = self.get_list_etag(request, page)
+
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        response = super().get_page_response(request, page)
+        response["ETag"] = etag
+
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        version = self.get_detail_version()
+
+        if version is None:
+            return super().retrieve(request, *args, **kwargs)
+
+        etag = self.get_detail_etag(request, version)
+
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        response = super().retrieve(request, *args, **kwargs)
+        response["ETag"] = etag
+
+        return response
+
+    async def aretrieve(self, request, *args, **kwargs):
+        version = await self.aget_detail_version()
+
+        if version is None:
+            return await super().aretrieve(request, *args, **kwargs)
+
+        etag = self.get_detail_etag(request, version)
+
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        response = await super().aretrieve(request, *args, **kwargs)
+        response["ETag"] = etag
+
+        return response
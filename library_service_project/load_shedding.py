@@ -0,0 +1,94 @@
+import threading
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import JsonResponse
+
+from library_service_project.metrics import Counter
+from library_service_project.pooled_postgresql.base import get_pools
+
+SHED_REQUESTS = Counter(
+    "http_requests_shed_total",
+    "Requests refused with 503 by reason (concurrency or db_pool).",
+    ("reason",),
+)
+
+
+class LoadSheddingMiddleware:
+    """Answer 503 with Retry-After instead of queueing behind a busy worker.
+
+    A request is refused when MAX_CONCURRENT_REQUESTS are already in
+    flight in this process, or when LOAD_SHED_POOL_WAITING requests are
+    already waiting for a connection from the DB pool (DB_POOL_MODE=pool).
+    Paths in LOAD_SHED_EXEMPT_PATHS, like /metrics, are always served.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+        self.active = 0
+        self.lock = threading.Lock()
+
+    def acquire(self, request):
+        """Return None and take a slot, or the reason the request is shed."""
+        if request.path.startswith(settings.LOAD_SHED_EXEMPT_PATHS):
+            return None
+
+        max_waiting = settings.LOAD_SHED_POOL_WAITING
+        if max_waiting and any(
+            pool.stats()["waiting"] >= max_waiting for pool in get_pools().values()
+        ):
+            return "db_pool"
+
+        with self.lock:
+            limit = settings.MAX_CONCURRENT_REQUESTS
+            if limit and self.active >= limit:
+                return "concurrency"
+
+            self.active += 1
+
+        request.load_shedding_slot = True
+        return None
+
+    def release(self, request):
+        if getattr(request, "load_shedding_slot", False):
+            with self.lock:
+                self.active -= 1
+
+    def shed(self, reason):
+        SHED_REQUESTS.inc(reason=reason)
+
+        response = JsonResponse(
+            {"detail": "The service is overloaded, please retry later."},
+            status=503,
+        )
+        response["Retry-After"] = str(settings.LOAD_SHED_RETRY_AFTER)
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        reason = self.acquire(request)
+        if reason is not None:
+            return self.shed(reason)
+
+        try:
+            return self.get_response(request)
+        finally:
+            self.release(request)
+
+    async def __acall__(self, request):
+        reason = self.acquire(request)
+        if reason is not None:
+            return self.shed(reason)
+
+        try:
+            return await self.get_response(request)
+        finally:
+            self.release(request)
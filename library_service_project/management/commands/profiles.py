@@ -0,0 +1,78 @@
+import io
+import pstats
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from library_service_project.profiling import (
+    collapse_stats,
+    get_profile_paths,
+    parse_profile_path,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "List the request profiles in PROFILE_DIR, or merge them into one "
+        "pstats report, .prof file or folded flamegraph stacks"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("ids", nargs="*", help="Profile ids; all when omitted")
+        parser.add_argument(
+            "--view", help="Only profiles of this view, e.g. BookViewSet.list"
+        )
+        parser.add_argument("--reason", choices=("requested", "sampled"))
+        parser.add_argument(
+            "--merge", action="store_true", help="Merge instead of listing"
+        )
+        parser.add_argument(
+            "--collapsed",
+            action="store_true",
+            help="Merge into folded stacks for flamegraph.pl or speedscope",
+        )
+        parser.add_argument("--sort", default="cumulative")
+        parser.add_argument("--limit", type=int, default=30)
+        parser.add_argument(
+            "--output", help="Write the merged .prof (or folded stacks) here"
+        )
+
+    def handle(self, *args, **options):
+        profiles = [
+            profile
+            for profile in map(parse_profile_path, get_profile_paths())
+            if (not options["ids"] or profile["id"] in options["ids"])
+            and options["view"] in (None, profile["view"])
+            and options["reason"] in (None, profile["reason"])
+        ]
+
+        if not options["merge"] and not options["collapsed"]:
+            for profile in profiles:
+                created = datetime.fromtimestamp(profile["created"])
+                self.stdout.write(
+                    f"{profile['id']}  {created.isoformat(timespec='seconds')}  "
+                    f"{profile['method']:<6} {profile['view']:<40} "
+                    f"{profile['ms']:>7} ms  {profile['reason']}"
+                )
+            return
+
+        if not profiles:
+            raise CommandError("No profiles match.")
+
+        stats = pstats.Stats(*(profile["path"] for profile in profiles))
+
+        if options["collapsed"]:
+            lines = collapse_stats(stats.stats)
+            if options["output"]:
+                with open(options["output"], "w") as output:
+                    output.writelines(line + "\n" for line in lines)
+            else:
+                self.stdout.write("\n".join(lines))
+        elif options["output"]:
+            stats.dump_stats(options["output"])
+        else:
+            stats.stream = io.StringIO()
+            stats.sort_stats(options["sort"]).print_stats(options["limit"])
+            self.stdout.write(stats.stream.getvalue())
+
+        self.stderr.write(f"Merged {len(profiles)} profiles")
@@ -0,0 +1,327 @@
+import abc
+import bisect
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; the Prometheus client defaults.
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.075,
+    0.1,
+    0.25,
+    0.5,
+    0.75,
+    1.0,
+    2.5,
+    5.0,
+    7.5,
+    10.0,
+    math.inf,
+)
+
+# Metrics by name, in the order they're rendered.
+REGISTRY = {}
+
+HEADER = struct.Struct("i4x")
+LENGTH = struct.Struct("i")
+VALUE = struct.Struct("d")
+
+
+def encode_entry(key, value):
+    encoded = key.encode()
+    # Pad the key so the value is 8-byte aligned.
+    padding = 8 - (LENGTH.size + len(encoded)) % 8
+    return LENGTH.pack(len(encoded)) + encoded + b" " * padding + VALUE.pack(value)
+
+
+def read_entries(data):
+    """Yield (key, value, value offset) from a store's bytes."""
+    used = min(HEADER.unpack_from(data)[0], len(data)) if data else 0
+    position = HEADER.size
+
+    while position + LENGTH.size <= used:
+        (length,) = LENGTH.unpack_from(data, position)
+        position += LENGTH.size
+        key = bytes(data[position : position + length]).decode()
+        position += length + 8 - (LENGTH.size + length) % 8
+
+        if position + VALUE.size > used:
+            break
+
+        yield key, VALUE.unpack_from(data, position)[0], position
+        position += VALUE.size
+
+
+class MetricStore:
+    """Float values by key in a growable mmap, written by one process only.
+
+    Each process writes its own file under METRICS_DIR and readers sum the
+    files, so counters add up across workers without any locking between
+    processes. Without a directory the map is anonymous and the store only
+    reports this process.
+    """
+
+    initial_size = 64 * 1024
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        self.positions = {}
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self.file = open(os.path.join(directory, f"{self.pid}.db"), "a+b")
+            if os.fstat(self.file.fileno()).st_size == 0:
+                self.file.truncate(self.initial_size)
+            self.map = mmap.mmap(self.file.fileno(), 0)
+        else:
+            self.file = None
+            self.map = mmap.mmap(-1, self.initial_size)
+
+        # A restarted worker can reuse a pid; carry on from its values.
+        for key, _, position in read_entries(self.map):
+            self.positions[key] = position
+        self.used = max(HEADER.unpack_from(self.map)[0], HEADER.size)
+
+    def grow(self, size):
+        length = len(self.map)
+        while length < size:
+            length *= 2
+
+        if self.file is not None:
+            self.map.close()
+            self.file.truncate(length)
+            self.map = mmap.mmap(self.file.fileno(), 0)
+        else:
+            grown = mmap.mmap(-1, length)
+            grown[: self.used] = self.map[: self.used]
+            self.map.close()
+            self.map = grown
+
+    def add(self, key):
+        entry = encode_entry(key, 0.0)
+
+        if self.used + len(entry) > len(self.map):
+            self.grow(self.used + len(entry))
+
+        # Write the entry before publishing the new length to readers.
+        self.map[self.used : self.used + len(entry)] = entry
+        self.positions[key] = self.used + len(entry) - VALUE.size
+        self.used += len(entry)
+        HEADER.pack_into(self.map, 0, self.used)
+
+        return self.positions[key]
+
+    def inc(self, key, amount=1.0):
+        with self.lock:
+            position = self.positions.get(key)
+            if position is None:
+                position = self.add(key)
+
+            (value,) = VALUE.unpack_from(self.map, position)
+            VALUE.pack_into(self.map, position, value + amount)
+
+    def read(self):
+        with self.lock:
+            return bytes(self.map[: self.used])
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Return this process's store, reopened after a fork or a new directory."""
+    global _store
+    directory = settings.METRICS_DIR
+
+    store = _store
+    if store is None or store.pid != os.getpid() or store.directory != directory:
+        with _store_lock:
+            store = _store
+            if (
+                store is None
+                or store.pid != os.getpid()
+                or store.directory != directory
+            ):
+                store = _store = MetricStore(directory)
+
+    return store
+
+
+def read_samples():
+    """Sum every process's values by key."""
+    store = get_store()
+    samples = defaultdict(float)
+    stores = [store.read()]
+
+    if store.directory:
+        stores = []
+        for name in os.listdir(store.directory):
+            if name == f"{store.pid}.db":
+                stores.append(store.read())
+            elif name.endswith(".db"):
+                with open(os.path.join(store.directory, name), "rb") as file:
+                    stores.append(file.read())
+
+    for data in stores:
+        for key, value, _ in read_entries(data):
+            samples[key] += value
+
+    return samples
+
+
+def format_value(value):
+    if value == math.inf:
+        return "+Inf"
+
+    return repr(float(value))
+
+
+def format_labels(names, values):
+    if not names:
+        return ""
+
+    labels = ",".join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'),
+        )
+        for name, value in zip(names, values)
+    )
+    return f"{{{labels}}}"
+
+
+class Metric(abc.ABC):
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        REGISTRY[name] = self
+
+    def get_key(self, suffix, labels, *extra):
+        values = [str(labels[name]) for name in self.labelnames]
+        return json.dumps([self.name, suffix, [*values, *extra]])
+
+    @abc.abstractmethod
+    def render(self, samples):
+        """Yield the exposition lines for `samples`."""
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        get_store().inc(self.get_key("", labels), amount)
+
+    def render(self, samples):
+        if not samples and not self.labelnames:
+            samples = {("", ()): 0.0}
+
+        for (_, values), value in sorted(samples.items()):
+            yield (
+                f"{self.name}{format_labels(self.labelnames, values)} "
+                f"{format_value(value)}"
+            )
+
+
+class Histogram(Metric):
+    """Buckets are stored per bound and made cumulative when rendered."""
+
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        bound = self.buckets[bisect.bisect_left(self.buckets, value)]
+        store = get_store()
+        store.inc(self.get_key("_bucket", labels, format_value(bound)))
+        store.inc(self.get_key("_sum", labels), value)
+        store.inc(self.get_key("_count", labels))
+
+    def render(self, samples):
+        series = defaultdict(lambda: defaultdict(float))
+
+        for (suffix, values), value in samples.items():
+            if suffix == "_bucket":
+                *values, bound = values
+                series[tuple(values)][bound] += value
+            else:
+                series[tuple(values)][suffix] += value
+
+        for values, sample in sorted(series.items()):
+            total = 0.0
+            for bound in map(format_value, self.buckets):
+                total += sample[bound]
+                labels = format_labels((*self.labelnames, "le"), (*values, bound))
+                yield f"{self.name}_bucket{labels} {format_value(total)}"
+
+            labels = format_labels(self.labelnames, values)
+            yield f"{self.name}_sum{labels} {format_value(sample['_sum'])}"
+            yield f"{self.name}_count{labels} {format_value(sample['_count'])}"
+
+
+def render_metrics():
+    """The registry in the Prometheus text exposition format."""
+    grouped = defaultdict(dict)
+
+    for key, value in read_samples().items():
+        name, suffix, values = json.loads(key)
+        grouped[name][suffix, tuple(values)] = value
+
+    lines = []
+    for metric in REGISTRY.values():
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        lines.extend(metric.render(grouped[metric.name]))
+
+    return "\n".join(lines) + "\n"
+
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by view and action.",
+    ("view", "action"),
+)
+REQUESTS = Counter(
+    "http_requests_total",
+    "Requests by view, action and status code.",
+    ("view", "action", "status"),
+)
+DB_QUERIES = Counter(
+    "db_queries_total",
+    "Database queries run by view and action.",
+    ("view", "action"),
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Cache lookups by cache and result (hit or miss).",
+    ("cache", "result"),
+)
+
+
+def record_request(view, action, status, seconds, queries):
+    REQUEST_LATENCY.observe(seconds, view=view, action=action)
+    REQUESTS.inc(view=view, action=action, status=status)
+    DB_QUERIES.inc(queries, view=view, action=action)
+
+
+def record_cache(cache, hit):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
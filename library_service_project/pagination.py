@@ -0,0 +1,153 @@
+import json
+import operator
+from functools import reduce
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination, _reverse_ordering
+
+
+class IdCursorPagination(CursorPagination):
+    """Keyset pagination: no OFFSET scans and no COUNT(*).
+
+    Pages on the primary key unless a filter backend has already ordered
+    the queryset, e.g. by search rank. The cursor holds the values of every
+    ordering field, so the ordering must end with a unique, non-null field
+    like the id: pages then continue strictly after `(field, id)` however
+    many rows tie on the field.
+    """
+
+    ordering = "id"
+    page_size_query_param = "page_size"
+
+    @property
+    def max_page_size(self):
+        return settings.MAX_PAGE_SIZE
+
+    def get_ordering(self, request, queryset, view):
+        # Filter backends have already run, so any ordering they chose is
+        # on the queryset.
+        return tuple(queryset.query.order_by) or (self.ordering,)
+
+    def get_keyset_filter(self, position, reverse):
+        """Rows after `position` in the (possibly reversed) ordering.
+
+        (a, b) > (x, y) expands to a >= x AND (a > x OR (a = x AND b > y)),
+        the leading bound letting the (a, b) index do a range scan.
+        """
+        clauses = []
+        equal = {}
+
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") != reverse else "gt"
+            clauses.append(Q(**equal, **{f"{name}__{lookup}": value}))
+            equal[name] = value
+
+        first = self.ordering[0]
+        lookup = "lt" if first.startswith("-") != reverse else "gt"
+        bound = Q(**{f"{first.lstrip('-')}__{lookup}e": position[0]})
+
+        return bound & reduce(operator.or_, clauses)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+
+        reverse = bool(self.cursor and self.cursor.reverse)
+        position = self.cursor.position if self.cursor else None
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if position is not None:
+            try:
+                queryset = queryset.filter(self.get_keyset_filter(position, reverse))
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+
+        results = list(queryset[: self.page_size + 1])
+        self.page = results[: self.page_size]
+        has_more = len(results) > self.page_size
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+
+        # An empty page means the rows around the cursor are gone: start
+        # over from the first page instead.
+        position = self.get_position(self.page[-1]) if self.page else None
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+
+        position = self.get_position(self.page[0]) if self.page else None
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
+
+    def get_position(self, instance):
+        values = []
+
+        for field in self.ordering:
+            name = field.lstrip("-")
+            if isinstance(instance, dict):
+                value = instance[name]
+            else:
+                # The raw foreign key, without fetching the related row.
+                value = instance.serializable_value(name)
+            values.append(value)
+
+        return values
+
+    def decode_cursor(self, request):
+        cursor = super().decode_cursor(request)
+        if cursor is None or cursor.position is None:
+            return cursor
+
+        try:
+            position = json.loads(cursor.position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        return Cursor(offset=0, reverse=cursor.reverse, position=position)
+
+    def encode_cursor(self, cursor):
+        if cursor.position is not None:
+            cursor = cursor._replace(
+                position=json.dumps(cursor.position, cls=DjangoJSONEncoder)
+            )
+
+        return super().encode_cursor(cursor)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        # The page is one query; run it on the ORM's thread like Django's
+        # own async queryset methods do.
+        return await sync_to_async(self.paginate_queryset)(queryset, request, view)
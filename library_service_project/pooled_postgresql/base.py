@@ -0,0 +1,73 @@
+import threading
+from functools import partial
+
+from django.db.backends.postgresql import base, creation
+
+from library_service_project.pooled_postgresql.pool import ConnectionPool
+
+POOL_DEFAULTS = {
+    "MAX_SIZE": 10,
+    "TIMEOUT": 5,
+    "IDLE_TIMEOUT": 300,
+    "MAX_LIFETIME": 3600,
+}
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pools():
+    with _pools_lock:
+        return dict(_pools)
+
+
+def close_pools(database_name):
+    """Close the idle connections to a database, e.g. before dropping it."""
+    for (_, name, _, _), pool in get_pools().items():
+        if name == database_name:
+            pool.close()
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        close_pools(test_database_name)
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL backend that borrows connections from a per-process pool.
+
+    Django "closes" the connection at the end of every request (keep
+    CONN_MAX_AGE at 0), which hands it back to the pool instead.
+    """
+
+    creation_class = DatabaseCreation
+
+    def get_pool(self):
+        key = (
+            self.alias,
+            self.settings_dict["NAME"],
+            self.settings_dict["HOST"],
+            self.settings_dict["PORT"],
+        )
+
+        with _pools_lock:
+            if key not in _pools:
+                options = {**POOL_DEFAULTS, **self.settings_dict.get("POOL", {})}
+                _pools[key] = ConnectionPool(
+                    max_size=options["MAX_SIZE"],
+                    timeout=options["TIMEOUT"],
+                    idle_timeout=options["IDLE_TIMEOUT"],
+                    max_lifetime=options["MAX_LIFETIME"],
+                )
+
+            return _pools[key]
+
+    def get_new_connection(self, conn_params):
+        self.pool = self.get_pool()
+        return self.pool.getconn(partial(super().get_new_connection, conn_params))
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.putconn(self.connection)
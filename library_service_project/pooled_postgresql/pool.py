@@ -0,0 +1,153 @@
+import threading
+import time
+from collections import deque
+
+from psycopg2 import OperationalError
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+
+class PoolTimeout(OperationalError):
+    pass
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of DB-API connections.
+
+    Connections are opened lazily up to `max_size`; callers wait up to
+    `timeout` seconds for a free one. Idle connections are dropped after
+    `idle_timeout` seconds and every connection after `max_lifetime`.
+    """
+
+    def __init__(self, max_size, timeout, idle_timeout, max_lifetime):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+
+        self._idle = deque()
+        self._created = {}
+        self._size = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._cond = threading.Condition()
+
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_time = 0.0
+
+    def getconn(self, connect):
+        """Return an idle connection, or open one with `connect()` if allowed."""
+        start = time.monotonic()
+
+        with self._cond:
+            self._waiting += 1
+            try:
+                conn = self._acquire(start)
+            finally:
+                self._waiting -= 1
+                self.wait_time += time.monotonic() - start
+
+        if conn is None:
+            try:
+                conn = connect()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._in_use -= 1
+                    self._cond.notify()
+                raise
+
+            self._created[id(conn)] = time.monotonic()
+
+        return conn
+
+    def _acquire(self, start):
+        """Reserve a slot; return an idle connection or None to open one."""
+        while True:
+            now = time.monotonic()
+
+            while self._idle:
+                conn, last_used = self._idle.pop()
+
+                if conn.closed or self._expired(conn, now, last_used):
+                    self._discard(conn)
+                    continue
+
+                self._in_use += 1
+                self.checkouts += 1
+                return conn
+
+            if self._size < self.max_size:
+                self._size += 1
+                self._in_use += 1
+                self.checkouts += 1
+                return None
+
+            remaining = self.timeout - (now - start)
+            if remaining <= 0:
+                self.timeouts += 1
+                raise PoolTimeout(
+                    f"No database connection available after {self.timeout}s "
+                    f"({self.max_size} in use)."
+                )
+
+            self._cond.wait(remaining)
+
+    def putconn(self, conn):
+        healthy = not conn.closed
+
+        if healthy and conn.info.transaction_status != TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except Exception:
+                healthy = False
+
+        with self._cond:
+            self._in_use -= 1
+
+            if healthy and not self._expired(conn, time.monotonic()):
+                self._idle.append((conn, time.monotonic()))
+            else:
+                self._discard(conn)
+
+            self._cond.notify()
+
+    def _expired(self, conn, now, last_used=None):
+        created = self._created.get(id(conn), now)
+
+        if now - created > self.max_lifetime:
+            return True
+
+        return last_used is not None and now - last_used > self.idle_timeout
+
+    def _discard(self, conn):
+        self._size -= 1
+        self._created.pop(id(conn), None)
+
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def close(self):
+        with self._cond:
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._discard(conn)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "max_size": self.max_size,
+                "size": self._size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "waiting": self._waiting,
+                "utilization": self._in_use / self.max_size,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_time_total": self.wait_time,
+                "wait_time_avg": self.wait_time / self.checkouts
+                if self.checkouts
+                else 0.0,
+            }
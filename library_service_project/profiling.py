@@ -0,0 +1,241 @@
+import cProfile
+import os
+import random
+import re
+import time
+from collections import defaultdict
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from library_service_project.timing import current_timing
+
+PROFILE_HEADER = "HTTP_X_PROFILE"
+PROFILE_ID = re.compile(r"^\d+-\d+$")
+SEPARATOR = "+"
+
+
+def is_profile_requested(request):
+    return request.GET.get("profile") == "1" or request.META.get(PROFILE_HEADER) == "1"
+
+
+def is_staff_request(request):
+    """Authenticate like the API views would, without failing the request."""
+    user = getattr(request, "user", None)
+    if user is not None and user.is_staff:
+        return True
+
+    drf_request = Request(request)
+    for authenticator_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        try:
+            result = authenticator_class().authenticate(drf_request)
+        except APIException:
+            return False
+
+        if result is not None:
+            return result[0].is_staff
+
+    return False
+
+
+def get_profile_paths():
+    """Saved profiles, oldest first; ids start with a nanosecond timestamp."""
+    try:
+        names = os.listdir(settings.PROFILE_DIR)
+    except FileNotFoundError:
+        return []
+
+    return [
+        os.path.join(settings.PROFILE_DIR, name)
+        for name in sorted(names)
+        if name.endswith(".prof")
+    ]
+
+
+def parse_profile_path(path):
+    """Split a profile's file name into its id and request details."""
+    name = os.path.basename(path)[: -len(".prof")]
+    profile_id, method, view, duration, reason = name.split(SEPARATOR)
+
+    return {
+        "id": profile_id,
+        "created": int(profile_id.split("-")[0]) / 1e9,
+        "method": method,
+        "view": view,
+        "ms": int(duration),
+        "reason": reason,
+        "path": path,
+    }
+
+
+def get_profile_path(profile_id):
+    if not PROFILE_ID.match(profile_id):
+        return None
+
+    for path in get_profile_paths():
+        if os.path.basename(path).startswith(profile_id + SEPARATOR):
+            return path
+
+    return None
+
+
+def save_profile(profiler, request, view, duration, reason):
+    """Write a profile to the ring in PROFILE_DIR, dropping the oldest ones."""
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    profile_id = f"{time.time_ns()}-{os.getpid()}"
+    name = SEPARATOR.join(
+        [profile_id, request.method, view, str(round(duration * 1000)), reason]
+    )
+    path = os.path.join(settings.PROFILE_DIR, f"{name}.prof")
+
+    # Write under another name first so readers never see half a profile.
+    profiler.dump_stats(path + ".tmp")
+    os.replace(path + ".tmp", path)
+
+    paths = get_profile_paths()
+    for old_path in paths[: max(len(paths) - settings.PROFILE_MAX_FILES, 0)]:
+        try:
+            os.remove(old_path)
+        except FileNotFoundError:
+            pass
+
+    return profile_id
+
+
+def frame_name(func):
+    filename, line, name = func
+    return f"{name} ({filename}:{line})".replace(";", ",")
+
+
+def collapse_stats(stats, min_share=0.0001, max_depth=64):
+    """Folded stacks ("a;b;c microseconds") for flamegraph.pl or speedscope.
+
+    cProfile only records caller -> callee edges, so a function's time below
+    each caller is split between its callees in proportion to their edges.
+    Stacks are approximate where a function is called from several places,
+    but every frame's total adds up to the profile's.
+    """
+    callees = defaultdict(dict)
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees[caller][func] = edge
+
+    roots = [
+        (func, cumulative, own)
+        for func, (_, _, own, cumulative, callers) in stats.items()
+        if not callers
+    ]
+    min_seconds = sum(cumulative for _, cumulative, _ in roots) * min_share
+    folded = defaultdict(float)
+
+    def walk(func, stack, seconds, own_share):
+        stack = (*stack, frame_name(func))
+        children = callees[func] if len(stack) < max_depth else {}
+        total = sum(edge[3] for edge in children.values())
+        own = seconds if not total else seconds * own_share
+        folded[";".join(stack)] += own
+
+        for callee, (_, _, edge_own, edge_cumulative) in children.items():
+            share = (seconds - own) * edge_cumulative / total
+            if share >= min_seconds:
+                walk(
+                    callee,
+                    stack,
+                    share,
+                    min(edge_own / edge_cumulative, 1.0) if edge_cumulative else 1.0,
+                )
+
+    for func, cumulative, own in roots:
+        walk(func, (), cumulative, min(own / cumulative, 1.0) if cumulative else 1.0)
+
+    return [
+        f"{stack} {round(seconds * 1e6)}"
+        for stack, seconds in sorted(folded.items())
+        if round(seconds * 1e6) > 0
+    ]
+
+
+def profiled_request(get_response, request):
+    # The one root frame of a sync profile: get_response recurses through
+    # the middleware chain, so it can't be a root itself.
+    return get_response(request)
+
+
+class ProfilingMiddleware:
+    """cProfile requests on demand for staff, or a random PROFILE_SAMPLE_RATE.
+
+    Staff send `?profile=1` or `X-Profile: 1` and get the saved profile's id
+    in an `X-Profile-Id` header. Profiles go to a ring of the latest
+    PROFILE_MAX_FILES files in PROFILE_DIR; see the `profiles` command.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def get_reason(self, requested):
+        if requested:
+            return "requested"
+
+        if random.random() < settings.PROFILE_SAMPLE_RATE:
+            return "sampled"
+
+        return None
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        reason = self.get_reason(
+            is_profile_requested(request) and is_staff_request(request)
+        )
+        if reason is None:
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        response = profiler.runcall(profiled_request, self.get_response, request)
+
+        return self.finish(request, response, profiler, start, reason)
+
+    async def __acall__(self, request):
+        reason = self.get_reason(
+            is_profile_requested(request)
+            and await sync_to_async(is_staff_request)(request)
+        )
+
+        if reason is None:
+            return await self.get_response(request)
+
+        # Only the event loop thread is profiled: other requests served on
+        # it show up too, and code run in sync_to_async threads doesn't.
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            response = await self.get_response(request)
+        finally:
+            profiler.disable()
+
+        return self.finish(request, response, profiler, start, reason)
+
+    def finish(self, request, response, profiler, start, reason):
+        duration = time.perf_counter() - start
+        timing = current_timing.get()
+        view = timing.view if timing and timing.view else "unmatched"
+
+        profile_id = save_profile(
+            profiler, request, view.replace(SEPARATOR, "-"), duration, reason
+        )
+
+        if reason == "requested":
+            response["X-Profile-Id"] = profile_id
+
+        return response
@@ -0,0 +1,205 @@
+import decimal
+from functools import lru_cache
+
+from django.conf import settings
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings, ISO_8601
+
+
+class Unsupported(Exception):
+    pass
+
+
+def date_converter(field):
+    output_format = getattr(field, "format", api_settings.DATE_FORMAT)
+
+    if output_format is None or output_format.lower() != ISO_8601:
+        return field.to_representation
+
+    return lambda value: value.isoformat() if value else None
+
+
+def decimal_converter(field):
+    coerce_to_string = getattr(
+        field, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING
+    )
+
+    if not coerce_to_string or field.localize or field.decimal_places is None:
+        return field.to_representation
+
+    exponent = decimal.Decimal(".1") ** field.decimal_places
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+    rounding = field.rounding
+
+    return lambda value: "{:f}".format(
+        value.quantize(exponent, rounding=rounding, context=context)
+    )
+
+
+def choice_converter(field):
+    choices = field.choice_strings_to_values
+
+    return lambda value: value if value == "" else choices.get(str(value), value)
+
+
+def compile_fields(serializer, prefix=""):
+    """Turn the readable fields into (key, path, converter-or-steps) steps."""
+    steps = []
+
+    for field in serializer._readable_fields:
+        if field.source == "*":
+            raise Unsupported(field.field_name)
+
+        path = prefix + "__".join(field.source_attrs)
+
+        if isinstance(field, serializers.ListSerializer):
+            raise Unsupported(field.field_name)
+
+        if isinstance(field, serializers.ModelSerializer):
+            pk_name = field.Meta.model._meta.pk.name
+            steps.append(
+                (
+                    field.field_name,
+                    f"{path}__{pk_name}",
+                    compile_fields(field, prefix=f"{path}__"),
+                )
+            )
+            continue
+
+        if isinstance(field, serializers.PrimaryKeyRelatedField):
+            if field.pk_field is not None:
+                raise Unsupported(field.field_name)
+            converter = None
+        elif isinstance(field, (serializers.RelatedField, serializers.Serializer)):
+            raise Unsupported(field.field_name)
+        elif isinstance(field, serializers.SerializerMethodField):
+            raise Unsupported(field.field_name)
+        elif isinstance(field, serializers.IntegerField):
+            converter = int
+        elif isinstance(field, serializers.CharField):
+            converter = str
+        elif isinstance(field, serializers.ChoiceField):
+            converter = choice_converter(field)
+        elif isinstance(field, serializers.DecimalField):
+            converter = decimal_converter(field)
+        elif isinstance(field, serializers.DateField):
+            converter = date_converter(field)
+        else:
+            converter = field.to_representation
+
+        steps.append((field.field_name, path, converter))
+
+    return steps
+
+
+class ValuesSerializer:
+    """Serialize `.values()` rows exactly like `serializer_class` would.
+
+    Each readable field is compiled once into a values() path and a plain
+    converter, so a row costs a dict build instead of a DRF field walk.
+    Nested model serializers become joined paths, e.g. `book__title`.
+    """
+
+    def __init__(self, serializer_class):
+        self.steps = compile_fields(serializer_class())
+        self.paths = list(self.get_paths(self.steps))
+
+    def get_paths(self, steps):
+        for _, path, converter in steps:
+            yield path
+
+            if isinstance(converter, list):
+                yield from self.get_paths(converter)
+
+    def get_queryset(self, queryset, *extra_paths):
+        return queryset.values(*dict.fromkeys([*self.paths, *extra_paths]))
+
+    def to_representation(self, row, steps=None):
+        data = {}
+
+        for key, path, converter in self.steps if steps is None else steps:
+            value = row[path]
+
+            if value is None:
+                data[key] = None
+            elif converter is None:
+                data[key] = value
+            elif isinstance(converter, list):
+                data[key] = self.to_representation(row, converter)
+            else:
+                data[key] = converter(value)
+
+        return data
+
+    def serialize(self, rows):
+        return [self.to_representation(row) for row in rows]
+
+
+@lru_cache(maxsize=None)
+def get_values_serializer(serializer_class):
+    """Return a ValuesSerializer, or None if a field can't be compiled."""
+    try:
+        return ValuesSerializer(serializer_class)
+    except Unsupported:
+        return None
+
+
+class FastListMixin:
+    """Serialize list pages from `.values()` rows with a ValuesSerializer.
+
+    Falls back to the regular serializer when FAST_LIST_SERIALIZATION is
+    off or the serializer can't be compiled. `get_page_response` is the
+    hook for wrapping a page before it is serialized.
+    """
+
+    def get_values_serializer(self):
+        if not settings.FAST_LIST_SERIALIZATION:
+            return None
+
+        return get_values_serializer(self.get_serializer_class())
+
+    def get_values_fields(self, queryset):
+        """Fields selected besides the serializer's own."""
+        # The cursor paginator reads its position from the ordering fields.
+        ordering = [
+            field.lstrip("-")
+            for field in queryset.query.order_by
+            if isinstance(field, str)
+        ]
+
+        return (*ordering, queryset.model._meta.pk.name)
+
+    def get_list_queryset(self):
+        """Filtered queryset; `.values()` rows when the fast path applies."""
+        queryset = self.filter_queryset(self.get_queryset())
+        values_serializer = self.get_values_serializer()
+
+        if values_serializer is None:
+            return queryset
+
+        return values_serializer.get_queryset(
+            queryset, *self.get_values_fields(queryset)
+        )
+
+    def get_list_data(self, rows):
+        values_serializer = self.get_values_serializer()
+
+        if values_serializer is None:
+            return self.get_serializer(rows, many=True).data
+
+        return values_serializer.serialize(rows)
+
+    def get_page_response(self, request, page):
+        return self.get_paginated_response(self.get_list_data(page))
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.get_list_queryset()
+        page = self.paginate_queryset(queryset)
+
+        if page is None:
+            return Response(self.get_list_data(queryset))
+
+        return self.get_page_response(request, page)
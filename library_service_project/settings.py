@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 import os
+import tempfile
+from decimal import Decimal
 from datetime import timedelta
 from pathlib import Path
 from dotenv import load_dotenv
@@ -44,23 +46,73 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "drf_spectacular",
     "books",
     "users",
     "borrowing",
+    "reports",
+    "benchmarks",
+    "library_service_project",
 ]
 
 MIDDLEWARE = [
+    "library_service_project.timing.ServerTimingMiddleware",
+    "library_service_project.load_shedding.LoadSheddingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "library_service_project.profiling.ProfilingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# Shed load with 503 + Retry-After (library_service_project.load_shedding)
+# when this many requests are in flight in one process, or this many are
+# waiting for a pooled DB connection. 0 turns either check off.
+MAX_CONCURRENT_REQUESTS = int(os.environ.get("MAX_CONCURRENT_REQUESTS", 100))
+LOAD_SHED_POOL_WAITING = int(os.environ.get("LOAD_SHED_POOL_WAITING", 10))
+LOAD_SHED_RETRY_AFTER = int(os.environ.get("LOAD_SHED_RETRY_AFTER", 1))
+LOAD_SHED_EXEMPT_PATHS = ("/metrics", "/admin/")
+
+# Per-request query count, DB/app/render time (library_service_project.timing):
+# as a Server-Timing header, and as one JSON log line per request.
+SERVER_TIMING = os.environ.get("SERVER_TIMING", str(DEBUG)).lower() == "true"
+REQUEST_TIMING_LOG = os.environ.get("REQUEST_TIMING_LOG", "false").lower() == "true"
+# Warn when one statement runs this many times in a request.
+QUERY_REPEAT_WARNING = int(os.environ.get("QUERY_REPEAT_WARNING", 5))
+
+# cProfile requests (library_service_project.profiling): staff on demand with
+# `?profile=1` or `X-Profile: 1`, plus this fraction of all requests. The
+# latest PROFILE_MAX_FILES profiles are kept in PROFILE_DIR.
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 0))
+PROFILE_DIR = os.environ.get(
+    "PROFILE_DIR", os.path.join(tempfile.gettempdir(), "library-service-profiles")
+)
+PROFILE_MAX_FILES = int(os.environ.get("PROFILE_MAX_FILES", 100))
+
+# Each worker process writes its metrics to a file here, and /metrics sums
+# them. Empty means per-process metrics only. Clear the directory when the
+# service is restarted.
+METRICS_DIR = os.environ.get("METRICS_DIR", "")
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "library_service_project.timing": {
+            "handlers": ["console"],
+            "level": "INFO",
+        },
+    },
+}
+
 ROOT_URLCONF = "library_service_project.urls"
 
 TEMPLATES = [
@@ -81,6 +133,11 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "library_service_project.wsgi.application"
 
+# Serve GET list/retrieve of books and borrowings with native async views.
+# Enable under an ASGI server, e.g.
+# ASYNC_READ_VIEWS=true uvicorn library_service_project.asgi:application
+ASYNC_READ_VIEWS = os.environ.get("ASYNC_READ_VIEWS", "false").lower() == "true"
+
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
@@ -95,6 +152,57 @@ DATABASES = {
     }
 }
 
+# "none": connect on every request, "persistent": keep one health-checked
+# connection per worker thread (WSGI), "pool": share a bounded pool between
+# the threads of a process (ASGI).
+DB_POOL_MODE = os.environ.get("DB_POOL_MODE", "persistent")
+
+if DB_POOL_MODE == "persistent":
+    DATABASES["default"]["CONN_MAX_AGE"] = int(os.environ.get("DB_CONN_MAX_AGE", 600))
+    DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+elif DB_POOL_MODE == "pool":
+    DATABASES["default"]["ENGINE"] = "library_service_project.pooled_postgresql"
+    DATABASES["default"]["POOL"] = {
+        "MAX_SIZE": int(os.environ.get("DB_POOL_MAX_SIZE", 10)),
+        "TIMEOUT": float(os.environ.get("DB_POOL_TIMEOUT", 5)),
+        "IDLE_TIMEOUT": float(os.environ.get("DB_POOL_IDLE_TIMEOUT", 300)),
+        "MAX_LIFETIME": float(os.environ.get("DB_POOL_MAX_LIFETIME", 3600)),
+    }
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Book list/detail responses. Use the file backend (or any backend shared
+    # between workers) so catalog invalidations reach every process.
+    "catalog": {
+        "BACKEND": os.environ.get(
+            "CATALOG_CACHE_BACKEND",
+            "django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": os.environ.get("CATALOG_CACHE_LOCATION", "catalog"),
+        "TIMEOUT": int(os.environ.get("CATALOG_CACHE_TIMEOUT", 300)),
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.environ.get("CATALOG_CACHE_MAX_ENTRIES", 10000)),
+        },
+    },
+    # Throttle counters. Use a backend shared between replicas with atomic
+    # incr (Redis, Memcached) so limits hold across processes: the default
+    # counts per process, and `check --deploy` warns about it
+    # (throttling.W001).
+    "throttle": {
+        "BACKEND": os.environ.get(
+            "THROTTLE_CACHE_BACKEND",
+            "django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": os.environ.get("THROTTLE_CACHE_LOCATION", "throttle"),
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -140,11 +248,38 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
-    "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
-    ),
+    "DEFAULT_AUTHENTICATION_CLASSES": ("users.authentication.CachedJWTAuthentication",),
+    "DEFAULT_PAGINATION_CLASS": "library_service_project.pagination.IdCursorPagination",
+    "PAGE_SIZE": 20,
+    # Reverse proxies in front of the app. Throttles key on the client IP
+    # they appended to X-Forwarded-For; with 0 the header is ignored, so
+    # clients can't pick their own IP bucket by sending it.
+    "NUM_PROXIES": int(os.environ.get("NUM_PROXIES", 0)),
+    # "<throttle_scope>.<ip|user>" for library_service_project.throttling.
+    "DEFAULT_THROTTLE_RATES": {
+        "token.ip": os.environ.get("THROTTLE_TOKEN_IP", "30/min"),
+        "token.user": os.environ.get("THROTTLE_TOKEN_USER", "10/min"),
+        "checkout.ip": os.environ.get("THROTTLE_CHECKOUT_IP", "120/min"),
+        "checkout.user": os.environ.get("THROTTLE_CHECKOUT_USER", "30/min"),
+    },
 }
 
+MAX_PAGE_SIZE = 100
+
+# Serialize list pages from .values() rows with precompiled converters
+# instead of DRF field objects (same JSON, see library_service_project.serializers).
+FAST_LIST_SERIALIZATION = (
+    os.environ.get("FAST_LIST_SERIALIZATION", "true").lower() == "true"
+)
+
+BULK_BORROWING_MAX_BOOKS = 50
+
+# Fine per day late = book daily fee * FINE_MULTIPLIER.
+FINE_MULTIPLIER = Decimal(os.environ.get("FINE_MULTIPLIER", "1"))
+
+# How long a returned copy is held for the head of its waitlist.
+RESERVATION_CLAIM_HOURS = int(os.environ.get("RESERVATION_CLAIM_HOURS", 48))
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "Library Service API",
     "DESCRIPTION": "Management system for book borrowings",
@@ -162,4 +297,11 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60 * 60),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "ROTATE_REFRESH_TOKENS": False,
+    "TOKEN_OBTAIN_SERIALIZER": "users.serializers.UserTokenObtainPairSerializer",
+}
+
+# Users seen by CachedJWTAuthentication on read requests, kept per process.
+JWT_USER_CACHE = {
+    "MAX_SIZE": 10000,
+    "TTL": 60,
 }
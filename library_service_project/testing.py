@@ -0,0 +1,45 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+VIEWSET_ACTIONS = (
+    "list",
+    "retrieve",
+    "create",
+    "update",
+    "partial_update",
+    "destroy",
+)
+
+
+def get_viewset_actions(viewset):
+    """Standard and @action names a viewset serves."""
+    actions = {name for name in VIEWSET_ACTIONS if hasattr(viewset, name)}
+    return actions | {action.__name__ for action in viewset.get_extra_actions()}
+
+
+class QueryBudgetMixin:
+    """Assert that each view action stays within a fixed number of queries.
+
+    Subclasses declare `query_budgets`, action name -> queries allowed,
+    and send requests through `assertQueryBudget`. Seed more than one
+    row so an N+1 shows up as going over budget.
+    """
+
+    query_budgets = {}
+
+    def assertQueryBudget(self, action, send):
+        with CaptureQueriesContext(connection) as queries:
+            response = send()
+
+        budget = self.query_budgets[action]
+        self.assertLessEqual(
+            len(queries),
+            budget,
+            f"{action} ran {len(queries)} queries, budget is {budget}:\n"
+            + "\n".join(query["sql"] for query in queries),
+        )
+
+        return response
+
+    def assertBudgetsCover(self, viewset):
+        self.assertEqual(set(self.query_budgets), get_viewset_actions(viewset))
@@ -0,0 +1,745 @@
+import io
+import json
+import multiprocessing
+import os
+import pstats
+import shutil
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+
+import psycopg2
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import checks
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import (
+    AsyncRequestFactory,
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    override_settings,
+)
+from django.urls import reverse
+
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+
+from books.models import Book
+from books.serializers import BookListSerializer, BookSerializer
+from borrowing.metrics import CHECKOUTS
+from borrowing.models import Borrowing
+from borrowing.serializers import BorrowingReadSerializer
+
+from library_service_project.load_shedding import LoadSheddingMiddleware
+from library_service_project.metrics import (
+    CONTENT_TYPE,
+    REQUEST_LATENCY,
+    MetricStore,
+    read_entries,
+    render_metrics,
+)
+from library_service_project.pooled_postgresql.base import DatabaseWrapper
+from library_service_project.pooled_postgresql.pool import ConnectionPool, PoolTimeout
+from library_service_project.profiling import get_profile_paths, parse_profile_path
+from library_service_project.serializers import get_values_serializer
+from library_service_project.throttling import IPThrottle
+from library_service_project.timing import ServerTimingMiddleware
+
+DB_POOL_URL = reverse("db-pool")
+BOOKS_URL = reverse("books:book-list")
+BORROWING_URL = reverse("borrowing:borrowing-list")
+METRICS_URL = reverse("metrics")
+
+
+def connect():
+    return psycopg2.connect(**connection.get_connection_params())
+
+
+def sample_pool(**params):
+    defaults = {
+        "max_size": 2,
+        "timeout": 1,
+        "idle_timeout": 60,
+        "max_lifetime": 600,
+    }
+    defaults.update(params)
+
+    return ConnectionPool(**defaults)
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def test_connection_is_reused(self):
+        pool = sample_pool()
+        conn = pool.getconn(connect)
+        pool.putconn(conn)
+
+        self.assertIs(pool.getconn(connect), conn)
+        self.assertEqual(pool.stats()["size"], 1)
+        pool.putconn(conn)
+        pool.close()
+
+    def test_checkout_times_out_when_pool_is_exhausted(self):
+        pool = sample_pool(max_size=1, timeout=0.1)
+        conn = pool.getconn(connect)
+
+        with self.assertRaises(PoolTimeout):
+            pool.getconn(connect)
+
+        self.assertEqual(pool.stats()["timeouts"], 1)
+        pool.putconn(conn)
+        pool.close()
+
+    def test_waiter_gets_returned_connection(self):
+        pool = sample_pool(max_size=1, timeout=5)
+        conn = pool.getconn(connect)
+        result = {}
+
+        def wait_for_connection():
+            result["conn"] = pool.getconn(connect)
+
+        waiter = threading.Thread(target=wait_for_connection)
+        waiter.start()
+        time.sleep(0.05)
+        pool.putconn(conn)
+        waiter.join()
+
+        self.assertIs(result["conn"], conn)
+        self.assertGreater(pool.stats()["wait_time_total"], 0)
+        pool.putconn(conn)
+        pool.close()
+
+    def test_idle_connection_expires(self):
+        pool = sample_pool(idle_timeout=0)
+        conn = pool.getconn(connect)
+        pool.putconn(conn)
+        time.sleep(0.01)
+
+        new_conn = pool.getconn(connect)
+
+        self.assertIsNot(new_conn, conn)
+        self.assertTrue(conn.closed)
+        pool.putconn(new_conn)
+        pool.close()
+
+    def test_open_transaction_is_rolled_back_on_return(self):
+        pool = sample_pool()
+        conn = pool.getconn(connect)
+        conn.cursor().execute("SELECT 1")
+        pool.putconn(conn)
+
+        self.assertEqual(
+            conn.info.transaction_status, psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        )
+        pool.close()
+
+
+class PooledDatabaseWrapperTests(TestCase):
+    def test_closing_returns_connection_to_pool(self):
+        settings_dict = {**connection.settings_dict, "POOL": {"MAX_SIZE": 1}}
+        wrapper = DatabaseWrapper(settings_dict)
+
+        wrapper.ensure_connection()
+        raw_connection = wrapper.connection
+        wrapper.close()
+        wrapper.ensure_connection()
+
+        self.assertIs(wrapper.connection, raw_connection)
+        wrapper.close()
+        wrapper.pool.close()
+
+
+class DatabasePoolViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_pool_stats_require_admin(self):
+        user = get_user_model().objects.create_user("user@test.com", "password")
+        self.client.force_authenticate(user)
+
+        res = self.client.get(DB_POOL_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_pool_stats(self):
+        admin = get_user_model().objects.create_user(
+            "admin@test.com", "password", is_staff=True
+        )
+        self.client.force_authenticate(admin)
+
+        res = self.client.get(DB_POOL_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn("mode", res.data)
+        self.assertIsInstance(res.data["pools"], list)
+
+
+class ServerTimingMiddlewareTests(TestCase):
+    def setUp(self):
+        caches["catalog"].clear()
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user("user@test.com", "password")
+        )
+        Book.objects.create(
+            title="Test book",
+            author="Test author",
+            cover="SOFT",
+            inventory=2,
+            daily_fee=4,
+        )
+
+    @override_settings(SERVER_TIMING=True)
+    def test_server_timing_header(self):
+        res = self.client.get(BOOKS_URL)
+
+        metrics = dict(
+            metric.split(";", 1) for metric in res["Server-Timing"].split(", ")
+        )
+        self.assertEqual(list(metrics), ["db", "app", "render", "total"])
+        self.assertIn('desc="1 queries"', metrics["db"])
+
+    @override_settings(SERVER_TIMING=False)
+    def test_server_timing_disabled(self):
+        res = self.client.get(BOOKS_URL)
+
+        self.assertFalse(res.has_header("Server-Timing"))
+
+    @override_settings(REQUEST_TIMING_LOG=True)
+    def test_request_log_line(self):
+        with self.assertLogs("library_service_project.timing", "INFO") as logs:
+            self.client.get(BOOKS_URL)
+
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line["view"], "BookViewSet.list")
+        self.assertEqual(line["status"], 200)
+        self.assertEqual(line["queries"], 1)
+        self.assertGreaterEqual(line["total_ms"], line["db_ms"])
+
+    @override_settings(QUERY_REPEAT_WARNING=3, SERVER_TIMING=True)
+    def test_repeated_query_warning(self):
+        def get_response(request):
+            book = Book.objects.first()
+            for _ in range(3):
+                Book.objects.filter(id=book.id).exists()
+            return HttpResponse()
+
+        middleware = ServerTimingMiddleware(get_response)
+
+        with self.assertLogs("library_service_project.timing", "WARNING") as logs:
+            res = middleware(RequestFactory().get("/"))
+
+        self.assertIn("same query 3 times", logs.output[0])
+        self.assertIn('desc="4 queries"', res["Server-Timing"])
+
+    @override_settings(SERVER_TIMING=True)
+    def test_counts_queries_of_async_views(self):
+        async def get_response(request):
+            await Book.objects.afirst()
+            await sync_to_async(Book.objects.count)()
+            return HttpResponse()
+
+        middleware = ServerTimingMiddleware(get_response)
+        res = async_to_sync(middleware)(AsyncRequestFactory().get("/"))
+
+        self.assertIn('desc="2 queries"', res["Server-Timing"])
+
+
+def count_in_child(directory, amount):
+    with override_settings(METRICS_DIR=directory):
+        CHECKOUTS.inc(amount)
+
+
+class MetricStoreTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_values_survive_reopening_and_growth(self):
+        store = MetricStore(self.directory)
+        for i in range(5000):
+            store.inc(f"key-{i}", i)
+        store.inc("key-1", 0.5)
+
+        reopened = MetricStore(self.directory)
+        reopened.inc("key-2")
+        values = {key: value for key, value, _ in read_entries(reopened.read())}
+
+        self.assertGreater(len(reopened.map), MetricStore.initial_size)
+        self.assertEqual(len(values), 5000)
+        self.assertEqual(values["key-1"], 1.5)
+        self.assertEqual(values["key-2"], 3.0)
+        self.assertEqual(values["key-4999"], 4999.0)
+
+    def test_metrics_add_up_across_processes(self):
+        with override_settings(METRICS_DIR=self.directory):
+            CHECKOUTS.inc(2)
+            children = [
+                multiprocessing.get_context("fork").Process(
+                    target=count_in_child, args=(self.directory, amount)
+                )
+                for amount in (3, 5)
+            ]
+            for child in children:
+                child.start()
+            for child in children:
+                child.join()
+
+            self.assertEqual(len(os.listdir(self.directory)), 3)
+            self.assertIn("borrowings_checked_out_total 10.0", render_metrics())
+
+
+class MetricsViewTests(TestCase):
+    def setUp(self):
+        caches["catalog"].clear()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        overrides = override_settings(METRICS_DIR=directory)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user("user@test.com", "password")
+        self.client.force_authenticate(self.user)
+        self.book = Book.objects.create(
+            title="Test book",
+            author="Test author",
+            cover="SOFT",
+            inventory=2,
+            daily_fee=4,
+        )
+
+    def get_metrics(self):
+        res = APIClient().get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], CONTENT_TYPE)
+        return res.content.decode().splitlines()
+
+    def test_request_latency_by_view_and_action(self):
+        self.client.get(BOOKS_URL)
+        self.client.get(BOOKS_URL)
+        self.client.get(reverse("books:book-detail", args=[self.book.id]))
+
+        lines = self.get_metrics()
+
+        self.assertIn("# TYPE http_request_duration_seconds histogram", lines)
+        self.assertIn(
+            'http_request_duration_seconds_bucket{view="BookViewSet",'
+            'action="list",le="+Inf"} 2.0',
+            lines,
+        )
+        self.assertIn(
+            'http_request_duration_seconds_count{view="BookViewSet",'
+            'action="retrieve"} 1.0',
+            lines,
+        )
+        self.assertIn(
+            'http_requests_total{view="BookViewSet",action="list",status="200"} 2.0',
+            lines,
+        )
+        self.assertIn('db_queries_total{view="BookViewSet",action="list"} 1.0', lines)
+        self.assertIn('cache_requests_total{cache="catalog",result="hit"} 1.0', lines)
+        self.assertIn('cache_requests_total{cache="catalog",result="miss"} 2.0', lines)
+
+    def test_buckets_are_cumulative(self):
+        REQUEST_LATENCY.observe(0.02, view="View", action="get")
+        REQUEST_LATENCY.observe(0.3, view="View", action="get")
+
+        lines = self.get_metrics()
+
+        for bound, count in (("0.01", 0), ("0.025", 1), ("0.25", 1), ("0.5", 2)):
+            self.assertIn(
+                f'http_request_duration_seconds_bucket{{view="View",action="get",'
+                f'le="{bound}"}} {count:.1f}',
+                lines,
+            )
+        self.assertIn(
+            'http_request_duration_seconds_sum{view="View",action="get"} 0.32',
+            lines,
+        )
+
+    def test_checkout_and_return_counters(self):
+        admin = get_user_model().objects.create_superuser("admin@test.com", "pw")
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(
+                BORROWING_URL,
+                {
+                    "book": self.book.id,
+                    "expected_return_date": date.today() + timedelta(days=3),
+                },
+            )
+        self.client.force_authenticate(admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("borrowing:borrowing-return-borrowing", args=[res.data["id"]])
+            )
+
+        lines = self.get_metrics()
+
+        self.assertIn("borrowings_checked_out_total 1.0", lines)
+        self.assertIn("borrowings_returned_total 1.0", lines)
+
+    def test_unmatched_urls_share_a_label(self):
+        self.client.get("/no-such-page/")
+
+        self.assertIn(
+            'http_requests_total{view="unmatched",action="",status="404"} 1.0',
+            self.get_metrics(),
+        )
+
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        caches["catalog"].clear()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        overrides = override_settings(PROFILE_DIR=directory, PROFILE_SAMPLE_RATE=0)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        self.client = APIClient()
+        self.staff = get_user_model().objects.create_user(
+            "staff@test.com", "password", is_staff=True
+        )
+        self.user = get_user_model().objects.create_user("user@test.com", "password")
+        Book.objects.create(
+            title="Test book",
+            author="Test author",
+            cover="SOFT",
+            inventory=2,
+            daily_fee=4,
+        )
+
+    def authenticate(self, user):
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}"
+        )
+
+    def test_staff_profile_on_demand(self):
+        self.authenticate(self.staff)
+
+        res = self.client.get(BOOKS_URL, {"profile": 1})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        [profile] = map(parse_profile_path, get_profile_paths())
+        self.assertEqual(res["X-Profile-Id"], profile["id"])
+        self.assertEqual(profile["view"], "BookViewSet.list")
+        self.assertEqual(profile["reason"], "requested")
+
+        res = self.client.get(reverse("profile", args=[profile["id"]]))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        with tempfile.NamedTemporaryFile() as file:
+            file.write(res.content)
+            file.flush()
+            functions = {name for _, _, name in pstats.Stats(file.name).stats}
+        self.assertIn("list", functions)
+
+    def test_profile_header_and_collapsed_stacks(self):
+        self.authenticate(self.staff)
+
+        res = self.client.get(BOOKS_URL, HTTP_X_PROFILE="1")
+        res = self.client.get(
+            reverse("profile", args=[res["X-Profile-Id"]]), {"output": "collapsed"}
+        )
+
+        lines = res.content.decode().splitlines()
+        self.assertTrue(lines)
+        for line in lines:
+            stack, _, microseconds = line.rpartition(" ")
+            self.assertGreater(int(microseconds), 0)
+        self.assertTrue(any(";list (" in line for line in lines))
+
+    def test_session_staff_can_profile(self):
+        self.client.force_login(self.staff)
+
+        res = self.client.get(reverse("db-pool"), {"profile": 1})
+
+        self.assertTrue(res.has_header("X-Profile-Id"))
+
+    def test_non_staff_requests_are_not_profiled(self):
+        self.authenticate(self.user)
+
+        res = self.client.get(BOOKS_URL, {"profile": 1})
+
+        self.assertFalse(res.has_header("X-Profile-Id"))
+        self.assertEqual(get_profile_paths(), [])
+        self.assertEqual(
+            self.client.get(reverse("profile", args=["1-1"])).status_code,
+            status.HTTP_403_FORBIDDEN,
+        )
+
+    def test_unknown_profile(self):
+        self.authenticate(self.staff)
+
+        for profile_id in ("1-1", "..-1"):
+            res = self.client.get(reverse("profile", args=[profile_id]))
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(PROFILE_SAMPLE_RATE=1, PROFILE_MAX_FILES=2)
+    def test_sampled_profiles_are_kept_in_a_ring(self):
+        self.authenticate(self.user)
+
+        for _ in range(3):
+            res = self.client.get(BOOKS_URL)
+            self.assertFalse(res.has_header("X-Profile-Id"))
+
+        profiles = list(map(parse_profile_path, get_profile_paths()))
+        self.assertEqual(len(profiles), 2)
+        self.assertEqual({profile["reason"] for profile in profiles}, {"sampled"})
+
+    @override_settings(PROFILE_SAMPLE_RATE=1)
+    def test_profiles_command(self):
+        self.authenticate(self.user)
+        self.client.get(BOOKS_URL)
+        self.client.get(reverse("books:book-detail", args=[1]))
+        merged = os.path.join(tempfile.mkdtemp(), "merged.prof")
+        self.addCleanup(shutil.rmtree, os.path.dirname(merged))
+
+        out = io.StringIO()
+        call_command("profiles", stdout=out)
+        listed = out.getvalue().splitlines()
+
+        self.assertEqual(len(listed), 2)
+        self.assertIn("BookViewSet.list", listed[0])
+
+        call_command("profiles", "--merge", "--output", merged, stderr=io.StringIO())
+        functions = {name for _, _, name in pstats.Stats(merged).stats}
+        self.assertTrue({"list", "retrieve"} <= functions)
+
+        out = io.StringIO()
+        call_command(
+            "profiles",
+            "--merge",
+            "--view",
+            "BookViewSet.retrieve",
+            stdout=out,
+            stderr=io.StringIO(),
+        )
+        self.assertIn("function calls", out.getvalue())
+
+
+class SlidingWindowThrottleTests(SimpleTestCase):
+    def setUp(self):
+        caches["throttle"].clear()
+        self.now = 0.0
+        self.view = type("View", (), {"throttle_scope": "test"})()
+
+    def allow(self, address="10.0.0.1"):
+        request = Request(RequestFactory().get("/", REMOTE_ADDR=address))
+        throttle = IPThrottle()
+        throttle.timer = lambda: self.now
+
+        return throttle.allow_request(request, self.view), throttle
+
+    @override_settings(
+        REST_FRAMEWORK={
+            **settings.REST_FRAMEWORK,
+            "DEFAULT_THROTTLE_RATES": {"test.ip": "10/min"},
+        }
+    )
+    def test_previous_window_is_weighted(self):
+        self.now = 6000.0
+        for _ in range(10):
+            self.assertTrue(self.allow()[0])
+
+        allowed, throttle = self.allow()
+        self.assertFalse(allowed)
+        self.assertEqual(throttle.wait(), 60)
+        self.assertTrue(self.allow("10.0.0.2")[0])
+
+        # Halfway through the next window half the previous count remains.
+        self.now = 6090.0
+        for _ in range(5):
+            self.assertTrue(self.allow()[0])
+
+        allowed, throttle = self.allow()
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(throttle.wait(), 6)
+
+    def test_scope_without_rate_is_not_throttled(self):
+        for _ in range(100):
+            self.assertTrue(self.allow()[0])
+
+    def test_per_process_cache_warned_on_deploy(self):
+        local = {
+            **settings.CACHES,
+            "throttle": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        }
+        shared = {
+            **settings.CACHES,
+            "throttle": {
+                "BACKEND": "django.core.cache.backends.redis.RedisCache",
+                "LOCATION": "redis://localhost:6379",
+            },
+        }
+
+        def warnings(**kwargs):
+            return [
+                message.id
+                for message in checks.run_checks(tags=[checks.Tags.caches], **kwargs)
+                if message.id == "throttling.W001"
+            ]
+
+        with self.settings(CACHES=local):
+            self.assertEqual(warnings(), [])
+            self.assertEqual(
+                warnings(include_deployment_checks=True), ["throttling.W001"]
+            )
+
+        with self.settings(CACHES=shared):
+            self.assertEqual(warnings(include_deployment_checks=True), [])
+
+
+class LoadSheddingMiddlewareTests(SimpleTestCase):
+    def call(self, middleware, path="/api/books/"):
+        return middleware(RequestFactory().get(path))
+
+    @override_settings(MAX_CONCURRENT_REQUESTS=1, LOAD_SHED_RETRY_AFTER=3)
+    def test_sheds_beyond_concurrency_limit(self):
+        inner = []
+
+        def get_response(request):
+            if request.path == "/api/books/":
+                inner.append(self.call(middleware, "/api/users/me/"))
+                inner.append(self.call(middleware, "/metrics"))
+            return HttpResponse()
+
+        middleware = LoadSheddingMiddleware(get_response)
+
+        self.assertEqual(self.call(middleware).status_code, 200)
+        self.assertEqual(inner[0].status_code, 503)
+        self.assertEqual(inner[0]["Retry-After"], "3")
+        self.assertEqual(inner[1].status_code, 200)
+        # The slot is released afterwards.
+        self.assertEqual(middleware.active, 0)
+
+    @override_settings(LOAD_SHED_POOL_WAITING=2, METRICS_DIR="")
+    def test_sheds_when_db_pool_is_saturated(self):
+        middleware = LoadSheddingMiddleware(lambda request: HttpResponse())
+        pool = sample_pool()
+
+        with mock.patch(
+            "library_service_project.load_shedding.get_pools",
+            return_value={("default", "db", "", ""): pool},
+        ):
+            self.assertEqual(self.call(middleware).status_code, 200)
+
+            pool._waiting = 2
+            res = self.call(middleware)
+
+        self.assertEqual(res.status_code, 503)
+        self.assertIn("overloaded", json.loads(res.content)["detail"])
+        self.assertIn('http_requests_shed_total{reason="db_pool"}', render_metrics())
+
+    @override_settings(MAX_CONCURRENT_REQUESTS=1)
+    def test_async_requests_hold_a_slot(self):
+        async def get_response(request):
+            return await middleware(AsyncRequestFactory().get("/"))
+
+        middleware = LoadSheddingMiddleware(get_response)
+        res = async_to_sync(middleware)(AsyncRequestFactory().get("/"))
+
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(middleware.active, 0)
+
+
+class ValuesSerializerParityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user("user@test.com", "password")
+        cls.admin = get_user_model().objects.create_user(
+            "admin@test.com", "password", is_staff=True
+        )
+
+        for i, fee in enumerate(
+            (Decimal("0"), Decimal("0.5"), Decimal("4.10"), Decimal("9999.99"))
+        ):
+            book = Book.objects.create(
+                title=f"Dune {i}",
+                author="Frank Herbert" if i % 2 else "Ursula Le Guin",
+                cover="HARD" if i % 2 else "SOFT",
+                inventory=i,
+                daily_fee=fee,
+            )
+            Borrowing.objects.create(
+                book=book,
+                user=cls.user if i % 2 else cls.admin,
+                expected_return_date=date.today() + timedelta(days=i + 1),
+                actual_return_date=date.today() if i % 3 else None,
+            )
+
+    def setUp(self):
+        caches["catalog"].clear()
+        self.client = APIClient()
+
+    def assertSameBytes(self, serializer_class, queryset):
+        values_serializer = get_values_serializer(serializer_class)
+        rows = values_serializer.get_queryset(queryset)
+
+        self.assertEqual(
+            JSONRenderer().render(values_serializer.serialize(rows)),
+            JSONRenderer().render(serializer_class(queryset, many=True).data),
+        )
+
+    def test_book_serializers(self):
+        self.assertSameBytes(BookListSerializer, Book.objects.order_by("id"))
+        self.assertSameBytes(BookSerializer, Book.objects.order_by("id"))
+
+    def test_borrowing_serializer(self):
+        self.assertSameBytes(BorrowingReadSerializer, Borrowing.objects.all())
+
+    def test_unsupported_serializer(self):
+        class BookTitleSerializer(serializers.ModelSerializer):
+            upper_title = serializers.SerializerMethodField()
+
+            class Meta:
+                model = Book
+                fields = ("id", "upper_title")
+
+            def get_upper_title(self, obj):
+                return obj.title.upper()
+
+        self.assertIsNone(get_values_serializer(BookTitleSerializer))
+
+    def assertSameResponses(self, url, params=None):
+        with override_settings(FAST_LIST_SERIALIZATION=False):
+            expected = self.client.get(url, params)
+
+        caches["catalog"].clear()
+        res = self.client.get(url, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.content, expected.content)
+        self.assertEqual(res["ETag"], expected["ETag"])
+
+    def test_book_list(self):
+        for params in (
+            None,
+            {"page_size": 2},
+            {"search": "dune herbert"},
+            {"ordering": "-daily_fee", "page_size": 3},
+            {"cover": "HARD", "in_stock": "true"},
+        ):
+            self.assertSameResponses(BOOKS_URL, params)
+
+    def test_borrowing_list(self):
+        self.client.force_authenticate(self.admin)
+
+        for params in (None, {"is_active": "true"}, {"page_size": 1}):
+            self.assertSameResponses(BORROWING_URL, params)
+
+        self.client.force_authenticate(self.user)
+        self.assertSameResponses(BORROWING_URL)
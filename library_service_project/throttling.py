@@ -0,0 +1,108 @@
+import hashlib
+import math
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+THROTTLE_CACHE = "throttle"
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """Rate limit a view's `throttle_scope` with a sliding window counter.
+
+    Requests are counted with atomic `add`/`incr` calls on the shared
+    throttle cache, one counter per fixed window. The current window's
+    count plus the previous one's, weighted by how much of it still
+    overlaps the sliding window, is checked against the rate, so bursts at
+    a window boundary can't double it. Rates are looked up as
+    "<throttle_scope>.<kind>" in DEFAULT_THROTTLE_RATES; a scope without a
+    rate isn't throttled. Refused requests don't use up the budget.
+    """
+
+    kind = None
+    cache_format = "throttle:%(scope)s:%(ident)s"
+
+    def __init__(self):
+        # The scope comes from the view, in allow_request.
+        self.cache = caches[THROTTLE_CACHE]
+
+    def get_ident_key(self, request, view):
+        """The client IP; None skips the throttle for this request."""
+        return self.get_ident(request)
+
+    def get_cache_key(self, request, view):
+        ident = self.get_ident_key(request, view)
+        if ident is None:
+            return None
+
+        return self.cache_format % {"scope": self.scope, "ident": ident}
+
+    def allow_request(self, request, view):
+        scope = getattr(view, "throttle_scope", None)
+        self.scope = f"{scope}.{self.kind}"
+        self.rate = api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+        if scope is None or self.rate is None:
+            return True
+
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        now = self.timer() / self.duration
+        window = math.floor(now)
+        self.elapsed = now - window
+        current_key = f"{self.key}:{window}"
+
+        self.previous = self.cache.get(f"{self.key}:{window - 1}", 0)
+        self.cache.add(current_key, 0, timeout=self.duration * 2)
+        try:
+            self.current = self.cache.incr(current_key)
+        except ValueError:
+            # Evicted between add() and incr().
+            self.cache.set(current_key, 1, timeout=self.duration * 2)
+            self.current = 1
+
+        if self.previous * (1 - self.elapsed) + self.current <= self.num_requests:
+            return True
+
+        try:
+            self.cache.decr(current_key)
+        except ValueError:
+            pass
+        self.current -= 1
+
+        return False
+
+    def wait(self):
+        """Seconds until the weighted count leaves room for one more request."""
+        if self.current >= self.num_requests or not self.previous:
+            return (1 - self.elapsed) * self.duration
+
+        room = (self.num_requests - self.current - 1) / self.previous
+        return max(1 - room - self.elapsed, 0) * self.duration
+
+
+class IPThrottle(SlidingWindowThrottle):
+    kind = "ip"
+
+
+class UserThrottle(SlidingWindowThrottle):
+    """Per user; anonymous requests are keyed by the account they log in to."""
+
+    kind = "user"
+
+    def get_ident_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return request.user.pk
+
+        data = request.data if isinstance(request.data, dict) else {}
+        username = data.get(get_user_model().USERNAME_FIELD)
+        if not isinstance(username, str) or not username:
+            return None
+
+        return hashlib.md5(username.strip().lower().encode()).hexdigest()
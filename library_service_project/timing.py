@@ -0,0 +1,206 @@
+import contextvars
+import json
+import logging
+import time
+from collections import Counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from library_service_project.metrics import record_request
+
+logger = logging.getLogger(__name__)
+
+# The RequestTiming of the request being served. sync_to_async copies the
+# context, so queries run on ORM threads are counted too.
+current_timing = contextvars.ContextVar("current_timing", default=None)
+
+
+class RequestTiming:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.view_name = None
+        self.action = None
+        self.view_start = None
+        self.view_end = None
+        self.render_start = None
+        self.render_end = None
+        self.queries = 0
+        self.db = 0.0
+        self.statements = Counter()
+
+    @property
+    def view(self):
+        if self.view_name is None:
+            return None
+
+        return f"{self.view_name}.{self.action}"
+
+    def get_durations(self):
+        """Milliseconds spent in the database, the view's own code, rendering."""
+        end = time.perf_counter()
+        view_start = self.view_start or self.start
+        view_end = self.view_end or end
+        render = 0.0
+
+        if self.render_start is not None and self.render_end is not None:
+            render = self.render_end - self.render_start
+
+        return {
+            "db": self.db * 1000,
+            # Mostly serialization for DRF views.
+            "app": max(view_end - view_start - self.db, 0.0) * 1000,
+            "render": render * 1000,
+            "total": (end - self.start) * 1000,
+        }
+
+
+def time_query(execute, sql, params, many, context):
+    timing = current_timing.get()
+
+    if timing is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timing.db += time.perf_counter() - start
+        timing.queries += 1
+        timing.statements[sql] += 1
+
+
+def install_query_timer(connection, **kwargs):
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+def format_server_timing(timing, durations):
+    return ", ".join(
+        [
+            f'db;dur={durations["db"]:.2f};desc="{timing.queries} queries"',
+            f'app;dur={durations["app"]:.2f}',
+            f'render;dur={durations["render"]:.2f}',
+            f'total;dur={durations["total"]:.2f}',
+        ]
+    )
+
+
+class ServerTimingMiddleware:
+    """Time each request's queries, view code and rendering.
+
+    Adds a `Server-Timing` header when SERVER_TIMING is on, logs one JSON
+    line per request when REQUEST_TIMING_LOG is on, and warns when one
+    statement runs QUERY_REPEAT_WARNING times or more in a request, the
+    usual shape of an N+1. Every request is also recorded in the metrics
+    served at /metrics.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+        connection_created.connect(install_query_timer)
+        for connection in connections.all(initialized_only=True):
+            install_query_timer(connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        timing = RequestTiming()
+        token = current_timing.set(timing)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timing.reset(token)
+
+        return self.finish(request, response, timing)
+
+    async def __acall__(self, request):
+        timing = RequestTiming()
+        token = current_timing.set(timing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timing.reset(token)
+
+        return self.finish(request, response, timing)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timing = current_timing.get()
+        if timing is None:
+            return None
+
+        view_class = getattr(view_func, "cls", view_func)
+        actions = getattr(view_func, "actions", None) or {}
+        timing.view_name = view_class.__name__
+        timing.action = actions.get(request.method.lower(), request.method.lower())
+        timing.view_start = time.perf_counter()
+
+        return None
+
+    def process_template_response(self, request, response):
+        timing = current_timing.get()
+        if timing is None:
+            return response
+
+        timing.view_end = timing.render_start = time.perf_counter()
+
+        def rendered(response):
+            timing.render_end = time.perf_counter()
+
+        response.add_post_render_callback(rendered)
+
+        return response
+
+    def finish(self, request, response, timing):
+        durations = timing.get_durations()
+
+        # Unresolved URLs share one label so scanners can't add series.
+        record_request(
+            timing.view_name or "unmatched",
+            timing.action or "",
+            response.status_code,
+            durations["total"] / 1000,
+            timing.queries,
+        )
+
+        if settings.SERVER_TIMING:
+            response["Server-Timing"] = format_server_timing(timing, durations)
+
+        if settings.REQUEST_TIMING_LOG:
+            logger.info(
+                json.dumps(
+                    {
+                        "method": request.method,
+                        "path": request.path,
+                        "view": timing.view,
+                        "status": response.status_code,
+                        "queries": timing.queries,
+                        **{
+                            f"{name}_ms": round(duration, 2)
+                            for name, duration in durations.items()
+                        },
+                    }
+                )
+            )
+
+        if timing.statements:
+            sql, count = timing.statements.most_common(1)[0]
+
+            if count >= settings.QUERY_REPEAT_WARNING:
+                logger.warning(
+                    "%s ran the same query %d times (possible N+1): %s",
+                    timing.view or request.path,
+                    count,
+                    sql,
+                )
+
+        return response
@@ -22,11 +22,17 @@ from drf_spectacular.views import (
     SpectacularRedocView,
 )
 
+from library_service_project.views import DatabasePoolView, ProfileView, metrics
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/books/", include("books.urls", namespace="books")),
     path("api/users/", include("users.urls", namespace="users")),
     path("api/borrowings/", include("borrowing.urls", namespace="borrowing")),
+    path("api/reports/", include("reports.urls", namespace="reports")),
+    path("api/db-pool/", DatabasePoolView.as_view(), name="db-pool"),
+    path("api/profiles/<str:profile_id>/", ProfileView.as_view(), name="profile"),
+    path("metrics", metrics, name="metrics"),
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
     path(
         "api/doc/swagger/",
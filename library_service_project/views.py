@@ -0,0 +1,57 @@
+import pstats
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from library_service_project.metrics import CONTENT_TYPE, render_metrics
+from library_service_project.pooled_postgresql.base import get_pools
+from library_service_project.profiling import collapse_stats, get_profile_path
+
+
+@extend_schema(tags=["Monitoring"], responses=OpenApiTypes.OBJECT)
+class DatabasePoolView(APIView):
+    """Connection pool wait time and utilization for this worker process."""
+
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        pools = [
+            {"alias": alias, "database": name, **pool.stats()}
+            for (alias, name, _, _), pool in get_pools().items()
+        ]
+
+        return Response({"mode": settings.DB_POOL_MODE, "pools": pools})
+
+
+@extend_schema(tags=["Monitoring"], responses={(200, "*/*"): OpenApiTypes.BINARY})
+class ProfileView(APIView):
+    """A saved request profile, as a pstats file or `?output=collapsed` stacks."""
+
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request, profile_id):
+        path = get_profile_path(profile_id)
+        if path is None:
+            raise Http404
+
+        if request.query_params.get("output") == "collapsed":
+            lines = collapse_stats(pstats.Stats(path).stats)
+            return HttpResponse("\n".join(lines) + "\n", content_type="text/plain")
+
+        with open(path, "rb") as file:
+            response = HttpResponse(
+                file.read(), content_type="application/octet-stream"
+            )
+
+        response["Content-Disposition"] = f'attachment; filename="{profile_id}.prof"'
+        return response
+
+
+def metrics(request):
+    """Every worker's metrics in the Prometheus text format."""
+    return HttpResponse(render_metrics(), content_type=CONTENT_TYPE)
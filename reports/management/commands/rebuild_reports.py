@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from reports.services import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild the report rollup tables from all borrowings"
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        rebuild_stats()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt reports in {time.perf_counter() - start:.2f}s")
+        )
@@ -0,0 +1,102 @@
+# Generated by Django 4.2.1 on 2026-10-18 03:57
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = [
+        ("users", "0001_initial"),
+        ("books", "0004_book_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyStats",
+            fields=[
+                ("borrowed", models.PositiveIntegerField(default=0)),
+                ("returned", models.PositiveIntegerField(default=0)),
+                ("returned_late", models.PositiveIntegerField(default=0)),
+                ("loan_days", models.PositiveBigIntegerField(default=0)),
+                ("day", models.DateField(primary_key=True, serialize=False)),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="UserStats",
+            fields=[
+                ("borrowed", models.PositiveIntegerField(default=0)),
+                ("returned", models.PositiveIntegerField(default=0)),
+                ("returned_late", models.PositiveIntegerField(default=0)),
+                ("loan_days", models.PositiveBigIntegerField(default=0)),
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="+",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["-borrowed", "user"], name="reports_user_top_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="BookStats",
+            fields=[
+                ("borrowed", models.PositiveIntegerField(default=0)),
+                ("returned", models.PositiveIntegerField(default=0)),
+                ("returned_late", models.PositiveIntegerField(default=0)),
+                ("loan_days", models.PositiveBigIntegerField(default=0)),
+                (
+                    "book",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="+",
+                        serialize=False,
+                        to="books.book",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["-borrowed", "book"], name="reports_book_top_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="AuthorStats",
+            fields=[
+                ("borrowed", models.PositiveIntegerField(default=0)),
+                ("returned", models.PositiveIntegerField(default=0)),
+                ("returned_late", models.PositiveIntegerField(default=0)),
+                ("loan_days", models.PositiveBigIntegerField(default=0)),
+                (
+                    "author",
+                    models.CharField(max_length=255, primary_key=True, serialize=False),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["-borrowed", "author"], name="reports_author_top_idx"
+                    )
+                ],
+            },
+        ),
+    ]
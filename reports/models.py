@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.db import models
+
+from books.models import Book
+
+
+class BorrowingStats(models.Model):
+    borrowed = models.PositiveIntegerField(default=0)
+    returned = models.PositiveIntegerField(default=0)
+    returned_late = models.PositiveIntegerField(default=0)
+    loan_days = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def average_loan_days(self):
+        return self.loan_days / self.returned if self.returned else None
+
+    @property
+    def late_return_rate(self):
+        return self.returned_late / self.returned if self.returned else None
+
+
+class DailyStats(BorrowingStats):
+    day = models.DateField(primary_key=True)
+
+
+class BookStats(BorrowingStats):
+    book = models.OneToOneField(
+        Book, on_delete=models.CASCADE, primary_key=True, related_name="+"
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-borrowed", "book"], name="reports_book_top_idx"),
+        ]
+
+
+class AuthorStats(BorrowingStats):
+    author = models.CharField(max_length=255, primary_key=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-borrowed", "author"], name="reports_author_top_idx"),
+        ]
+
+
+class UserStats(BorrowingStats):
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="+",
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-borrowed", "user"], name="reports_user_top_idx"),
+        ]
@@ -0,0 +1,65 @@
+from rest_framework import serializers
+
+from reports.models import AuthorStats, BookStats, DailyStats, UserStats
+
+STATS_FIELDS = (
+    "borrowed",
+    "returned",
+    "returned_late",
+    "average_loan_days",
+    "late_return_rate",
+)
+
+
+class StatsSerializer(serializers.ModelSerializer):
+    average_loan_days = serializers.FloatField(read_only=True, allow_null=True)
+    late_return_rate = serializers.FloatField(read_only=True, allow_null=True)
+
+
+class DailyStatsSerializer(StatsSerializer):
+    class Meta:
+        model = DailyStats
+        fields = ("day",) + STATS_FIELDS
+
+
+class SummarySerializer(StatsSerializer):
+    class Meta:
+        model = DailyStats
+        fields = STATS_FIELDS
+
+
+class BookStatsSerializer(StatsSerializer):
+    title = serializers.CharField(source="book.title", read_only=True)
+    author = serializers.CharField(source="book.author", read_only=True)
+
+    class Meta:
+        model = BookStats
+        fields = ("book", "title", "author") + STATS_FIELDS
+
+
+class AuthorStatsSerializer(StatsSerializer):
+    class Meta:
+        model = AuthorStats
+        fields = ("author",) + STATS_FIELDS
+
+
+class UserStatsSerializer(StatsSerializer):
+    email = serializers.EmailField(source="user.email", read_only=True)
+
+    class Meta:
+        model = UserStats
+        fields = ("user", "email") + STATS_FIELDS
+
+
+class ReportPeriodSerializer(serializers.Serializer):
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        if (
+            "date_from" in attrs
+            and "date_to" in attrs
+            and attrs["date_from"] > attrs["date_to"]
+        ):
+            raise serializers.ValidationError("date_from must not be after date_to.")
+        return attrs
@@ -0,0 +1,101 @@
+from django.db import connection, transaction
+from django.db.models import Count, F, Func, IntegerField, Q, Sum, Value
+
+from borrowing.models import Borrowing
+from reports.models import AuthorStats, BookStats, DailyStats, UserStats
+
+COUNTERS = ("borrowed", "returned", "returned_late", "loan_days")
+
+# Rollup model -> (key of a checkout, key of a return).
+ROLLUPS = {
+    DailyStats: ("borrow_date", "actual_return_date"),
+    BookStats: ("book_id", "book_id"),
+    AuthorStats: ("book__author", "book__author"),
+    UserStats: ("user_id", "user_id"),
+}
+
+
+def add_stats(model, rows):
+    """Add grouped (key, *COUNTERS) rows to the rollup in one upsert.
+
+    `rows` come ordered by key, so concurrent upserts lock the rollup rows
+    they share in the same order and can't deadlock.
+    """
+    table = model._meta.db_table
+    key = model._meta.pk.column
+    sql, params = rows.query.sql_with_params()
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} ({key}, {', '.join(COUNTERS)}) {sql} "
+            f"ON CONFLICT ({key}) DO UPDATE SET "
+            + ", ".join(
+                f"{name} = {table}.{name} + EXCLUDED.{name}" for name in COUNTERS
+            ),
+            params,
+        )
+
+
+def record_borrowed(queryset):
+    """Count the borrowings in `queryset` as checkouts in every rollup."""
+    for model, (key, _) in ROLLUPS.items():
+        add_stats(
+            model,
+            queryset.order_by()
+            .values(key)
+            .annotate(
+                borrowed=Count("id"),
+                returned=Value(0),
+                returned_late=Value(0),
+                loan_days=Value(0),
+            )
+            .order_by(key),
+        )
+
+
+def record_returned(queryset):
+    """Count the returned borrowings in `queryset` in every rollup."""
+    queryset = queryset.filter(actual_return_date__isnull=False).order_by()
+    loan_days = Func(
+        F("actual_return_date"),
+        F("borrow_date"),
+        template="(%(expressions)s)",
+        arg_joiner=" - ",
+        output_field=IntegerField(),
+    )
+
+    for model, (_, key) in ROLLUPS.items():
+        add_stats(
+            model,
+            queryset.values(key)
+            .annotate(
+                borrowed=Value(0),
+                returned=Count("id"),
+                returned_late=Count(
+                    "id", filter=Q(actual_return_date__gt=F("expected_return_date"))
+                ),
+                loan_days=Sum(loan_days),
+            )
+            .order_by(key),
+        )
+
+
+def rebuild_stats():
+    """Recount every rollup from the borrowing table.
+
+    Checkouts and returns are counted right after they commit, so one that
+    commits just as the rebuild starts can be counted twice: rebuild while
+    the library is quiet.
+    """
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            # Hold off checkouts and returns so none is counted twice or lost.
+            cursor.execute(
+                f"LOCK TABLE {Borrowing._meta.db_table} IN SHARE ROW EXCLUSIVE MODE"
+            )
+
+        for model in ROLLUPS:
+            model.objects.all().delete()
+
+        record_borrowed(Borrowing.objects.all())
+        record_returned(Borrowing.objects.all())
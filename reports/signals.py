@@ -0,0 +1,22 @@
+from django.db import transaction
+from django.dispatch import receiver
+
+from borrowing.models import Borrowing
+from borrowing.signals import borrowings_created, borrowings_returned
+from reports.services import record_borrowed, record_returned
+
+
+# The rollups are counted after the checkout or return commits: every
+# transaction would otherwise hold today's DailyStats row until it ends.
+@receiver(borrowings_created)
+def count_checkouts(sender, borrowing_ids, **kwargs):
+    transaction.on_commit(
+        lambda: record_borrowed(Borrowing.objects.filter(id__in=borrowing_ids))
+    )
+
+
+@receiver(borrowings_returned)
+def count_returns(sender, borrowing_ids, **kwargs):
+    transaction.on_commit(
+        lambda: record_returned(Borrowing.objects.filter(id__in=borrowing_ids))
+    )
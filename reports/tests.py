@@ -0,0 +1,319 @@
+import threading
+from datetime import date, timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from books.models import Book
+from borrowing.models import Borrowing
+from reports.models import AuthorStats, BookStats, DailyStats, UserStats
+
+SUMMARY_URL = reverse("reports:summary")
+DAILY_URL = reverse("reports:dailystats-list")
+BOOKS_URL = reverse("reports:bookstats-list")
+AUTHORS_URL = reverse("reports:authorstats-list")
+USERS_URL = reverse("reports:userstats-list")
+
+
+def sample_book(**params):
+    defaults = {
+        "title": "Test book",
+        "author": "Test author",
+        "cover": "SOFT",
+        "inventory": 5,
+        "daily_fee": 4,
+    }
+    defaults.update(params)
+
+    return Book.objects.create(**defaults)
+
+
+def stats(model):
+    return list(
+        model.objects.order_by("pk").values_list(
+            "pk", "borrowed", "returned", "returned_late", "loan_days"
+        )
+    )
+
+
+class ReportRollupTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_superuser(
+            "admin@test.com",
+            "admin_password",
+        )
+        self.user = get_user_model().objects.create_user("user@test.com", "password")
+        self.book = sample_book(title="Dune", author="Herbert")
+        self.other_book = sample_book(title="Emma", author="Austen")
+        self.expected = date.today() + timedelta(days=7)
+
+    def borrow(self, user, book_ids):
+        self.client.force_authenticate(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(
+                reverse("borrowing:borrowing-bulk"),
+                {"books": book_ids, "expected_return_date": self.expected},
+                format="json",
+            )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        return [row["id"] for row in res.data]
+
+    def give_back(self, borrowing_ids):
+        self.client.force_authenticate(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(
+                reverse("borrowing:borrowing-bulk-return"),
+                {"borrowings": borrowing_ids},
+                format="json",
+            )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_rollups_follow_checkouts_and_returns(self):
+        today = date.today()
+        late, on_time = self.borrow(self.user, [self.book.id, self.book.id])
+        self.borrow(self.admin, [self.other_book.id])
+
+        Borrowing.objects.filter(id=late).update(
+            borrow_date=today - timedelta(days=10),
+            expected_return_date=today - timedelta(days=3),
+        )
+        self.give_back([late, on_time])
+
+        self.assertEqual(stats(DailyStats), [(today, 3, 2, 1, 10)])
+        self.assertEqual(
+            stats(BookStats),
+            [(self.book.id, 2, 2, 1, 10), (self.other_book.id, 1, 0, 0, 0)],
+        )
+        self.assertEqual(
+            stats(AuthorStats), [("Austen", 1, 0, 0, 0), ("Herbert", 2, 2, 1, 10)]
+        )
+        self.assertEqual(
+            stats(UserStats),
+            [(self.admin.id, 1, 0, 0, 0), (self.user.id, 2, 2, 1, 10)],
+        )
+
+    def test_rollups_wait_for_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.force_authenticate(self.user)
+            self.client.post(
+                reverse("borrowing:borrowing-bulk"),
+                {"books": [self.book.id], "expected_return_date": self.expected},
+                format="json",
+            )
+
+            self.assertEqual(stats(BookStats), [])
+
+        for callback in callbacks:
+            callback()
+
+        self.assertEqual(stats(BookStats), [(self.book.id, 1, 0, 0, 0)])
+
+    def test_rebuild_matches_incremental_rollups(self):
+        borrowing_ids = self.borrow(self.user, [self.book.id, self.other_book.id])
+        self.give_back(borrowing_ids[:1])
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("borrowing:borrowing-list"),
+                {"book": self.book.id, "expected_return_date": self.expected},
+            )
+
+        models = (DailyStats, BookStats, AuthorStats, UserStats)
+        incremental = [stats(model) for model in models]
+        BookStats.objects.update(borrowed=100)
+
+        call_command("rebuild_reports", stdout=StringIO())
+
+        self.assertEqual([stats(model) for model in models], incremental)
+        self.assertEqual(stats(DailyStats)[0][1:], (3, 1, 0, 0))
+
+
+class ReportApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_superuser(
+            "admin@test.com",
+            "admin_password",
+        )
+        self.client.force_authenticate(self.admin)
+
+        self.book = sample_book()
+        today = date.today()
+        DailyStats.objects.create(
+            day=today - timedelta(days=1),
+            borrowed=4,
+            returned=4,
+            returned_late=1,
+            loan_days=20,
+        )
+        DailyStats.objects.create(day=today, borrowed=2)
+        BookStats.objects.create(book=self.book, borrowed=6, returned=4, loan_days=8)
+        AuthorStats.objects.create(author="Test author", borrowed=6)
+        UserStats.objects.create(user=self.admin, borrowed=6)
+
+    def test_reports_require_admin(self):
+        self.client.force_authenticate(
+            get_user_model().objects.create_user("user@test.com", "password")
+        )
+
+        for url in (SUMMARY_URL, DAILY_URL, BOOKS_URL, AUTHORS_URL, USERS_URL):
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN, url)
+
+    def test_summary(self):
+        res = self.client.get(SUMMARY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data,
+            {
+                "borrowed": 6,
+                "returned": 4,
+                "returned_late": 1,
+                "average_loan_days": 5.0,
+                "late_return_rate": 0.25,
+            },
+        )
+
+        res = self.client.get(SUMMARY_URL, {"date_from": date.today()})
+        self.assertEqual(res.data["borrowed"], 2)
+        self.assertIsNone(res.data["average_loan_days"])
+
+    def test_daily_filtered_by_period(self):
+        today = date.today()
+
+        res = self.client.get(DAILY_URL, {"date_to": today - timedelta(days=1)})
+
+        self.assertEqual(
+            [row["day"] for row in res.data["results"]],
+            [str(today - timedelta(days=1))],
+        )
+
+        res = self.client.get(DAILY_URL, {"date_from": today, "date_to": "2000-01-01"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_top_lists(self):
+        book = self.client.get(BOOKS_URL).data["results"][0]
+        author = self.client.get(AUTHORS_URL).data["results"][0]
+        user = self.client.get(USERS_URL).data["results"][0]
+
+        self.assertEqual(book["title"], "Test book")
+        self.assertEqual(book["average_loan_days"], 2.0)
+        self.assertEqual(author["author"], "Test author")
+        self.assertEqual(user["email"], "admin@test.com")
+
+    def test_top_lists_page_through_ties(self):
+        books = Book.objects.bulk_create(
+            Book(title=f"Book {i}", author="Test author", inventory=1, daily_fee=1)
+            for i in range(1100)
+        )
+        BookStats.objects.bulk_create(
+            BookStats(book=book, borrowed=1) for book in books
+        )
+        AuthorStats.objects.bulk_create(
+            AuthorStats(author=f"Author {i:04}", borrowed=1) for i in range(1100)
+        )
+
+        for url, model, key in (
+            (BOOKS_URL, BookStats, "book"),
+            (AUTHORS_URL, AuthorStats, "author"),
+        ):
+            expected = list(
+                model.objects.order_by("-borrowed", "pk").values_list("pk", flat=True)
+            )
+
+            rows = []
+            params = {"page_size": 100}
+            with CaptureQueriesContext(connection) as queries:
+                while url:
+                    res = self.client.get(url, params)
+                    rows.extend(res.data["results"])
+                    url, params = res.data["next"], None
+
+            self.assertEqual([row[key] for row in rows], expected)
+            self.assertFalse(any("OFFSET" in query["sql"] for query in queries))
+
+    def test_reports_read_only_rollups(self):
+        for url in (SUMMARY_URL, DAILY_URL, BOOKS_URL, AUTHORS_URL, USERS_URL):
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(url)
+
+            self.assertEqual(len(queries), 1, url)
+            self.assertNotIn("borrowing_borrowing", queries[0]["sql"], url)
+
+
+@override_settings(
+    REST_FRAMEWORK={**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": {}}
+)
+class ConcurrentRollupTests(TransactionTestCase):
+    workers = 8
+    attempts = 5
+
+    def test_overlapping_bulk_checkouts_do_not_deadlock(self):
+        books = [
+            sample_book(title=f"Book {i}", author=f"Author {i}", inventory=1000)
+            for i in range(6)
+        ]
+        user = get_user_model().objects.create_user("user@test.com", "password")
+        barrier = threading.Barrier(self.workers)
+        statuses = []
+        errors = []
+
+        def worker(index):
+            client = APIClient()
+            client.force_authenticate(user)
+            # Half the workers send the books in the opposite order.
+            book_ids = [book.id for book in books]
+            if index % 2:
+                book_ids.reverse()
+            try:
+                barrier.wait()
+                for _ in range(self.attempts):
+                    res = client.post(
+                        reverse("borrowing:borrowing-bulk"),
+                        {
+                            "books": book_ids,
+                            "expected_return_date": date.today() + timedelta(days=7),
+                        },
+                        format="json",
+                    )
+                    statuses.append(res.status_code)
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=worker, args=(index,))
+            for index in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(
+            statuses, [status.HTTP_201_CREATED] * self.workers * self.attempts
+        )
+
+        checkouts = self.workers * self.attempts
+        self.assertEqual(
+            list(DailyStats.objects.values_list("borrowed", flat=True)),
+            [checkouts * len(books)],
+        )
+        self.assertEqual(
+            sorted(BookStats.objects.values_list("borrowed", flat=True)),
+            [checkouts] * len(books),
+        )
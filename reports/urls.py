@@ -0,0 +1,23 @@
+from django.urls import path, include
+from rest_framework import routers
+
+from reports.views import (
+    AuthorStatsViewSet,
+    BookStatsViewSet,
+    DailyStatsViewSet,
+    ReportSummaryView,
+    UserStatsViewSet,
+)
+
+router = routers.DefaultRouter()
+router.register("daily", DailyStatsViewSet)
+router.register("books", BookStatsViewSet)
+router.register("authors", AuthorStatsViewSet)
+router.register("users", UserStatsViewSet)
+
+urlpatterns = [
+    path("summary/", ReportSummaryView.as_view(), name="summary"),
+    path("", include(router.urls)),
+]
+
+app_name = "reports"
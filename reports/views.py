@@ -0,0 +1,88 @@
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
+from drf_spectacular.utils import extend_schema
+from rest_framework import mixins, viewsets
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from reports.models import AuthorStats, BookStats, DailyStats, UserStats
+from reports.serializers import (
+    AuthorStatsSerializer,
+    BookStatsSerializer,
+    DailyStatsSerializer,
+    ReportPeriodSerializer,
+    SummarySerializer,
+    UserStatsSerializer,
+)
+from reports.services import COUNTERS
+
+
+def filter_period(queryset, request):
+    serializer = ReportPeriodSerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+    period = serializer.validated_data
+
+    if "date_from" in period:
+        queryset = queryset.filter(day__gte=period["date_from"])
+
+    if "date_to" in period:
+        queryset = queryset.filter(day__lte=period["date_to"])
+
+    return queryset
+
+
+class StatsViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """Read-only view over a rollup table, busiest first.
+
+    Orderings end with the table's key: counts tie a lot, and the cursor
+    pages on (borrowed, key).
+    """
+
+    permission_classes = (IsAdminUser,)
+
+
+@extend_schema(tags=["Reports"], parameters=[ReportPeriodSerializer])
+class DailyStatsViewSet(StatsViewSet):
+    queryset = DailyStats.objects.order_by("day")
+    serializer_class = DailyStatsSerializer
+
+    def get_queryset(self):
+        return filter_period(self.queryset, self.request)
+
+
+@extend_schema(tags=["Reports"])
+class BookStatsViewSet(StatsViewSet):
+    queryset = BookStats.objects.select_related("book").order_by("-borrowed", "book")
+    serializer_class = BookStatsSerializer
+
+
+@extend_schema(tags=["Reports"])
+class AuthorStatsViewSet(StatsViewSet):
+    queryset = AuthorStats.objects.order_by("-borrowed", "author")
+    serializer_class = AuthorStatsSerializer
+
+
+@extend_schema(tags=["Reports"])
+class UserStatsViewSet(StatsViewSet):
+    queryset = UserStats.objects.select_related("user").order_by("-borrowed", "user")
+    serializer_class = UserStatsSerializer
+
+
+@extend_schema(
+    tags=["Reports"],
+    parameters=[ReportPeriodSerializer],
+    responses=SummarySerializer,
+)
+class ReportSummaryView(APIView):
+    """Totals over the daily rollup for the whole period."""
+
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        totals = filter_period(DailyStats.objects.all(), request).aggregate(
+            **{name: Coalesce(Sum(name), 0) for name in COUNTERS}
+        )
+
+        # An unsaved row is enough to reuse the average and rate properties.
+        return Response(SummarySerializer(DailyStats(**totals)).data)
@@ -0,0 +1,157 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from library_service_project.metrics import record_cache
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after `ttl` seconds."""
+
+    def __init__(self, name, max_size, ttl):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._get(key)
+
+        record_cache(self.name, value is not None)
+        return value
+
+    def _get(self, key):
+        item = self._data.get(key)
+
+        if item is None:
+            return None
+
+        expires, value = item
+        if expires < time.monotonic():
+            del self._data[key]
+            return None
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+user_state_cache = TTLCache(
+    "jwt_user",
+    max_size=settings.JWT_USER_CACHE["MAX_SIZE"],
+    ttl=settings.JWT_USER_CACHE["TTL"],
+)
+
+
+class ClaimsUser(TokenUser):
+    """User built from token claims, with flags confirmed against the DB."""
+
+    def __init__(self, token, is_staff, is_superuser):
+        super().__init__(token)
+        self.is_staff = is_staff
+        self.is_superuser = is_superuser
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT authentication that skips the user SELECT on reads.
+
+    Safe requests get a ClaimsUser whose is_active/is_staff come from a
+    per-process LRU/TTL cache; the DB is hit on a cache miss and for every
+    write, which also gets the real User instance.
+    """
+
+    def authenticate(self, request):
+        self.is_write = request.method not in SAFE_METHODS
+        return super().authenticate(request)
+
+    async def aauthenticate(self, request):
+        """Async twin of `authenticate` for safe requests."""
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        user_id = self.get_user_id(validated_token)
+        state = user_state_cache.get(user_id)
+
+        if state is None:
+            state = self.store_state(
+                user_id, await self.get_state_queryset(user_id).afirst()
+            )
+
+        return self.get_claims_user(validated_token, state), validated_token
+
+    def get_user(self, validated_token):
+        if self.is_write:
+            user = super().get_user(validated_token)
+            user_state_cache.set(
+                user.pk, (user.is_active, user.is_staff, user.is_superuser)
+            )
+            return user
+
+        user_id = self.get_user_id(validated_token)
+        state = user_state_cache.get(user_id)
+
+        if state is None:
+            state = self.store_state(user_id, self.get_state_queryset(user_id).first())
+
+        return self.get_claims_user(validated_token, state)
+
+    def get_user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+    def get_state_queryset(self, user_id):
+        return (
+            get_user_model()
+            .objects.filter(**{api_settings.USER_ID_FIELD: user_id})
+            .values_list("is_active", "is_staff", "is_superuser")
+        )
+
+    def store_state(self, user_id, state):
+        if state is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        user_state_cache.set(user_id, state)
+        return state
+
+    def get_claims_user(self, validated_token, state):
+        is_active, is_staff, is_superuser = state
+
+        if not is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        return ClaimsUser(validated_token, is_staff, is_superuser)
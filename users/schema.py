@@ -0,0 +1,12 @@
+from drf_spectacular.contrib.rest_framework_simplejwt import (
+    SimpleJWTScheme,
+    TokenObtainPairSerializerExtension,
+)
+
+
+class CachedJWTScheme(SimpleJWTScheme):
+    target_class = "users.authentication.CachedJWTAuthentication"
+
+
+class UserTokenObtainPairSerializerExtension(TokenObtainPairSerializerExtension):
+    target_class = "users.serializers.UserTokenObtainPairSerializer"
@@ -1,3 +1,256 @@
-from django.test import TestCase
+from datetime import date
 
-# Create your tests here.
+import jwt
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from books.models import Book
+from borrowing.models import Borrowing
+from library_service_project.testing import QueryBudgetMixin
+from users.authentication import user_state_cache
+
+BORROWING_URL = reverse("borrowing:borrowing-list")
+TOKEN_URL = reverse("users:token_obtain_pair")
+ME_URL = reverse("users:manage")
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        user_state_cache.clear()
+        caches["throttle"].clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "user@test.com",
+            "user_password",
+        )
+        res = self.client.post(
+            TOKEN_URL, {"email": "user@test.com", "password": "user_password"}
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {res.data['access']}")
+        self.access = res.data["access"]
+
+    def test_token_contains_user_claims(self):
+        claims = jwt.decode(self.access, settings.SECRET_KEY, algorithms=["HS256"])
+
+        self.assertEqual(claims["email"], "user@test.com")
+        self.assertFalse(claims["is_staff"])
+
+    def test_reads_skip_user_lookup_once_cached(self):
+        with self.assertNumQueries(2):
+            res = self.client.get(BORROWING_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(BORROWING_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_deactivated_user_rejected(self):
+        self.client.get(BORROWING_URL)
+
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(BORROWING_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_staff_flag_comes_from_database(self):
+        other = get_user_model().objects.create_user("other@test.com", "password")
+        book = Book.objects.create(
+            title="Test book",
+            author="Test author",
+            cover="SOFT",
+            inventory=2,
+            daily_fee=4,
+        )
+        Borrowing.objects.create(
+            book=book, user=other, expected_return_date=date.today()
+        )
+
+        res = self.client.get(BORROWING_URL, {"user_id": other.id})
+        self.assertEqual(res.data["results"], [])
+
+        self.user.is_staff = True
+        self.user.save()
+
+        res = self.client.get(BORROWING_URL, {"user_id": other.id})
+        self.assertEqual(len(res.data["results"]), 1)
+
+        res = self.client.post(
+            reverse("borrowing:borrowing-bulk-return"), {"books": [1]}, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_manage_user_gets_full_user(self):
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["email"], "user@test.com")
+
+
+class UserQueryBudgetTests(QueryBudgetMixin, TestCase):
+    # CreateUserView, ManageUserView and the simplejwt token views.
+    query_budgets = {
+        "create": 3,
+        "retrieve": 1,
+        "update": 4,
+        "partial_update": 2,
+        "token_obtain_pair": 1,
+        "token_refresh": 0,
+        "token_verify": 0,
+    }
+
+    def setUp(self):
+        user_state_cache.clear()
+        caches["throttle"].clear()
+        self.client = APIClient()
+        get_user_model().objects.create_user("user@test.com", "user_password")
+        self.tokens = self.client.post(
+            TOKEN_URL, {"email": "user@test.com", "password": "user_password"}
+        ).data
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.tokens['access']}")
+
+    def test_user_budgets(self):
+        payload = {"email": "user@test.com", "password": "new_password"}
+
+        responses = [
+            self.assertQueryBudget(
+                "create",
+                lambda: self.client.post(
+                    reverse("users:create"),
+                    {"email": "new@test.com", "password": "new_password"},
+                ),
+            ),
+            self.assertQueryBudget("retrieve", lambda: self.client.get(ME_URL)),
+            self.assertQueryBudget("update", lambda: self.client.put(ME_URL, payload)),
+            self.assertQueryBudget(
+                "partial_update",
+                lambda: self.client.patch(ME_URL, {"first_name": "Test"}),
+            ),
+        ]
+
+        self.assertEqual(
+            [res.status_code for res in responses],
+            [
+                status.HTTP_201_CREATED,
+                status.HTTP_200_OK,
+                status.HTTP_200_OK,
+                status.HTTP_200_OK,
+            ],
+        )
+
+    def test_token_budgets(self):
+        client = APIClient()
+
+        responses = [
+            self.assertQueryBudget(
+                "token_obtain_pair",
+                lambda: client.post(
+                    TOKEN_URL, {"email": "user@test.com", "password": "user_password"}
+                ),
+            ),
+            self.assertQueryBudget(
+                "token_refresh",
+                lambda: client.post(
+                    reverse("users:token_refresh"), {"refresh": self.tokens["refresh"]}
+                ),
+            ),
+            self.assertQueryBudget(
+                "token_verify",
+                lambda: client.post(
+                    reverse("users:token_verify"), {"token": self.tokens["access"]}
+                ),
+            ),
+        ]
+
+        self.assertEqual(
+            [res.status_code for res in responses], [status.HTTP_200_OK] * 3
+        )
+
+
+@override_settings(
+    REST_FRAMEWORK={
+        **settings.REST_FRAMEWORK,
+        "DEFAULT_THROTTLE_RATES": {"token.ip": "5/min", "token.user": "2/min"},
+    }
+)
+class TokenThrottleTests(TestCase):
+    def setUp(self):
+        caches["throttle"].clear()
+        self.client = APIClient()
+        get_user_model().objects.create_user("user@test.com", "user_password")
+
+    def login(self, email, password="wrong", **extra):
+        return self.client.post(
+            TOKEN_URL, {"email": email, "password": password}, **extra
+        )
+
+    def test_throttled_per_account(self):
+        for _ in range(2):
+            self.assertEqual(
+                self.login("user@test.com").status_code,
+                status.HTTP_401_UNAUTHORIZED,
+            )
+
+        res = self.login("USER@test.com", "user_password", REMOTE_ADDR="10.0.0.2")
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertGreater(int(res["Retry-After"]), 0)
+        self.assertEqual(
+            self.login("other@test.com").status_code, status.HTTP_401_UNAUTHORIZED
+        )
+
+    def test_throttled_per_ip(self):
+        for i in range(5):
+            self.login(f"user{i}@test.com")
+
+        self.assertEqual(
+            self.login("user@test.com", "user_password").status_code,
+            status.HTTP_429_TOO_MANY_REQUESTS,
+        )
+        self.assertEqual(
+            self.login(
+                "user@test.com", "user_password", REMOTE_ADDR="10.0.0.2"
+            ).status_code,
+            status.HTTP_200_OK,
+        )
+
+    def test_forwarded_for_does_not_change_ip(self):
+        for i in range(5):
+            self.login(f"user{i}@test.com", HTTP_X_FORWARDED_FOR=f"10.1.0.{i}")
+
+        res = self.login(
+            "user@test.com", "user_password", HTTP_X_FORWARDED_FOR="10.1.0.99"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @override_settings(
+        REST_FRAMEWORK={
+            **settings.REST_FRAMEWORK,
+            "DEFAULT_THROTTLE_RATES": {"token.ip": "5/min"},
+            "NUM_PROXIES": 1,
+        }
+    )
+    def test_forwarded_for_behind_proxy(self):
+        for i in range(5):
+            self.login(
+                f"user{i}@test.com", HTTP_X_FORWARDED_FOR=f"10.1.0.{i}, 10.2.0.1"
+            )
+
+        res = self.login(
+            "user@test.com",
+            "user_password",
+            HTTP_X_FORWARDED_FOR="10.1.0.99, 10.2.0.1",
+        )
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        res = self.login(
+            "user@test.com", "user_password", HTTP_X_FORWARDED_FOR="10.2.0.2"
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
@@ -1,11 +1,7 @@
 from django.urls import path
-from rest_framework_simplejwt.views import (
-    TokenObtainPairView,
-    TokenRefreshView,
-    TokenVerifyView,
-)
+from rest_framework_simplejwt.views import TokenRefreshView, TokenVerifyView
 
-from users.views import CreateUserView, ManageUserView
+from users.views import CreateUserView, ManageUserView, TokenObtainPairView
 
 app_name = "users"
 
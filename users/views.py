@@ -2,6 +2,9 @@ from drf_spectacular.utils import extend_schema
 from rest_framework import generics
 from rest_framework.permissions import IsAuthenticated
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt import views as jwt_views
+
+from library_service_project.throttling import IPThrottle, UserThrottle
 
 from users.serializers import UserSerializer
 
@@ -19,3 +22,10 @@ class ManageUserView(generics.RetrieveUpdateAPIView):
 
     def get_object(self):
         return self.request.user
+
+
+class TokenObtainPairView(jwt_views.TokenObtainPairView):
+    """Password hashing makes logins expensive; throttle per IP and account."""
+
+    throttle_classes = (IPThrottle, UserThrottle)
+    throttle_scope = "token"